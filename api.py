@@ -7,10 +7,22 @@ Users can add, update, delete, and list books through HTTP requests.
 """
 
 # Import necessary libraries
-from fastapi import FastAPI, HTTPException, Body
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from library import Library
+from async_library import AsyncLibrary
+from cache import ResponseCache
+from enrichment import EnrichmentQueue
+from metrics import RequestProfile, profiled
 
 # Pydantic models for request/response validation
 class BookModel(BaseModel):
@@ -23,13 +35,82 @@ class ISBNModel(BaseModel):
 	"""Model for requests that only need an ISBN"""
 	isbn: str    # ISBN code for book lookup
 
+class BulkISBNModel(BaseModel):
+	"""Model for adding many books at once"""
+	isbns: list[str] = Field(..., min_length=1, max_length=10000)  # ISBN codes to add
+	concurrency: int = Field(8, ge=1, le=32)  # Parallel Open Library lookups
+
+class BulkResultModel(BaseModel):
+	"""Model for the outcome of one ISBN in a bulk add"""
+	isbn: str                      # ISBN code
+	status: str                    # 'added', 'exists', 'not_found', ...
+	book: BookModel | None = None  # Added book details (if added)
+
+class ChangeModel(BaseModel):
+	"""Model for one entry of the library change log"""
+	seq: int                   # Sequence number, increasing with every change
+	op: str                    # 'insert', 'update' or 'delete'
+	isbn: str                  # ISBN code of the changed book
+	title: str | None = None   # Title after the change (before it, for deletes)
+	author: str | None = None  # Author after the change (before it, for deletes)
+	changed_at: int            # Unix timestamp of the change
+
+class ChangesModel(BaseModel):
+	"""Model for a page of the change log"""
+	changes: list[ChangeModel]  # Changes in sequence order
+	last_seq: int               # Pass back as 'since' to get the following changes
+
+class JobModel(BaseModel):
+	"""Model for the background metadata lookup of one book"""
+	isbn: str                      # ISBN code
+	status: str                    # 'pending', 'done' or 'failed'
+	attempts: int                  # Lookups made so far
+	last_error: str | None = None  # Why the last lookup failed (if it did)
+	next_attempt_at: float         # Unix time of the next lookup while pending
+	updated_at: float              # Unix time of the last status change
+
 class UpdateBookModel(BaseModel):
 	"""Model for updating book details (optional fields)"""
 	title: str | None = None   # New title (optional)
 	author: str | None = None  # New author (optional)
 
+# Create library instance for managing books
+# Open Library responses are cached on disk so repeated lookups skip the network
+# Set LIBRARY_BOOK_CACHE (e.g. 1024) to serve hot ISBN lookups from memory; only for a
+# single worker that is the sole writer, since writes by other processes do not invalidate it
+# Set LIBRARY_WRITE_BATCH_MS (0 or a small window such as 2) to commit concurrent writes together
+WRITE_BATCH_MS = os.environ.get("LIBRARY_WRITE_BATCH_MS")
+# Set OPENLIBRARY_RATE (requests per second) to stay under Open Library's rate limits
+OPENLIBRARY_RATE = os.environ.get("OPENLIBRARY_RATE")
+library = Library(
+	response_cache=ResponseCache(),
+	book_cache_size=int(os.environ.get("LIBRARY_BOOK_CACHE", "0")),
+	write_batch_window=float(WRITE_BATCH_MS) / 1000 if WRITE_BATCH_MS else None,
+	# LIBRARY_STORAGE=memory serves book lookups and listings from RAM (see storage.py)
+	storage=os.environ.get("LIBRARY_STORAGE", "sqlite"),
+	openlibrary_rate=float(OPENLIBRARY_RATE) if OPENLIBRARY_RATE else None,
+	openlibrary_concurrency=int(os.environ.get("OPENLIBRARY_CONCURRENCY", "10"))
+)
+# Async wrapper used by the endpoints so slow Open Library calls never block a worker thread
+alibrary = AsyncLibrary(library)
+# Worker threads that fill in metadata for books added with ?background=true
+enrichment = EnrichmentQueue(library)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	"""
+	Manage the library's connection pool for the lifetime of the app
+	Connections are opened lazily per worker thread and drained on shutdown
+	"""
+	enrichment.start()  # Resume lookups left pending by the last run
+	yield
+	enrichment.stop()
+	await alibrary.aclose()  # Close the async HTTP client
+	library.close()  # Close every pooled SQLite and HTTP connection
+	library.openlibrary.cache.close()
+
 # Create FastAPI application instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow web frontend to access API
 app.add_middleware(
@@ -38,70 +119,367 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Change-Seq", "ETag", "Last-Modified"],  # Let the frontend read pagination and cache headers
 )
 
-# Create library instance for managing books
-library = Library()
+# Per-request cProfile dumps are opt-in: set LIBRARY_PROFILE_DIR, then send 'X-Profile: 1'
+PROFILE_DIR = os.environ.get("LIBRARY_PROFILE_DIR")
+# Profile one request at a time so dumps do not mix
+profile_lock = asyncio.Lock()
+
+async def profiled_call(request: Request, call_next):
+	"""
+	Handle a request under cProfile and write the stats to PROFILE_DIR
+	The file name is returned in the X-Profile-File header
+	"""
+	async with profile_lock:
+		with RequestProfile() as profile:
+			response = await call_next(request)
+		name = request.url.path.strip("/").replace("/", "_") or "root"
+		path = os.path.join(PROFILE_DIR, f"{time.time_ns()}-{request.method}-{name}.prof")
+		os.makedirs(PROFILE_DIR, exist_ok=True)
+		await asyncio.to_thread(profile.dump, path)
+	response.headers["X-Profile-File"] = path
+	return response
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+	"""
+	Record every request's duration in the library_http_request_seconds histogram
+	"""
+	start = time.perf_counter()
+	status = 500  # Reported if the app raises
+	try:
+		if PROFILE_DIR and request.headers.get("x-profile") == "1" and not profile_lock.locked():
+			response = await profiled_call(request, call_next)
+		else:
+			response = await call_next(request)
+		status = response.status_code
+		return response
+	finally:
+		# Label by route template, not the raw path, to keep the number of series bounded
+		route = request.scope.get("route")
+		library.metrics.observe(
+			"library_http_request_seconds",
+			time.perf_counter() - start,
+			method=request.method,
+			route=route.path if route else "unmatched",
+			status=str(status),
+		)
+
+def validator_headers(version: int, modified_at: int, variant: str = ""):
+	"""
+	Build the cache validator headers for the current data version
+	'no-cache' makes browsers revalidate with If-None-Match instead of reusing stale data
+	"""
+	return {
+		"ETag": f'W/"{version}{variant}"',
+		"Last-Modified": formatdate(modified_at, usegmt=True),
+		"Cache-Control": "no-cache",
+		"Vary": "Accept",
+	}
+
+def is_not_modified(request: Request, headers: dict, modified_at: int):
+	"""
+	Check the request's conditional headers against the current validators
+	If-None-Match takes precedence over If-Modified-Since
+	"""
+	if_none_match = request.headers.get("if-none-match")
+	if if_none_match is not None:
+		# Weak comparison: ignore the W/ prefix on both sides
+		current = headers["ETag"].removeprefix("W/")
+		tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+		return "*" in tags or current in tags
+	if_modified_since = request.headers.get("if-modified-since")
+	if if_modified_since:
+		try:
+			return parsedate_to_datetime(if_modified_since).timestamp() >= modified_at
+		except (TypeError, ValueError):
+			return False
+	return False
+
+async def fast_books_response(after: str | None, limit: int | None, ndjson: bool):
+	"""
+	Build a GET /books response from JSON made by SQLite, skipping Pydantic models
+	Without a limit the rows are streamed batch by batch as they are read
+	"""
+	media_type = "application/x-ndjson" if ndjson else "application/json"
+
+	def render(rows):
+		# Join the ready-made JSON objects into NDJSON lines or a JSON array
+		if ndjson:
+			for _, book_json in rows:
+				yield (book_json + "\n").encode()
+			return
+		yield b"["
+		for i, (_, book_json) in enumerate(rows):
+			yield (book_json if i == 0 else "," + book_json).encode()
+		yield b"]"
+
+	if limit is None:
+		return StreamingResponse(render(library.iter_books_json(after_isbn=after)), media_type=media_type)
+
+	# Read one extra row to find out whether another page exists
+	rows = await alibrary.list_books_json(after_isbn=after, limit=limit + 1)
+	headers = {}
+	if len(rows) > limit:
+		rows = rows[:limit]
+		headers["X-Next-Cursor"] = rows[-1][0]
+	return Response(b"".join(render(rows)), media_type=media_type, headers=headers)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+	"""
+	Expose counters and latency histograms in the Prometheus text format
+	Covers API requests, Open Library calls, SQLite statements and cache hits
+	"""
+	library.metrics.set("library_book_cache_size", library.cache_stats()["size"])
+	return PlainTextResponse(library.metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/books", response_model=list[BookModel])
-def get_books():
+async def get_books(
+	request: Request,
+	response: Response,
+	limit: int | None = Query(None, ge=1, le=1000),
+	after: str | None = None,
+	format: Literal["json", "ndjson"] | None = None,
+	author: str | None = Query(None, min_length=1),
+	title_prefix: str | None = Query(None, min_length=1),
+):
 	"""
-	Get all books in the library
-	Returns: List of all books with their details
+	Get books in the library
+	Without a limit all books are returned, or with 'after' every book after that
+	ISBN. With a limit, books are returned in ISBN order one page at a time; pass
+	the X-Next-Cursor response header back as 'after' to fetch the next page.
+	Passing format=json, format=ndjson or 'Accept: application/x-ndjson' selects
+	the fast path: rows are serialized by SQLite and streamed without Pydantic models.
+	'author' (the full name of any one of a book's authors) and 'title_prefix' filter
+	the books, ignoring case; both are answered from indexes and page like the unfiltered list.
+	Args: optional page size, cursor, output format and filters as query parameters
+	Returns: List of books with their details
 	"""
-	# Get all books from library and convert to API model format
-	return [BookModel(title=book.title, author=book.author, isbn=book.isbn) for book in library.list_books()]
+	filtered = author is not None or title_prefix is not None
+	if filtered and format is not None:
+		raise HTTPException(status_code=400, detail="Filters cannot be combined with format.")
+	ndjson = not filtered and (format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""))
+
+	# Answer with 304 if the client's copy is still current
+	version, modified_at = await alibrary.data_version()
+	headers = validator_headers(version, modified_at, "-ndjson" if ndjson else "")
+	if is_not_modified(request, headers, modified_at):
+		return Response(status_code=304, headers=headers)
+
+	if format is not None or ndjson:
+		fast_response = await fast_books_response(after, limit, ndjson)
+		fast_response.headers.update(headers)
+		return fast_response
+
+	response.headers.update(headers)
+	# Clients can follow /books/changes from here; read before the books so no change is missed
+	response.headers["X-Change-Seq"] = str(await alibrary.last_change_seq())
+
+	if filtered:
+		# Read one extra row to find out whether another page exists
+		books = await alibrary.find_books(
+			author=author, title_prefix=title_prefix, after_isbn=after, limit=None if limit is None else limit + 1
+		)
+	elif limit is None:
+		# Get all books (after the cursor, if one is given) and convert to API model format
+		return [BookModel(title=book.title, author=book.author, isbn=book.isbn) for book in await alibrary.list_books(after_isbn=after)]
+	else:
+		# Read one extra row to find out whether another page exists
+		books = await alibrary.list_books(after_isbn=after, limit=limit + 1)
+	if limit is not None and len(books) > limit:
+		books = books[:limit]
+		response.headers["X-Next-Cursor"] = books[-1].isbn
+	return [BookModel(title=book.title, author=book.author, isbn=book.isbn) for book in books]
+
+@app.get("/books/search", response_model=list[BookModel])
+async def search_books(
+	q: str = Query(..., min_length=1),
+	limit: int = Query(20, ge=1, le=100),
+	offset: int = Query(0, ge=0),
+):
+	"""
+	Search books by title, author or ISBN
+	Args: search text, page size and offset as query parameters
+	Returns: Matching books, best matches first
+	"""
+	# Full-text search runs in the database, so cost scales with the result size
+	return [BookModel(title=book.title, author=book.author, isbn=book.isbn) for book in await alibrary.search(q, limit=limit, offset=offset)]
+
+@app.get("/books/changes", response_model=ChangesModel)
+async def get_changes(since: int = Query(0, ge=0), limit: int = Query(500, ge=1, le=5000)):
+	"""
+	Get the changes made to the library after a sequence number
+	Args: last seen sequence number and page size as query parameters
+	Returns: Changes in order and the sequence number to continue from
+	"""
+	changes = await alibrary.changes(since, limit)
+	return ChangesModel(
+		changes=[ChangeModel(**change) for change in changes],
+		last_seq=changes[-1]["seq"] if changes else since,
+	)
+
+# Seconds between change log polls, and between keep-alive comments, on the event stream
+SSE_POLL_INTERVAL = 1.0
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+def sse_event(change: dict):
+	"""
+	Format one change as a Server-Sent Event
+	"""
+	return f"id: {change['seq']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+
+@app.get("/books/changes/stream")
+async def stream_changes(request: Request, since: int | None = Query(None, ge=0)):
+	"""
+	Stream library changes as Server-Sent Events
+	Without 'since', only changes made after connecting are sent. Reconnecting
+	EventSource clients resume from their Last-Event-ID header.
+	Args: optional last seen sequence number as query parameter
+	Returns: A text/event-stream of 'change' events
+	"""
+	last_event_id = request.headers.get("last-event-id", "")
+	if last_event_id.isdigit():
+		since = int(last_event_id)
+	if since is None:
+		since = await alibrary.last_change_seq()
+
+	async def events():
+		last_seq = since
+		idle = 0.0
+		while not await request.is_disconnected():
+			changes = await alibrary.changes(last_seq)
+			for change in changes:
+				last_seq = change["seq"]
+				yield sse_event(change)
+			if changes:
+				idle = 0.0
+				continue
+			await asyncio.sleep(SSE_POLL_INTERVAL)
+			idle += SSE_POLL_INTERVAL
+			if idle >= SSE_KEEPALIVE_INTERVAL:
+				# Comment line keeps proxies from closing an idle connection
+				idle = 0.0
+				yield ": keep-alive\n\n"
+
+	return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/books/{isbn}", response_model=BookModel)
+async def get_book(isbn: str, request: Request, response: Response):
+	"""
+	Get one book by ISBN
+	Args: ISBN in URL path
+	Returns: Book details
+	"""
+	# Answer with 304 if nothing in the library changed since the client's copy
+	version, modified_at = await alibrary.data_version()
+	headers = validator_headers(version, modified_at)
+	if is_not_modified(request, headers, modified_at):
+		return Response(status_code=304, headers=headers)
+
+	book = await alibrary.find_book(isbn)
+	if not book:
+		raise HTTPException(status_code=404, detail="Book not found.")
+	response.headers.update(headers)
+	return BookModel(title=book.title, author=book.author, isbn=book.isbn)
 
 @app.post("/books", response_model=BookModel)
-def add_book(isbn_data: ISBNModel):
+async def add_book(isbn_data: ISBNModel, background: bool = False):
 	"""
 	Add a new book by ISBN
 	The system will fetch book details from Open Library API
-	Args: ISBN code in request body
-	Returns: Added book details
-	"""
-	# Try to add book using ISBN
-	result = library.add_book(isbn_data.isbn)
-	if result:
-		# If successful, get the book details and return them
-		book = library.find_book(isbn_data.isbn)
+	With background=true the book is stored at once with placeholder details and
+	202 Accepted is returned; the details are fetched by a background worker with
+	retries. Follow the job at GET /books/{isbn}/enrichment.
+	Args: ISBN code in request body, optional background flag as query parameter
+	Returns: Added book details, or the lookup job with background=true
+	"""
+	if background:
+		job = await asyncio.to_thread(profiled, enrichment.add_book, isbn_data.isbn)
+		if job is None:
+			raise HTTPException(status_code=400, detail="Book could not be added. Check ISBN or API.")
+		return JSONResponse(
+			JobModel(**job).model_dump(),
+			status_code=202,
+			headers={"Location": f"/books/{job['isbn']}/enrichment"},
+		)
+
+	# Try to add book using ISBN; the stored book is returned directly
+	book = await alibrary.add_book(isbn_data.isbn)
+	if book:
 		return BookModel(title=book.title, author=book.author, isbn=book.isbn)
 	# If failed, return error
 	raise HTTPException(status_code=400, detail="Book could not be added. Check ISBN or API.")
 
+@app.post("/books/bulk", response_model=list[BulkResultModel])
+async def add_books(bulk_data: BulkISBNModel):
+	"""
+	Add many books by ISBN in one request
+	Metadata is fetched concurrently and all books are saved in one transaction
+	Args: list of ISBN codes (and optional concurrency) in request body
+	Returns: One result per distinct ISBN
+	"""
+	report = await alibrary.add_books(bulk_data.isbns, concurrency=bulk_data.concurrency)
+	return [
+		BulkResultModel(
+			isbn=item["isbn"],
+			status=item["status"],
+			book=BookModel(title=item["book"].title, author=item["book"].author, isbn=item["book"].isbn) if item["book"] else None,
+		)
+		for item in report
+	]
+
+@app.get("/books/{isbn}/enrichment", response_model=JobModel)
+async def get_enrichment_job(isbn: str):
+	"""
+	Get the status of a book's background metadata lookup
+	Args: ISBN in URL path
+	Returns: The lookup job
+	"""
+	job = await asyncio.to_thread(profiled, enrichment.job, isbn)
+	if job is None:
+		raise HTTPException(status_code=404, detail="No enrichment job for this book.")
+	return JobModel(**job)
+
+@app.post("/books/enrichment/backfill")
+async def backfill_enrichment():
+	"""
+	Queue a fresh lookup for every book with a pending title or an 'Unknown' author
+	Returns: The number of books queued
+	"""
+	isbns = await asyncio.to_thread(profiled, enrichment.backfill)
+	return {"queued": len(isbns)}
+
 @app.put("/books/{isbn}", response_model=BookModel)
-def update_book(isbn: str, update: UpdateBookModel = Body(...)):
+async def update_book(isbn: str, update: UpdateBookModel = Body(...)):
 	"""
 	Update book details by ISBN
 	Args: ISBN in URL path, new details in request body
 	Returns: Updated book details
 	"""
-	# First check if book exists
-	book = library.find_book(isbn)
-	if not book:
-		raise HTTPException(status_code=404, detail="Book not found.")
-	
-	# Update the book with new details
-	updated = library.update_book(isbn, title=update.title, author=update.author)
-	if updated:
-		# Return updated book details
-		book = library.find_book(isbn)
+	# Nothing to change, return error
+	if update.title is None and update.author is None:
+		raise HTTPException(status_code=400, detail="Book could not be updated.")
+
+	# Update the book; the updated row is returned by the same statement
+	book = await alibrary.update_book(isbn, title=update.title, author=update.author)
+	if book:
 		return BookModel(title=book.title, author=book.author, isbn=book.isbn)
-	# If update failed, return error
-	raise HTTPException(status_code=400, detail="Book could not be updated.")
+	# If no book matched, return error
+	raise HTTPException(status_code=404, detail="Book not found.")
 
 @app.delete("/books/{isbn}")
-def delete_book(isbn: str):
+async def delete_book(isbn: str):
 	"""
 	Delete a book by ISBN
 	Args: ISBN in URL path
 	Returns: Success message
 	"""
-	# Check if book exists before trying to delete
-	book = library.find_book(isbn)
+	# Delete the book; the removed row tells us whether it existed
+	book = await alibrary.remove_book(isbn)
 	if book:
-		# Delete the book
-		library.remove_book(isbn)
 		return {"message": "Book deleted."}
 	# If book not found, return error
 	raise HTTPException(status_code=404, detail="Book not found.")
@@ -0,0 +1,190 @@
+import asyncio
+from itertools import islice
+from book import canonical_isbn
+from library import Library
+from metrics import profiled
+from openlibrary import AsyncOpenLibraryClient, MetadataError
+
+
+class AsyncLibrary:
+    """
+    Async front end to a Library for use from an event loop.
+
+    Open Library lookups are awaited on an httpx.AsyncClient, so a slow upstream
+    never ties up a thread; they share the library's rate limiter. Database work
+    is short and runs on worker threads via asyncio.to_thread, each using its
+    pooled SQLite connection. That work is included in the current request's
+    profile when one is being taken.
+
+    Attributes:
+        library (Library): The wrapped synchronous library.
+        openlibrary (AsyncOpenLibraryClient): The async metadata client.
+    """
+
+    def __init__(self, library: Library, http=None):
+        """
+        Initializes the AsyncLibrary around an existing Library.
+
+        Args:
+            library (Library): The library to wrap.
+            http (httpx.AsyncClient, optional): A shared async HTTP client. Defaults to None.
+        """
+        self.library = library
+        self.openlibrary = AsyncOpenLibraryClient(
+            http, cache=library.openlibrary.cache, metrics=library.metrics, known_authors=library.author_names,
+            limiter=library.openlibrary.limiter, max_retries=library.openlibrary.max_retries,
+            retry_backoff=library.openlibrary.retry_backoff
+        )
+
+    async def aclose(self):
+        """
+        Close the async HTTP client.
+        """
+        await self.openlibrary.aclose()
+
+    async def add_book(self, isbn: str):
+        """
+        Add a book by ISBN using the Open Library API.
+
+        Unlike Library.add_book, the stored book itself is returned, so callers
+        need no extra lookup. Concurrent adds of the same book, e.g. from a
+        double-clicked form, make one lookup and one insert and all get its result.
+
+        Args:
+            isbn (str): The ISBN of the book to add.
+
+        Returns:
+            Book or None: The added book, or None if it could not be added.
+        """
+        return await self.openlibrary.flights.do("add_book", canonical_isbn(isbn), self._add_book, isbn)
+
+    async def _add_book(self, isbn: str):
+        # Duplicates are rejected from the local index without any network call
+        if await self.find_book(isbn) is not None:
+            print("Bu ISBN zaten mevcut.")
+            return None
+
+        try:
+            book = await self.openlibrary.fetch_book(isbn)
+        except MetadataError as e:
+            print(e)
+            return None
+        return await asyncio.to_thread(profiled, self.library._insert_book, book)
+
+    async def add_books(self, isbns, concurrency: int = 8):
+        """
+        Add many books by ISBN with at most `concurrency` lookups in flight.
+
+        Args:
+            isbns (iterable): The ISBNs to add. Blank entries and repeats are ignored.
+            concurrency (int): The maximum number of parallel lookups. Defaults to 8.
+
+        Returns:
+            list: The per-ISBN report described in Library.add_books.
+        """
+        report, to_fetch = await asyncio.to_thread(profiled, self.library._plan_bulk_add, isbns)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(isbn):
+            async with semaphore:
+                return await self.openlibrary.fetch_book(isbn)
+
+        results = await asyncio.gather(*(fetch(isbn) for isbn in to_fetch), return_exceptions=True)
+        books = []
+        for isbn, result in zip(to_fetch, results):
+            if isinstance(result, MetadataError):
+                report[isbn]["status"] = result.status
+            elif isinstance(result, Exception):
+                report[isbn]["status"] = "error"
+            else:
+                books.append(result)
+
+        for book in await asyncio.to_thread(profiled, self.library._insert_books, books):
+            report[book.isbn].update(status="added", book=book)
+        return list(report.values())
+
+    async def update_book(self, isbn: str, title: str = None, author: str = None):
+        """
+        Update book details by ISBN. See Library.update_book.
+        """
+        return await asyncio.to_thread(profiled, self.library.update_book, isbn, title=title, author=author)
+
+    async def remove_book(self, isbn: str):
+        """
+        Remove a book by ISBN. See Library.remove_book.
+        """
+        return await asyncio.to_thread(profiled, self.library.remove_book, isbn)
+
+    async def data_version(self):
+        """
+        Return the data version and last modification time. See Library.data_version.
+        """
+        return await asyncio.to_thread(profiled, self.library.data_version)
+
+    async def changes(self, since: int = 0, limit: int = 500):
+        """
+        Return logged changes after a sequence number. See Library.changes.
+        """
+        return await asyncio.to_thread(profiled, self.library.changes, since, limit)
+
+    async def last_change_seq(self):
+        """
+        Return the latest change sequence number. See Library.last_change_seq.
+        """
+        return await asyncio.to_thread(profiled, self.library.last_change_seq)
+
+    async def find_book(self, isbn: str):
+        """
+        Find a book by ISBN. See Library.find_book.
+        """
+        return await asyncio.to_thread(profiled, self.library.find_book, isbn)
+
+    async def find_books(self, author: str = None, title_prefix: str = None, after_isbn: str = None, limit: int = None):
+        """
+        Return books matching an author and/or a title prefix. See Library.find_books.
+        """
+        return await asyncio.to_thread(
+            profiled, self.library.find_books, author=author, title_prefix=title_prefix, after_isbn=after_isbn, limit=limit
+        )
+
+    async def list_books(self, after_isbn: str = None, limit: int = None):
+        """
+        Return books from the library.
+
+        Args:
+            after_isbn (str, optional): Start after this ISBN (exclusive). Defaults to None.
+            limit (int, optional): The page size. If None, every book (after after_isbn,
+                if given) is returned.
+
+        Returns:
+            list: A list of Book objects; in ISBN order when a limit or after_isbn is given.
+        """
+        if limit is None and after_isbn is None:
+            return await asyncio.to_thread(profiled, self.library.list_books)
+
+        def page():
+            return list(islice(self.library.iter_books(after_isbn=after_isbn, batch_size=limit or 500), limit))
+
+        return await asyncio.to_thread(profiled, page)
+
+    async def list_books_json(self, after_isbn: str = None, limit: int = 100):
+        """
+        Return one page of books as JSON text. See Library.iter_books_json.
+
+        Args:
+            after_isbn (str, optional): Start after this ISBN (exclusive). Defaults to None.
+            limit (int): The page size. Defaults to 100.
+
+        Returns:
+            list: (isbn, JSON text) tuples in ISBN order.
+        """
+        def page():
+            return list(islice(self.library.iter_books_json(after_isbn=after_isbn, batch_size=limit), limit))
+
+        return await asyncio.to_thread(profiled, page)
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Full-text search. See Library.search.
+        """
+        return await asyncio.to_thread(profiled, self.library.search, query, limit=limit, offset=offset)
@@ -0,0 +1,5 @@
+"""
+Performance tooling for the Library Management System.
+
+Run the Library microbenchmarks with `python -m benchmarks.bench_library`.
+"""
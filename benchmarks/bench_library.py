@@ -0,0 +1,271 @@
+"""
+Microbenchmarks for Library operations.
+
+Seeds SQLite catalogs of increasing size, then measures the latency and
+throughput of add_book, find_book, list_books, iter_books, search,
+update_book and remove_book. Open Library is replaced by FakeOpenLibrary,
+so add_book timings include a configurable simulated upstream latency
+instead of real network calls.
+
+Usage:
+    python -m benchmarks.bench_library --sizes 1000,100000,1000000 --output bench_results.json
+    python -m benchmarks.bench_library --baseline old_results.json --threshold 20
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from itertools import islice
+from benchmarks.fake_openlibrary import FakeOpenLibrary
+from book import Book, canonical_isbn
+from library import Library
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+
+def synthetic_isbn(n: int):
+    """
+    Return a valid, unique ISBN-13 for a sequence number.
+    """
+    return canonical_isbn(f"{n:09d}0")
+
+
+def seed(library: Library, size: int, batch_size: int = 10000):
+    """
+    Fill an empty library with `size` synthetic books using the bulk insert path.
+
+    Args:
+        library (Library): The library to fill.
+        size (int): The number of books.
+        batch_size (int): Books per transaction. Defaults to 10000.
+    """
+    for start in range(0, size, batch_size):
+        books = [
+            Book(f"Book {n}", f"Author {n % 1000}", synthetic_isbn(n))
+            for n in range(start, min(start + batch_size, size))
+        ]
+        library._insert_books(books)
+
+
+def percentile(sorted_values, fraction: float):
+    """
+    Return the nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(operation: str, size: int, samples_ns):
+    """
+    Turn per-call timings into a result record.
+
+    Args:
+        operation (str): The operation name.
+        size (int): The catalog size the operation ran against.
+        samples_ns (list): Per-call durations in nanoseconds.
+
+    Returns:
+        dict: Count, throughput and latency statistics in milliseconds.
+    """
+    samples = sorted(samples_ns)
+    total_s = sum(samples) / 1e9
+    to_ms = 1e-6
+    return {
+        "operation": operation,
+        "size": size,
+        "count": len(samples),
+        "ops_per_sec": round(len(samples) / total_s, 2) if total_s else None,
+        "mean_ms": round(sum(samples) / len(samples) * to_ms, 4),
+        "p50_ms": round(percentile(samples, 0.50) * to_ms, 4),
+        "p95_ms": round(percentile(samples, 0.95) * to_ms, 4),
+        "p99_ms": round(percentile(samples, 0.99) * to_ms, 4),
+        "max_ms": round(samples[-1] * to_ms, 4),
+    }
+
+
+def measure(func, args_list):
+    """
+    Call func once per argument tuple and return the durations in nanoseconds.
+    """
+    samples = []
+    for args in args_list:
+        start = time.perf_counter_ns()
+        func(*args)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def bench_size(size: int, db_path: str, iterations: int, latency: float, book_cache_size: int = 0, rng=None, storage: str = "sqlite"):
+    """
+    Seed one catalog and benchmark every operation against it.
+
+    Args:
+        size (int): The number of books to seed.
+        db_path (str): Where to create the database.
+        iterations (int): Calls per operation (list_books uses fewer on large catalogs).
+        latency (float): Simulated Open Library latency per request in seconds.
+        book_cache_size (int): Library book cache size; 0 disables it. Defaults to 0.
+        rng (random.Random, optional): Source of randomness for key selection.
+        storage (str): The Library storage, 'sqlite' or 'memory'. Defaults to 'sqlite'.
+
+    Returns:
+        list: One result record per operation, including seeding.
+    """
+    rng = rng or random.Random(0)
+    fake = FakeOpenLibrary(latency=latency)
+    results = []
+    with Library(db_path, book_cache_size=book_cache_size, storage=storage) as library:
+        # Keep the client Library wires up (known authors, rate limiter, coalescing), answered by the fake
+        library.openlibrary.http = fake.client()
+
+        start = time.perf_counter_ns()
+        seed(library, size)
+        results.append(summarize("seed", size, [time.perf_counter_ns() - start]))
+
+        existing = [(synthetic_isbn(rng.randrange(size)),) for _ in range(iterations)]
+        missing = [(synthetic_isbn(size + 10 * iterations + i),) for i in range(iterations)]
+        new_isbns = [(synthetic_isbn(size + i),) for i in range(iterations)]
+
+        results.append(summarize("find_book", size, measure(library.find_book, existing)))
+        results.append(summarize("find_book_miss", size, measure(library.find_book, missing)))
+        results.append(summarize("search", size, measure(
+            lambda q: library.search(q, limit=20), [(str(rng.randrange(size)),) for _ in range(iterations)]
+        )))
+        results.append(summarize("iter_books_page", size, measure(
+            lambda after: list(islice(library.iter_books(after_isbn=after, batch_size=100), 100)), existing
+        )))
+        list_iterations = max(1, min(iterations, 1000000 // max(size, 1)))
+        results.append(summarize("list_books", size, measure(library.list_books, [()] * list_iterations)))
+
+        # add_book prints a status line per call; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(summarize("add_book", size, measure(library.add_book, new_isbns)))
+        results.append(summarize("update_book", size, measure(
+            lambda isbn: library.update_book(isbn, title="Updated"), existing
+        )))
+        results.append(summarize("remove_book", size, measure(library.remove_book, new_isbns)))
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, iterations: int = 200, latency: float = 0.02, book_cache_size: int = 0, workdir: str = None,
+                   storage: str = "sqlite"):
+    """
+    Benchmark every catalog size and collect machine-readable results.
+
+    Args:
+        sizes (iterable): Catalog sizes to seed. Defaults to 1k, 100k and 1M books.
+        iterations (int): Calls per operation. Defaults to 200.
+        latency (float): Simulated Open Library latency in seconds. Defaults to 0.02.
+        book_cache_size (int): Library book cache size; 0 disables it. Defaults to 0.
+        workdir (str, optional): Directory for the databases; a temporary one by default.
+        storage (str): The Library storage, 'sqlite' or 'memory'. Defaults to 'sqlite'.
+
+    Returns:
+        dict: 'environment', 'parameters' and a list of 'results' records.
+    """
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            "sizes": list(sizes),
+            "iterations": iterations,
+            "latency": latency,
+            "book_cache_size": book_cache_size,
+            "storage": storage,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in sizes:
+            db_path = os.path.join(tmp, f"bench_{size}.db")
+            report["results"].extend(bench_size(size, db_path, iterations, latency, book_cache_size, storage=storage))
+    return report
+
+
+def compare(report: dict, baseline: dict, threshold: float = 20.0, metric: str = "p50_ms"):
+    """
+    Find operations that got slower than a baseline report.
+
+    Args:
+        report (dict): The current results.
+        baseline (dict): Results from an earlier run.
+        threshold (float): Allowed slowdown in percent. Defaults to 20.
+        metric (str): The statistic to compare. Defaults to 'p50_ms'.
+
+    Returns:
+        list: Descriptions of operations that regressed beyond the threshold.
+    """
+    previous = {(r["operation"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["operation"], result["size"]))
+        if not before or not before.get(metric):
+            continue
+        change = (result[metric] - before[metric]) / before[metric] * 100
+        if change > threshold:
+            regressions.append(
+                f"{result['operation']} @ {result['size']}: {metric} {before[metric]} -> {result[metric]} (+{change:.1f}%)"
+            )
+    return regressions
+
+
+def print_table(report: dict):
+    """
+    Print the results as an aligned text table.
+    """
+    print(f"{'operation':<16}{'size':>10}{'count':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in report["results"]:
+        print(
+            f"{r['operation']:<16}{r['size']:>10}{r['count']:>8}{r['ops_per_sec'] or 0:>12}"
+            f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Library operations on synthetic catalogs.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per operation (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="simulated Open Library latency in seconds (default: %(default)s)")
+    parser.add_argument("--book-cache", type=int, default=0, help="Library book cache size (default: disabled)")
+    parser.add_argument("--storage", choices=("sqlite", "memory"), default="sqlite",
+                        help="where Library reads books from (default: %(default)s)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file (default: %(default)s)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="allowed p50 slowdown against the baseline in percent (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run_benchmarks(sizes, args.iterations, args.latency, args.book_cache, storage=args.storage)
+    print_table(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Local stand-in for the Open Library API used by the benchmarks.
+
+Answers the ISBN, author and books endpoints with synthetic data after a
+configurable delay, and can inject errors and missing books, so Library
+operations can be measured without touching the real service.
+
+It can also be served over HTTP, e.g. for a load test against a separately
+started API server:
+    python -m benchmarks.fake_openlibrary --port 8001 --latency 0.05 --error-rate 0.01
+    OPENLIBRARY_URL=http://127.0.0.1:8001 uvicorn api:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from urllib.parse import parse_qsl
+import httpx
+
+
+class FakeOpenLibrary:
+    """
+    Synthetic Open Library responses with injectable latency and failures.
+
+    Attributes:
+        latency (float): Seconds each request takes.
+        error_rate (float): Fraction of requests answered with HTTP 503.
+        not_found_rate (float): Fraction of ISBN lookups answered with HTTP 404.
+        authors_per_book (int): Number of author keys in each book record.
+        requests (int): Number of requests served so far.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, not_found_rate=0.0, authors_per_book=1, seed=0):
+        """
+        Initializes the fake service.
+
+        Args:
+            latency (float): Seconds each request takes. Defaults to 0.
+            error_rate (float): Fraction of requests answered with 503. Defaults to 0.
+            not_found_rate (float): Fraction of ISBN lookups answered with 404. Defaults to 0.
+            authors_per_book (int): Author keys per book. Defaults to 1.
+            seed (int): Seed for the failure injection. Defaults to 0.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.authors_per_book = authors_per_book
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, path: str, params=None):
+        """
+        Build the response for a request path, without any delay.
+
+        Args:
+            path (str): The request path, e.g. '/isbn/9780000000001.json'.
+            params (dict, optional): The query parameters.
+
+        Returns:
+            tuple: The HTTP status code and the JSON body.
+        """
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return 503, {"error": "injected"}
+        if path.startswith("/isbn/"):
+            isbn = path[len("/isbn/"):-len(".json")]
+            if roll < self.error_rate + self.not_found_rate:
+                return 404, {"error": "notfound"}
+            authors = [{"key": f"/authors/OL{isbn[-6:]}{i}A"} for i in range(self.authors_per_book)]
+            return 200, {"title": f"Benchmark Book {isbn}", "authors": authors}
+        if path.startswith("/authors/"):
+            key = path[len("/authors/"):-len(".json")]
+            return 200, {"name": f"Author {key}"}
+        if path == "/api/books":
+            bibkey = (params or {}).get("bibkeys", "")
+            return 200, {bibkey: {"authors": [{"name": "Fallback Author"}]}}
+        return 404, {"error": "notfound"}
+
+    def handler(self, request: httpx.Request):
+        """
+        httpx.MockTransport handler for synchronous clients.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        status, data = self.respond(request.url.path, dict(request.url.params))
+        return httpx.Response(status, json=data)
+
+    async def async_handler(self, request: httpx.Request):
+        """
+        httpx.MockTransport handler for async clients.
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        status, data = self.respond(request.url.path, dict(request.url.params))
+        return httpx.Response(status, json=data)
+
+    async def asgi_app(self, scope, receive, send):
+        """
+        ASGI application serving the fake API, e.g. under uvicorn.
+        """
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = dict(parse_qsl(scope.get("query_string", b"").decode()))
+        status, data = self.respond(scope["path"], params)
+        body = json.dumps(data).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def client(self):
+        """
+        Returns:
+            httpx.Client: A client whose requests are answered by this fake.
+        """
+        return httpx.Client(transport=httpx.MockTransport(self.handler))
+
+    def async_client(self):
+        """
+        Returns:
+            httpx.AsyncClient: An async client whose requests are answered by this fake.
+        """
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.async_handler))
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a fake Open Library API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses (default: %(default)s)")
+    parser.add_argument("--not-found-rate", type=float, default=0.0,
+                        help="fraction of 404 ISBN lookups (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    fake = FakeOpenLibrary(args.latency, args.error_rate, args.not_found_rate)
+    uvicorn.run(fake.asgi_app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+End-to-end load test for the FastAPI service.
+
+Drives api.app with a weighted mix of GET /books, POST /books and
+PUT /books/{isbn} requests at increasing concurrency levels and reports
+p50/p95/p99 latency, throughput and error rates per operation, so the point
+where tail latency collapses is visible.
+
+Modes:
+    inprocess  requests go straight to the ASGI app (no sockets)
+    uvicorn    the app is served by uvicorn on a local port
+    --url      an already running server is used as is
+
+In the first two modes the app gets a fresh temporary database seeded with
+synthetic books, and Open Library is replaced by FakeOpenLibrary with the
+requested latency and error injection.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 1,8,32,128 --duration 10
+    python -m benchmarks.loadtest --mode uvicorn --mix get=60,post=20,put=20 --error-rate 0.05
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --mix get=100
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+import httpx
+from benchmarks.bench_library import seed, summarize, synthetic_isbn
+from benchmarks.fake_openlibrary import FakeOpenLibrary
+
+OPERATIONS = ("get", "post", "put")
+DEFAULT_MIX = {"get": 80, "post": 10, "put": 10}
+
+
+def parse_mix(text: str):
+    """
+    Parse a traffic mix like 'get=80,post=10,put=10' into weights.
+
+    Raises:
+        ValueError: If an operation is unknown or no weight is positive.
+    """
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("the mix needs at least one positive weight")
+    return mix
+
+
+class LoadGenerator:
+    """
+    Sends a weighted request mix from concurrent workers and records the outcome of each request.
+
+    Attributes:
+        client (httpx.AsyncClient): The client pointed at the service.
+        mix (dict): Relative weights of 'get', 'post' and 'put'.
+        isbns (list): Existing ISBNs used as PUT targets.
+        page_size (int): The GET /books page size; 0 requests the full list.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, mix: dict, isbns, page_size: int = 50, first_new: int = 10**8, seed: int = 0):
+        """
+        Initializes the generator.
+
+        Args:
+            client (httpx.AsyncClient): The client pointed at the service.
+            mix (dict): Relative weights of 'get', 'post' and 'put'.
+            isbns (list): Existing ISBNs used as PUT targets.
+            page_size (int): The GET /books page size; 0 requests the full list. Defaults to 50.
+            first_new (int): Sequence number of the first ISBN to POST. Defaults to 10**8.
+            seed (int): Seed for operation and target selection. Defaults to 0.
+        """
+        self.client = client
+        self.mix = mix
+        self.isbns = list(isbns)
+        self.page_size = page_size
+        self._next_new = first_new
+        self._random = random.Random(seed)
+        self._operations = [name for name in OPERATIONS if mix.get(name, 0) > 0]
+        self._weights = [mix[name] for name in self._operations]
+
+    def _request(self, operation: str):
+        """
+        Build the method, URL and JSON body for one request.
+        """
+        if operation == "get":
+            params = f"?limit={self.page_size}" if self.page_size else ""
+            return "GET", f"/books{params}", None
+        if operation == "post":
+            self._next_new += 1
+            return "POST", "/books", {"isbn": synthetic_isbn(self._next_new)}
+        isbn = self._random.choice(self.isbns) if self.isbns else synthetic_isbn(0)
+        return "PUT", f"/books/{isbn}", {"title": f"Load test {self._random.randrange(10**6)}"}
+
+    async def _worker(self, deadline: float, samples, statuses):
+        while time.perf_counter() < deadline:
+            operation = self._random.choices(self._operations, self._weights)[0]
+            method, url, body = self._request(operation)
+            start = time.perf_counter_ns()
+            try:
+                response = await self.client.request(method, url, json=body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            samples[operation].append(time.perf_counter_ns() - start)
+            statuses[operation][status] += 1
+
+    async def run(self, concurrency: int, duration: float):
+        """
+        Run `concurrency` workers for `duration` seconds.
+
+        Args:
+            concurrency (int): The number of requests in flight at once.
+            duration (float): How long to send requests, in seconds.
+
+        Returns:
+            list: One result record per operation, with latency statistics from
+            bench_library.summarize plus concurrency, throughput, status counts
+            and error rate. Any response other than 2xx counts as an error.
+        """
+        samples = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(self._worker(deadline, samples, statuses) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        results = []
+        for operation in self._operations:
+            if not samples[operation]:
+                continue
+            counts = statuses[operation]
+            errors = sum(n for status, n in counts.items() if not (isinstance(status, int) and 200 <= status < 300))
+            record = summarize(operation, len(self.isbns), samples[operation])
+            record.update(
+                concurrency=concurrency,
+                ops_per_sec=round(record["count"] / elapsed, 2),
+                errors=errors,
+                error_rate=round(errors / record["count"], 4),
+                statuses={str(status): n for status, n in sorted(counts.items(), key=str)},
+            )
+            results.append(record)
+        return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalService:
+    """
+    api.app wired to a temporary seeded database and a FakeOpenLibrary.
+
+    The module-level library objects of api.py are swapped for the duration of
+    the `with` block and restored afterwards.
+
+    Attributes:
+        base_url (str): The URL to send requests to.
+        transport (httpx.AsyncBaseTransport or None): The ASGI transport in in-process mode.
+        isbns (list): The seeded ISBNs.
+    """
+
+    def __init__(self, mode: str, books: int, fake: FakeOpenLibrary, workdir: str = None, write_batch_window: float = None):
+        """
+        Initializes the service description; nothing starts until the `with` block.
+
+        Args:
+            mode (str): 'inprocess' or 'uvicorn'.
+            books (int): The number of books to seed.
+            fake (FakeOpenLibrary): The Open Library stand-in.
+            workdir (str, optional): Directory for the database; a temporary one by default.
+            write_batch_window (float, optional): Group-commit window of the Library in seconds.
+        """
+        self.mode = mode
+        self.books = books
+        self.fake = fake
+        self.workdir = workdir
+        self.write_batch_window = write_batch_window
+        self.base_url = "http://loadtest"
+        self.transport = None
+        self.isbns = []
+
+    def __enter__(self):
+        import api
+        from async_library import AsyncLibrary
+        from library import Library
+
+        self._api = api
+        self._tmp = tempfile.TemporaryDirectory(dir=self.workdir)
+        self._saved = (api.library, api.alibrary)
+        library = Library(os.path.join(self._tmp.name, "loadtest.db"), write_batch_window=self.write_batch_window)
+        seed(library, self.books)
+        self.isbns = [synthetic_isbn(n) for n in range(self.books)]
+        api.library = library
+        api.alibrary = AsyncLibrary(library, http=self.fake.async_client())
+
+        if self.mode == "inprocess":
+            self.transport = httpx.ASGITransport(app=api.app)
+        else:
+            import uvicorn
+
+            port = _free_port()
+            self.base_url = f"http://127.0.0.1:{port}"
+            self._server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+            self._thread = threading.Thread(target=self._server.run, daemon=True)
+            self._thread.start()
+            while not self._server.started:
+                if not self._thread.is_alive():
+                    raise RuntimeError("uvicorn failed to start")
+                time.sleep(0.05)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        api = self._api
+        if self.mode == "uvicorn":
+            self._server.should_exit = True
+            self._thread.join()
+        asyncio.run(api.alibrary.aclose())
+        api.library.close()
+        api.library, api.alibrary = self._saved
+        self._tmp.cleanup()
+
+
+async def _drive(base_url, transport, isbns, mix, concurrency_levels, duration, page_size):
+    results = []
+    # One connection per worker at the highest level; the default pool would cap concurrency
+    limits = httpx.Limits(max_connections=max(concurrency_levels), max_keepalive_connections=max(concurrency_levels))
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+        if not isbns:
+            # Existing server: take PUT targets from its first page of books
+            response = await client.get("/books", params={"limit": 1000})
+            isbns = [book["isbn"] for book in response.json()] if response.status_code == 200 else []
+        generator = LoadGenerator(client, mix, isbns, page_size)
+        for concurrency in concurrency_levels:
+            results.extend(await generator.run(concurrency, duration))
+    return results
+
+
+def run_load_test(mode="inprocess", url=None, books=1000, mix=None, concurrency_levels=(1, 8, 32), duration=5.0,
+                  page_size=50, latency=0.02, error_rate=0.0, not_found_rate=0.0, workdir=None, write_batch_window=None):
+    """
+    Run the load test at each concurrency level and collect machine-readable results.
+
+    Args:
+        mode (str): 'inprocess' or 'uvicorn'; ignored when `url` is given. Defaults to 'inprocess'.
+        url (str, optional): Base URL of an already running server.
+        books (int): Books to seed in a local service. Defaults to 1000.
+        mix (dict, optional): Relative weights of 'get', 'post' and 'put'. Defaults to 80/10/10.
+        concurrency_levels (iterable): Numbers of concurrent workers to try. Defaults to 1, 8 and 32.
+        duration (float): Seconds per concurrency level. Defaults to 5.
+        page_size (int): The GET /books page size; 0 requests the full list. Defaults to 50.
+        latency (float): Fake Open Library latency in seconds. Defaults to 0.02.
+        error_rate (float): Fraction of fake Open Library 503 responses. Defaults to 0.
+        not_found_rate (float): Fraction of fake Open Library 404 ISBN lookups. Defaults to 0.
+        workdir (str, optional): Directory for the temporary database.
+        write_batch_window (float, optional): Group-commit window of a local service in seconds.
+
+    Returns:
+        dict: 'parameters' and a list of 'results' records.
+    """
+    mix = mix or DEFAULT_MIX
+    concurrency_levels = list(concurrency_levels)
+    report = {
+        "parameters": {
+            "mode": "url" if url else mode,
+            "url": url,
+            "books": books,
+            "mix": mix,
+            "concurrency": concurrency_levels,
+            "duration": duration,
+            "page_size": page_size,
+            "latency": latency,
+            "error_rate": error_rate,
+            "not_found_rate": not_found_rate,
+            "write_batch_window": write_batch_window,
+        },
+    }
+    if url:
+        report["results"] = asyncio.run(_drive(url, None, [], mix, concurrency_levels, duration, page_size))
+        return report
+
+    fake = FakeOpenLibrary(latency, error_rate, not_found_rate)
+    # Library prints a status line per added book; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()), LocalService(mode, books, fake, workdir, write_batch_window) as service:
+        report["results"] = asyncio.run(
+            _drive(service.base_url, service.transport, service.isbns, mix, concurrency_levels, duration, page_size)
+        )
+    report["parameters"]["openlibrary_requests"] = fake.requests
+    return report
+
+
+def print_table(report: dict):
+    """
+    Print the results as an aligned text table.
+    """
+    print(f"{'conc':>6} {'operation':<10}{'count':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for r in report["results"]:
+        print(
+            f"{r['concurrency']:>6} {r['operation']:<10}{r['count']:>8}{r['ops_per_sec']:>10}"
+            f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['error_rate']:>9.2%}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the library API with a mix of reads and writes.")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess",
+                        help="how to run the app locally (default: %(default)s)")
+    parser.add_argument("--url", help="test an already running server instead of a local one")
+    parser.add_argument("--books", type=int, default=1000, help="books to seed locally (default: %(default)s)")
+    parser.add_argument("--mix", default="get=80,post=10,put=10", help="request weights (default: %(default)s)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated worker counts (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level (default: %(default)s)")
+    parser.add_argument("--page-size", type=int, default=50, help="GET /books limit, 0 for the full list (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="fake Open Library latency in seconds (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake Open Library 503 rate (default: %(default)s)")
+    parser.add_argument("--not-found-rate", type=float, default=0.0,
+                        help="fake Open Library 404 rate (default: %(default)s)")
+    parser.add_argument("--write-batch-ms", type=float,
+                        help="commit concurrent writes together within this window (default: off)")
+    parser.add_argument("--output", default="loadtest_results.json", help="JSON results file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    report = run_load_test(args.mode, args.url, args.books, mix, levels, args.duration, args.page_size,
+                           args.latency, args.error_rate, args.not_found_rate,
+                           write_batch_window=args.write_batch_ms / 1000 if args.write_batch_ms is not None else None)
+    print_table(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,14 @@ class Book:
         title (str): The title of the book.
         author (str): The author of the book.
         isbn (str): The International Standard Book Number of the book.
+        authors (list): (Open Library author key or None, name) pairs behind `author`,
+            when known; None for books read back from the database.
     """
 
-    def __init__(self, title: str, author: str, isbn: str):
+    # No per-instance __dict__: large listings create many Book objects
+    __slots__ = ("title", "author", "isbn", "authors")
+
+    def __init__(self, title: str, author: str, isbn: str, authors=None):
         """
         Initializes a Book instance with the given title, author, and ISBN.
 
@@ -16,10 +21,12 @@ class Book:
             title (str): The title of the book.
             author (str): The author of the book.
             isbn (str): The ISBN of the book.
+            authors (list, optional): (author key or None, name) pairs. Defaults to None.
         """
         self.title = title  # Set the title of the book
         self.author = author  # Set the author of the book
         self.isbn = isbn  # Set the ISBN of the book
+        self.authors = authors  # Set the individual authors, if known
 
     def __str__(self):
         """
@@ -29,3 +36,24 @@ class Book:
             str: A string in the format 'Title by Author (ISBN: ISBN)'.
         """
         return f"{self.title} by {self.author} (ISBN: {self.isbn})"
+
+def canonical_isbn(isbn: str):
+    """
+    Returns the canonical form of an ISBN used to detect duplicates.
+
+    Hyphens and spaces are removed and ISBN-10s are converted to ISBN-13, so
+    '0-439-02352-1', '978-0439023528' and '9780439023528' share one key.
+    Values that are not ISBN-shaped are only stripped and upper-cased.
+
+    Args:
+        isbn (str): The ISBN as entered.
+
+    Returns:
+        str: The canonical key.
+    """
+    key = isbn.replace("-", "").replace(" ", "").strip().upper()
+    if len(key) == 10 and key[:9].isdigit() and (key[9].isdigit() or key[9] == "X"):
+        body = "978" + key[:9]
+        total = sum(int(digit) * (1 if i % 2 == 0 else 3) for i, digit in enumerate(body))
+        key = body + str((10 - total % 10) % 10)
+    return key
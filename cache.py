@@ -0,0 +1,246 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by LRUCache.get on a miss, so that None can be cached as a value
+MISSING = object()
+
+
+class CachedResponse:
+    """
+    A stored HTTP response, returned in place of an httpx.Response on a cache hit.
+
+    Attributes:
+        status_code (int): The HTTP status code of the stored response.
+    """
+
+    def __init__(self, status_code: int, body: str = None):
+        """
+        Initializes the response from its stored parts.
+
+        Args:
+            status_code (int): The HTTP status code.
+            body (str, optional): The JSON body as text. Defaults to None.
+        """
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        """
+        Decode the stored JSON body.
+
+        Returns:
+            The decoded JSON body.
+        """
+        return json.loads(self._body)
+
+    def raise_for_status(self):
+        """
+        Raise an exception if the stored status is an error status.
+        """
+        if self.status_code >= 400:
+            raise Exception(f"HTTP error {self.status_code} (cached)")
+
+
+class ResponseCache:
+    """
+    A persistent, size-bounded cache of Open Library responses keyed by URL.
+
+    Successful (200) responses are kept for `ttl` seconds and 404s for `negative_ttl`
+    seconds. When more than `max_entries` responses are stored, the least recently
+    used ones are evicted. A hit records its time of use only when the stored one is
+    older than 1% of `ttl`, so repeated hits do not each write to the database.
+
+    Attributes:
+        db_name (str): The SQLite file holding the cache.
+        ttl (float): Lifetime of successful responses in seconds.
+        negative_ttl (float): Lifetime of 404 responses in seconds.
+        max_entries (int): The maximum number of stored responses.
+    """
+
+    def __init__(self, db_name="openlibrary_cache.db", ttl=7 * 24 * 3600, negative_ttl=24 * 3600, max_entries=10000):
+        """
+        Initializes the cache and creates its table if needed.
+
+        Args:
+            db_name (str): The SQLite file holding the cache. Defaults to 'openlibrary_cache.db'.
+            ttl (float): Lifetime of successful responses in seconds. Defaults to one week.
+            negative_ttl (float): Lifetime of 404 responses in seconds. Defaults to one day.
+            max_entries (int): The maximum number of stored responses. Defaults to 10000.
+        """
+        self.db_name = db_name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._touch_interval = ttl / 100
+        self._conn = sqlite3.connect(db_name, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            # A lost cache write after a power failure only costs a refetch
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    body TEXT,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS http_cache_last_used ON http_cache (last_used)")
+            # Kept in memory so put() does not count the rows every time
+            self._count = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+    def get(self, url: str):
+        """
+        Return the stored response for a URL if it has not expired.
+
+        Args:
+            url (str): The request URL.
+
+        Returns:
+            CachedResponse or None: The stored response, or None on a miss.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status, body, expires_at, last_used FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, body, expires_at, last_used = row
+            if expires_at <= now:
+                self._count -= self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,)).rowcount
+                return None
+            if now - last_used > self._touch_interval:
+                self._conn.execute("UPDATE http_cache SET last_used = ? WHERE url = ?", (now, url))
+        return CachedResponse(status, body)
+
+    def put(self, url: str, response):
+        """
+        Store a response if it is cacheable (a JSON 200 or a 404).
+
+        Args:
+            url (str): The request URL.
+            response: The response to store.
+        """
+        if response.status_code == 200:
+            try:
+                body = json.dumps(response.json())
+            except Exception:
+                return
+            ttl = self.ttl
+        elif response.status_code == 404:
+            body = None
+            ttl = self.negative_ttl
+        else:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM http_cache WHERE url = ?", (url,)).fetchone() is None:
+                self._count += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, status, body, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (url, response.status_code, body, now + ttl, now),
+            )
+            if self._count > self.max_entries:
+                self._count -= self._conn.execute(
+                    "DELETE FROM http_cache WHERE url IN (SELECT url FROM http_cache ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,),
+                ).rowcount
+
+    def clear(self):
+        """
+        Remove every stored response.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM http_cache")
+            self._count = 0
+
+    def close(self):
+        """
+        Close the cache's database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded in-memory cache that evicts the least recently used key.
+
+    Attributes:
+        maxsize (int): The maximum number of stored keys.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups not found in the cache.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initializes an empty cache.
+
+        Args:
+            maxsize (int): The maximum number of stored keys. Defaults to 1024.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """
+        Return the value stored for a key and mark it as recently used.
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            The stored value, or MISSING if the key is not cached.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used key if the cache is full.
+
+        Args:
+            key: The key to store.
+            value: The value to store.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Remove a key from the cache if present.
+
+        Args:
+            key: The key to remove.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every key. Hit and miss counters are kept.
+        """
+        with self._lock:
+            self._data.clear()
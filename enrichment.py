@@ -0,0 +1,253 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from book import canonical_isbn
+from library import Library
+from openlibrary import MetadataError
+
+# Lookups that fail with these statuses are not retried: the book does not exist or has no usable data
+PERMANENT_ERRORS = {"not_found", "no_title"}
+
+
+class EnrichmentQueue:
+    """
+    Fills in book metadata from Open Library on background worker threads.
+
+    Books are stored first with placeholder data (Library.add_pending_book) and a
+    'pending' job in the database, so a request can be acknowledged at once. Failed
+    lookups are retried with exponential backoff and jitter. A lookup that still
+    gives an 'Unknown' author is retried as well, since author fetches often fail
+    transiently. Jobs survive a restart: start() resumes every pending job.
+
+    Attributes:
+        library (Library): The library whose books are enriched.
+        client: The object whose fetch_book(isbn) returns a Book. Defaults to the
+            library's OpenLibraryClient.
+        workers (int): The number of worker threads.
+        max_attempts (int): Lookups per job before giving up.
+        base_delay (float): The delay before the first retry in seconds; it doubles per attempt.
+        max_delay (float): The longest delay between attempts in seconds.
+    """
+
+    def __init__(self, library: Library, workers: int = 4, max_attempts: int = 5, base_delay: float = 2.0, max_delay: float = 300.0, client=None):
+        """
+        Initializes the queue. No thread starts until start() or the first job.
+
+        Args:
+            library (Library): The library whose books are enriched.
+            workers (int): The number of worker threads. Defaults to 4.
+            max_attempts (int): Lookups per job before giving up. Defaults to 5.
+            base_delay (float): The first retry delay in seconds. Defaults to 2.
+            max_delay (float): The longest retry delay in seconds. Defaults to 300.
+            client (optional): The metadata client. Defaults to library.openlibrary.
+        """
+        self.library = library
+        self.client = client if client is not None else library.openlibrary
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap = []  # (due time.monotonic(), tie breaker, isbn, attempts made)
+        self._counter = itertools.count()
+        self._queued = set()  # Canonical keys waiting in the heap or being processed
+        self._active = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = False
+
+    def start(self):
+        """
+        Start the worker threads and resume the pending jobs stored in the database.
+        Does nothing if the queue is already running.
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(target=self._work, name=f"enrichment-{i}", daemon=True) for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+        now = time.time()
+        for job in self.library.pending_enrichment_jobs():
+            self._schedule(job["isbn"], job["attempts"], max(0, job["next_attempt_at"] - now))
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the worker threads after their current lookup. Unfinished jobs stay
+        pending in the database and are resumed by the next start().
+
+        Args:
+            timeout (float, optional): Seconds to wait for each thread. Defaults to no limit.
+        """
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def add_book(self, isbn: str):
+        """
+        Store a book immediately with placeholder data and queue its lookup.
+
+        Args:
+            isbn (str): The ISBN of the book to add.
+
+        Returns:
+            dict or None: The new job (see Library.enrichment_job), or None if the ISBN already exists.
+        """
+        book = self.library.add_pending_book(isbn)
+        if book is None:
+            return None
+        # Read the job before a worker can pick it up, so the caller sees it pending
+        job = self.library.enrichment_job(book.isbn)
+        self.start()
+        self._schedule(book.isbn, 0, 0)
+        return job
+
+    def backfill(self):
+        """
+        Queue a fresh lookup for every book whose title is pending or whose author is 'Unknown'.
+
+        Returns:
+            list: The ISBNs queued.
+        """
+        isbns = self.library.unenriched_isbns()
+        self.library.queue_enrichment(isbns)
+        self.start()
+        for isbn in isbns:
+            self._schedule(isbn, 0, 0)
+        return isbns
+
+    def job(self, isbn: str):
+        """
+        Return the job of a book. See Library.enrichment_job.
+        """
+        return self.library.enrichment_job(isbn)
+
+    def wait(self, timeout: float = None):
+        """
+        Block until no job is waiting or being processed.
+
+        Args:
+            timeout (float, optional): The maximum wait in seconds. Defaults to no limit.
+
+        Returns:
+            bool: True if the queue drained, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _schedule(self, isbn: str, attempts: int, delay: float):
+        """
+        Put a job on the in-memory schedule unless it is already there.
+        """
+        key = canonical_isbn(isbn)
+        with self._cond:
+            if not self._running or key in self._queued:
+                return
+            self._queued.add(key)
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), isbn, attempts))
+            self._cond.notify()
+
+    def _retry_delay(self, attempts: int):
+        """
+        Exponential backoff with jitter: about base_delay * 2^(attempts - 1), capped at max_delay.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if not self._running:
+                    return
+                _, _, isbn, attempts = heapq.heappop(self._heap)
+                self._active += 1
+            retry_in = None
+            try:
+                retry_in = self._process(isbn, attempts + 1)
+            except Exception:
+                # Never let a worker die; the job stays pending and is resumed on restart
+                pass
+            finally:
+                with self._cond:
+                    if retry_in is not None and self._running:
+                        # Reschedule before dropping the active count so wait() cannot return in between
+                        heapq.heappush(self._heap, (time.monotonic() + retry_in, next(self._counter), isbn, attempts + 1))
+                    else:
+                        self._queued.discard(canonical_isbn(isbn))
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _process(self, isbn: str, attempts: int):
+        """
+        Run one lookup attempt and record its outcome.
+
+        Args:
+            isbn (str): The ISBN of the book.
+            attempts (int): The number of this attempt, starting at 1.
+
+        Returns:
+            float or None: Seconds until the next attempt, or None if the job is finished.
+        """
+        stored = self.library.find_book(isbn)
+        if stored is None:
+            # Removed while queued
+            self.library.update_enrichment_job(isbn, "failed", attempts - 1, "Kitap kütüphanede bulunamadı.")
+            return None
+
+        try:
+            book = self.client.fetch_book(isbn)
+        except MetadataError as e:
+            if e.status in PERMANENT_ERRORS:
+                self.library.update_enrichment_job(isbn, "failed", attempts, str(e))
+                # Nothing to show for a book that cannot be found, unless its title was set by hand
+                self.library.remove_placeholder_book(isbn)
+                self.library.metrics.inc("library_enrichment_jobs_total", result="failed")
+                return None
+            return self._retry(isbn, attempts, str(e))
+        except Exception as e:
+            return self._retry(isbn, attempts, str(e))
+
+        # Only placeholders are filled in; a title or author set by hand, even during the lookup, is kept
+        author = book.author if book.author != "Unknown" else None
+        pending = self.library.fill_placeholders(isbn, title=book.title, author=author, authors=book.authors)
+        if pending is None:
+            self.library.update_enrichment_job(isbn, "failed", attempts, "Kitap kütüphanede bulunamadı.")
+            return None
+        if "author" in pending:
+            return self._retry(isbn, attempts, "Yazar bilgisi alınamadı.")
+        self.library.update_enrichment_job(isbn, "done", attempts)
+        self.library.metrics.inc("library_enrichment_jobs_total", result="done")
+        return None
+
+    def _retry(self, isbn: str, attempts: int, error: str):
+        """
+        Schedule another attempt, or mark the job failed once max_attempts is reached.
+
+        Returns:
+            float or None: Seconds until the next attempt, or None if the job failed.
+        """
+        if attempts >= self.max_attempts:
+            self.library.update_enrichment_job(isbn, "failed", attempts, error)
+            self.library.metrics.inc("library_enrichment_jobs_total", result="failed")
+            return None
+        delay = self._retry_delay(attempts)
+        self.library.update_enrichment_job(isbn, "pending", attempts, error, time.time() + delay)
+        self.library.metrics.inc("library_enrichment_jobs_total", result="retry")
+        return delay
@@ -1,60 +1,640 @@
+import json
+import os
 import sqlite3
-from book import Book
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from book import Book, canonical_isbn
+from cache import MISSING, LRUCache
+from metrics import REGISTRY
+from openlibrary import MetadataError, OpenLibraryClient
+from ratelimit import RateLimiter
+from storage import MemoryStorage
+from write_queue import WriteQueue
+
+# Shown as the title of a book added before its metadata is fetched (see add_pending_book);
+# placeholders are tracked by their enrichment job, not recognized by this value
+PENDING_TITLE = "Pending"
+
+# The longest JSON token a chunk boundary can cut so that decoding fails before the end
+# of the buffer: a literal, a number's exponent or a \uXXXX escape
+MAX_CUT_TOKEN = 8
+
+# Per-row insert triggers whose work import_json does once per batch instead
+BULK_INSERT_TRIGGERS = ("books_fts_insert", "books_changes_insert", "books_version_insert")
+
+def _fts_query(query: str):
+    """
+    Turn free-text user input into a safe FTS5 MATCH expression.
+
+    Every whitespace-separated term is quoted (so punctuation such as the hyphens in
+    '978-0439023528' is treated as text, not syntax) and prefix-matched.
+
+    Args:
+        query (str): The raw search text.
+
+    Returns:
+        str: The MATCH expression, or an empty string if the query has no terms.
+    """
+    terms = ['"' + term.replace('"', '""') + '"*' for term in query.split()]
+    return " ".join(terms)
+
+
+def _iter_json_records(f, chunk_size: int = 1 << 16):
+    """
+    Yield the records of a JSON array of objects, reading the file in chunks.
+
+    Newline-delimited JSON (one object per line) is accepted as well, since the
+    brackets and commas between records are skipped alike.
+
+    Args:
+        f: A text file open for reading.
+        chunk_size (int): Characters read at a time. Defaults to 64 Ki.
+
+    Yields:
+        The decoded records.
+
+    Raises:
+        json.JSONDecodeError: If a record is malformed or the file ends inside one.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos == len(buffer):
+            buffer = f.read(chunk_size)
+            pos = 0
+            if not buffer:
+                return
+            continue
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # The record may continue in the next chunk, unless the error lies further
+            # from the end than a cut-off token (e.g. 'fals', '1e+', '\\u00') could reach
+            if len(buffer) - e.pos > MAX_CUT_TOKEN and not e.msg.startswith("Unterminated string"):
+                raise
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield record
+
+
+def _chunked(items, size: int = 500):
+    """
+    Split a list into slices small enough to bind as the parameters of an IN (...) list.
+
+    500 stays well below SQLite's limit on bound parameters.
+
+    Args:
+        items (list): The values to bind.
+        size (int): The maximum slice length. Defaults to 500.
+
+    Yields:
+        list: The next slice.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _split_authors(author: str):
+    """
+    Turn a stored author string into (key, name) pairs without keys.
+
+    Args:
+        author (str): Names joined by ', ' as stored in books.author.
+
+    Returns:
+        list: (None, name) pairs; empty for 'Unknown'.
+    """
+    if author == "Unknown":
+        return []
+    return [(None, name.strip()) for name in author.split(",") if name.strip()]
+
+
+def _prefix_range(prefix: str):
+    """
+    Turn a prefix into bounds for an index range scan under NOCASE collation.
+
+    A title starts with the prefix (ignoring ASCII case) exactly when
+    lower <= title < upper, compared with COLLATE NOCASE. Unlike LIKE, such a
+    range can use an index on 'title COLLATE NOCASE'.
+
+    Args:
+        prefix (str): A non-empty prefix.
+
+    Returns:
+        tuple: The inclusive lower and exclusive upper bound; the upper bound is None
+        when every title from the lower bound on matches.
+    """
+    # NOCASE folds only A-Z, so fold the same way before computing the successor
+    lower = "".join(c.lower() if "A" <= c <= "Z" else c for c in prefix)
+    # The highest code point has no successor: carry into the character before it
+    stem = lower.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return lower, None
+    successor = chr(ord(stem[-1]) + 1)
+    if "A" <= successor <= "Z":
+        # Folded text never contains A-Z; the next folded character after '@' is '['
+        successor = "["
+    elif "\ud800" <= successor <= "\udfff":
+        # Surrogates cannot be stored as UTF-8; the next storable character is U+E000
+        successor = "\ue000"
+    return lower, stem[:-1] + successor
 
 class Library:
     """
     Manages a collection of Book objects and handles persistence in an SQLite database.
 
+    Connections are pooled per thread: each thread opens one tuned connection on
+    first use and reuses it until close() is called. A Library can be used as a
+    context manager to close its connections on exit.
+
+    With book_cache_size > 0, find_book results (including misses) and the
+    list_books result are kept in memory and invalidated by every write made
+    through this Library.
+
+    With storage='memory', every book is also held in a MemoryStorage that
+    serves the book lookups, listings and filters without touching SQLite.
+    Writes still go to the database first, which keeps search, the change log
+    and enrichment jobs working, and are copied to memory once committed. Writes
+    made by other processes are not seen until restart.
+
     Attributes:
         db_name (str): The name of the SQLite database file.
+        busy_timeout (int): Milliseconds a connection waits for a locked database.
+        cache_size (int): Page cache size per connection in KiB.
+        book_cache (LRUCache): The ISBN to Book cache, or None if disabled.
+        storage (MemoryStorage): The in-memory copy of the books, or None for 'sqlite'.
+        metrics (Metrics): Receives SQLite timings, cache hit counts and, through
+            the Open Library client, HTTP request timings.
     """
 
-    def __init__(self, db_name="library.db"):
+    def __init__(self, db_name="library.db", busy_timeout=5000, cache_size=20000, response_cache=None, book_cache_size=0, metrics=None, write_batch_window=None, storage="sqlite", openlibrary_rate=None, openlibrary_concurrency=10):
         """
         Initializes the Library instance and sets up the database.
 
         Args:
             db_name (str): The name of the SQLite database file. Defaults to 'library.db'.
+            busy_timeout (int): Milliseconds to wait on a locked database. Defaults to 5000.
+            cache_size (int): Page cache size per connection in KiB. Defaults to 20000.
+            response_cache (ResponseCache, optional): Cache for Open Library responses. Defaults to None.
+            book_cache_size (int): Number of ISBN lookups kept in memory; 0 disables caching. Defaults to 0.
+            metrics (Metrics, optional): The metrics registry. Defaults to the shared REGISTRY.
+            write_batch_window (float, optional): Enables group commit of concurrent writes (see
+                write_queue.WriteQueue); seconds to wait for more writes, 0 for none. Defaults to None:
+                every write commits alone.
+            storage (str): Where books are read from: 'sqlite', or 'memory' to load every
+                book into a MemoryStorage at startup and serve find_book, list_books,
+                iter_books and find_books from RAM. Defaults to 'sqlite'.
+            openlibrary_rate (float, optional): The most Open Library requests per second, shared
+                by every lookup. Defaults to None: no rate limit.
+            openlibrary_concurrency (int): The most Open Library requests in flight at once, and
+                the size of the kept-alive connection pool. Defaults to 10.
+
+        Raises:
+            ValueError: If storage is not 'sqlite' or 'memory'.
         """
+        if storage not in ("sqlite", "memory"):
+            raise ValueError(f"Unknown storage: {storage}")
         self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._connections = []
+        self._pool_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.openlibrary = OpenLibraryClient(
+            cache=response_cache, metrics=self.metrics, known_authors=self.author_names,
+            limiter=RateLimiter(openlibrary_rate, max_concurrency=openlibrary_concurrency)
+        )
+        self.book_cache = LRUCache(book_cache_size) if book_cache_size > 0 else None
+        self.write_queue = WriteQueue(self, write_batch_window) if write_batch_window is not None else None
+        self._books_snapshot = None
+        self._list_hits = 0
+        self._list_misses = 0
+        # Bumped on every write so reads that raced with a write are not cached
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
         self._create_table()
+        # The database stays the system of record; the memory copy is refreshed after every write
+        self.storage = None
+        if storage == "memory":
+            self.storage = MemoryStorage()
+            self._storage_lock = threading.Lock()
+            with self.metrics.time("library_db_seconds", operation="load_storage"):
+                self.storage.load(self._storage_books(self._get_connection()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open_connection(self):
+        """
+        Open a new SQLite connection with the pragmas used by the pool.
+
+        Returns:
+            sqlite3.Connection: A configured connection to the database.
+        """
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(f"PRAGMA cache_size = -{int(self.cache_size)}")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
 
     def _get_connection(self):
         """
-        Get a new SQLite connection for each operation to handle threading.
+        Get the calling thread's pooled SQLite connection, opening it on first use.
 
         Returns:
             sqlite3.Connection: A connection object to interact with the SQLite database.
         """
-        conn = sqlite3.connect(self.db_name, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            with self._pool_lock:
+                self._local.conn = conn
+                self._connections.append(conn)
         return conn
 
+    def close(self):
+        """
+        Close every pooled connection, SQLite and HTTP. The pools reopen lazily if the
+        Library is used again. Writes waiting for a group commit are committed first.
+        """
+        if self.write_queue is not None:
+            self.write_queue.close()
+        self.openlibrary.close()
+        with self._pool_lock:
+            connections = self._connections
+            self._connections = []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+    def _write(self, operation: str, func):
+        """
+        Run a write in a transaction of its own, or in the next group commit when
+        write batching is enabled.
+
+        Args:
+            operation (str): The operation label for the library_db_seconds metric.
+            func (callable): Runs the statements on the given connection and returns the result.
+
+        Returns:
+            The value returned by func, once it is committed.
+        """
+        if self.write_queue is not None:
+            return self.write_queue.submit(operation, func)
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation=operation), conn:
+            return func(conn)
+
+    def _invalidate(self, isbns=()):
+        """
+        Drop cached entries made stale by a write and refresh the memory storage.
+
+        Args:
+            isbns (iterable): The ISBNs that were written.
+        """
+        isbns = list(isbns)
+        if self.storage is not None:
+            self._refresh_storage(isbns)
+        if self.book_cache is None:
+            return
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._books_snapshot = None
+        for isbn in isbns:
+            self.book_cache.invalidate(isbn)
+
+    def _refresh_storage(self, keys):
+        """
+        Copy the committed rows of some books into the memory storage.
+
+        The rows are read again instead of applying each write's own result: under
+        the lock, the last refresh of a book always sees its latest committed row,
+        whatever order concurrent writers committed in.
+
+        Args:
+            keys (list): The canonical ISBNs that were written.
+        """
+        with self._storage_lock:
+            conn = self._get_connection()
+            books = []
+            for chunk in _chunked(keys):
+                books.extend(self._storage_books(conn, chunk))
+            found = {canonical_isbn(book.isbn) for book in books}
+            self.storage.put_many(books)
+            self.storage.remove_many(key for key in keys if key not in found)
+
+    @staticmethod
+    def _storage_books(conn, keys=None):
+        """
+        Read books for the memory storage with the author names linked to them.
+
+        The names come from book_authors in display order, so the storage indexes
+        each book under the same authors that find_books matches in SQL.
+
+        Args:
+            conn (sqlite3.Connection): The connection to read with.
+            keys (list, optional): The canonical ISBNs to read. Defaults to None: every book.
+
+        Returns:
+            list: Book objects whose authors are (None, name) pairs.
+        """
+        sql = (
+            "SELECT title, author, isbn, (SELECT json_group_array(name) FROM ("
+            "SELECT authors.name FROM book_authors JOIN authors ON authors.id = book_authors.author_id"
+            " WHERE book_authors.book_id = books.id ORDER BY book_authors.position)) AS names FROM books"
+        )
+        if keys is not None:
+            sql += f" WHERE isbn_key IN ({', '.join('?' * len(keys))})"
+        return [
+            Book(row["title"], row["author"], row["isbn"], [(None, name) for name in json.loads(row["names"])])
+            for row in conn.execute(sql, keys or ())
+        ]
+
+    def cache_stats(self):
+        """
+        Return the in-memory book cache counters.
+
+        Returns:
+            dict: Hits, misses and size of the ISBN cache, and hits and misses of the
+            list_books snapshot. All zero when caching is disabled.
+        """
+        if self.book_cache is None:
+            return {"hits": 0, "misses": 0, "size": 0, "list_hits": 0, "list_misses": 0}
+        return {
+            "hits": self.book_cache.hits,
+            "misses": self.book_cache.misses,
+            "size": len(self.book_cache),
+            "list_hits": self._list_hits,
+            "list_misses": self._list_misses,
+        }
+
     def _create_table(self):
         """
         Creates the 'books' table in the database if it does not already exist.
+
+        Also creates the 'books_fts' FTS5 index over title, author and ISBN, kept in
+        sync with 'books' by triggers, and back-fills it for pre-existing rows.
+        Older databases get the indexed 'isbn_key' column (see canonical_isbn).
+        The 'library_meta' table holds the data version and last modification time,
+        maintained by triggers on every write to 'books' (see data_version).
+        The 'book_changes' table is an append-only log of those writes (see changes).
+        The 'enrichment_jobs' table tracks background metadata lookups (see enrichment.py).
+        The 'authors' table maps Open Library author keys to names and 'book_authors'
+        links books to their authors in order; 'books.author' keeps the joined names
+        for display and full-text search.
         """
         conn = self._get_connection()
-        try:
-            with conn:
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS books (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    isbn TEXT UNIQUE NOT NULL,
+                    isbn_key TEXT
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(books)")}
+            if "isbn_key" not in columns:
+                conn.execute("ALTER TABLE books ADD COLUMN isbn_key TEXT")
+            missing = conn.execute("SELECT id, isbn FROM books WHERE isbn_key IS NULL").fetchall()
+            conn.executemany(
+                "UPDATE books SET isbn_key = ? WHERE id = ?",
+                [(canonical_isbn(row["isbn"]), row["id"]) for row in missing]
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS books_isbn_key ON books (isbn_key)")
+            # Case-insensitive title prefixes; authors are looked up through the authors table
+            conn.execute("CREATE INDEX IF NOT EXISTS books_title_nocase ON books (title COLLATE NOCASE)")
+            conn.execute("DROP INDEX IF EXISTS books_author_nocase")
+            authors_exist = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_authors'"
+            ).fetchone()
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS authors (
+                    id INTEGER PRIMARY KEY,
+                    ol_key TEXT UNIQUE,
+                    name TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS authors_name_nocase ON authors (name COLLATE NOCASE)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS book_authors (
+                    book_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    author_id INTEGER NOT NULL,
+                    PRIMARY KEY (book_id, position)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS book_authors_author ON book_authors (author_id, book_id)")
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS books_authors_delete AFTER DELETE ON books BEGIN
+                    DELETE FROM book_authors WHERE book_id = old.id;
+                END
+                """
+            )
+            if not authors_exist:
+                # Split the author strings of existing books; their Open Library keys are unknown
+                for row in conn.execute("SELECT id, author FROM books").fetchall():
+                    self._link_authors(conn, row["id"], _split_authors(row["author"]))
+            fts_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+            ).fetchone()
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                    title, author, isbn, content='books', content_rowid='id'
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+                    INSERT INTO books_fts (rowid, title, author, isbn)
+                    VALUES (new.id, new.title, new.author, new.isbn);
+                END
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+                    INSERT INTO books_fts (books_fts, rowid, title, author, isbn)
+                    VALUES ('delete', old.id, old.title, old.author, old.isbn);
+                END
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE ON books BEGIN
+                    INSERT INTO books_fts (books_fts, rowid, title, author, isbn)
+                    VALUES ('delete', old.id, old.title, old.author, old.isbn);
+                    INSERT INTO books_fts (rowid, title, author, isbn)
+                    VALUES (new.id, new.title, new.author, new.isbn);
+                END
+                """
+            )
+            if not fts_exists:
+                conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS library_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO library_meta (key, value)
+                VALUES ('data_version', 0), ('modified_at', CAST(strftime('%s', 'now') AS INTEGER))
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS book_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    op TEXT NOT NULL,
+                    isbn TEXT NOT NULL,
+                    title TEXT,
+                    author TEXT,
+                    changed_at INTEGER NOT NULL
+                )
+                """
+            )
+            for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
                 conn.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS books_changes_{event.lower()} AFTER {event} ON books BEGIN
+                        INSERT INTO book_changes (op, isbn, title, author, changed_at)
+                        VALUES ('{event.lower()}', {row}.isbn, {row}.title, {row}.author,
+                                CAST(strftime('%s', 'now') AS INTEGER));
+                    END
                     """
-                    CREATE TABLE IF NOT EXISTS books (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        title TEXT NOT NULL,
-                        author TEXT NOT NULL,
-                        isbn TEXT UNIQUE NOT NULL
-                    )
+                )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS enrichment_jobs (
+                    isbn_key TEXT PRIMARY KEY,
+                    isbn TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    placeholder_title INTEGER NOT NULL DEFAULT 0,
+                    placeholder_author INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            job_columns = {row["name"] for row in conn.execute("PRAGMA table_info(enrichment_jobs)")}
+            if "placeholder_title" not in job_columns:
+                conn.execute("ALTER TABLE enrichment_jobs ADD COLUMN placeholder_title INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE enrichment_jobs ADD COLUMN placeholder_author INTEGER NOT NULL DEFAULT 0")
+                # Older databases marked placeholders by their values alone
+                conn.execute(
                     """
+                    UPDATE enrichment_jobs SET
+                        placeholder_title = EXISTS (
+                            SELECT 1 FROM books WHERE books.isbn_key = enrichment_jobs.isbn_key AND books.title = ?
+                        ),
+                        placeholder_author = EXISTS (
+                            SELECT 1 FROM books WHERE books.isbn_key = enrichment_jobs.isbn_key AND books.author = 'Unknown'
+                        )
+                    WHERE status != 'done'
+                    """,
+                    (PENDING_TITLE,)
                 )
-        finally:
-            conn.close()
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS books_version_{event.lower()} AFTER {event} ON books BEGIN
+                        UPDATE library_meta SET value = CASE key
+                            WHEN 'data_version' THEN value + 1
+                            ELSE CAST(strftime('%s', 'now') AS INTEGER)
+                        END;
+                    END
+                    """
+                )
+
+    def data_version(self):
+        """
+        Return the library's data version and last modification time.
+
+        The version increases with every insert, update and delete of a book,
+        including writes made by other processes.
+
+        Returns:
+            tuple: The version (int) and the modification time as a Unix timestamp (int).
+        """
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="data_version"):
+            values = dict(conn.execute("SELECT key, value FROM library_meta").fetchall())
+        return values["data_version"], values["modified_at"]
+
+    def changes(self, since: int = 0, limit: int = 500):
+        """
+        Return logged writes to the library after a sequence number, oldest first.
+
+        Args:
+            since (int): Return changes with a sequence number above this. Defaults to 0.
+            limit (int): The maximum number of changes to return. Defaults to 500.
+
+        Returns:
+            list: One dict per change with 'seq', 'op' ('insert', 'update' or 'delete'),
+            'isbn', 'title', 'author' and 'changed_at' (Unix timestamp). For deletes,
+            title and author are those of the removed book.
+        """
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="changes"):
+            cursor = conn.execute(
+                "SELECT seq, op, isbn, title, author, changed_at FROM book_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def last_change_seq(self):
+        """
+        Return the sequence number of the most recent change, or 0 if there is none.
+
+        Returns:
+            int: The latest sequence number.
+        """
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="last_change_seq"):
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM book_changes").fetchone()[0]
 
     def add_book(self, isbn: str):
         """
         Add a book by ISBN using the Open Library API.
 
         Fetches the title and author from the API, creates a Book object, and adds it to the library.
+        Concurrent adds of the same book, in any ISBN spelling, make one lookup and
+        one insert; every caller gets its result.
 
         Args:
             isbn (str): The ISBN of the book to add.
@@ -62,139 +642,565 @@ class Library:
         Returns:
             bool: True if the book was successfully added, False otherwise.
         """
-        import httpx
+        return self.openlibrary.flights.do("add_book", canonical_isbn(isbn), self._add_book, isbn)
 
-        # First try the ISBN endpoint
-        url = f"https://openlibrary.org/isbn/{isbn}.json"
-        headers = {
-            "User-Agent": "LibraryApp/1.0 (your-email@example.com)"
-        }
+    def _add_book(self, isbn: str):
+        # Duplicates are rejected from the local index without any network call
+        if self.find_book(isbn) is not None:
+            print("Bu ISBN zaten mevcut.")
+            return False
 
         try:
-            response = httpx.get(url, headers=headers, timeout=10, follow_redirects=True)
-        except httpx.RequestError:
-            print("Bağlantı hatası: API'ye ulaşılamıyor. Lütfen internet bağlantınızı kontrol edin.")
+            book = self.openlibrary.fetch_book(isbn)
+        except MetadataError as e:
+            print(e)
             return False
 
-        if response.status_code == 404:
-            print("Kitap bulunamadı. Lütfen geçerli bir ISBN girin.")
-            return False
+        return self._insert_book(book) is not None
+
+    def _insert_book(self, book: Book):
+        """
+        Insert a fetched book into the database.
+
+        Args:
+            book (Book): The book to store.
+
+        Returns:
+            Book or None: The stored book, or None if its ISBN already exists.
+        """
+        key = canonical_isbn(book.isbn)
+
+        def write(conn):
+            rows = conn.execute(
+                """
+                INSERT INTO books (title, author, isbn, isbn_key)
+                SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM books WHERE isbn_key = ?)
+                RETURNING id, title, author, isbn
+                """,
+                (book.title, book.author, book.isbn, key, key)
+            ).fetchall()
+            if rows:
+                self._link_authors(conn, rows[0]["id"], self._book_authors(book))
+            return rows
 
         try:
-            response.raise_for_status()
-            data = response.json()
-        except Exception as e:
-            print(f"API'den geçerli veri alınamadı. Hata: {e}")
-            return False
+            rows = self._write("insert_book", write)
+        except sqlite3.IntegrityError:
+            rows = []
+        if not rows:
+            print("Bu ISBN zaten mevcut.")
+            return None
+        self._invalidate([key])
+        book = Book(rows[0]["title"], rows[0]["author"], rows[0]["isbn"])
+        print(f"Kitap başarıyla eklendi: {book}")
+        return book
 
-        # Get title
-        title = data.get("title")
-        if not title or not isinstance(title, str):
-            print("Kitap başlığı API'den alınamadı.")
-            return False
+    def author_names(self, keys):
+        """
+        Look up stored authors by Open Library author key.
 
-        # Try to get authors - improved method
-        author_str = "Unknown"
+        Used by the Open Library clients so authors already in the catalog are not fetched again.
 
-        # Method 1: Try to get authors from the main data
-        authors = data.get("authors", [])
-        author_names = []
+        Args:
+            keys (list): Author keys such as '/authors/OL23919A'.
 
-        if authors:
-            for author in authors:
-                key = author.get("key")
-                if key:
-                    try:
-                        author_url = f"https://openlibrary.org{key}.json"
-                        author_resp = httpx.get(author_url, headers=headers, timeout=5, follow_redirects=True)
-                        if author_resp.status_code == 200:
-                            author_data = author_resp.json()
-                            name = author_data.get("name")
-                            if name:
-                                author_names.append(name)
-                    except Exception:
-                        continue
-
-        # Method 2: If no authors found, try alternative API endpoint
-        if not author_names:
-            try:
-                alt_url = f"https://openlibrary.org/api/books?bibkeys=ISBN:{isbn}&jscmd=data&format=json"
-                alt_response = httpx.get(alt_url, headers=headers, timeout=10)
-                if alt_response.status_code == 200:
-                    alt_data = alt_response.json()
-                    book_data = alt_data.get(f"ISBN:{isbn}")
-                    if book_data and "authors" in book_data:
-                        for author in book_data["authors"]:
-                            if "name" in author:
-                                author_names.append(author["name"])
-            except Exception:
-                pass
-
-        # Set author string
-        if author_names:
-            author_str = ", ".join(author_names)
-
-        # Create book and add to database
-        book = Book(title, author_str, isbn)
+        Returns:
+            dict: The names of the keys that are stored, by key.
+        """
+        keys = list(dict.fromkeys(keys))
+        names = {}
         conn = self._get_connection()
-        try:
-            with conn:
-                conn.execute(
-                    "INSERT INTO books (title, author, isbn) VALUES (?, ?, ?)",
-                    (book.title, book.author, book.isbn)
+        with self.metrics.time("library_db_seconds", operation="author_names"):
+            for chunk in _chunked(keys):
+                cursor = conn.execute(
+                    f"SELECT ol_key, name FROM authors WHERE ol_key IN ({', '.join('?' * len(chunk))})", chunk
                 )
-            print(f"Kitap başarıyla eklendi: {book}")
-            return True
+                names.update((row["ol_key"], row["name"]) for row in cursor)
+        return names
+
+    @staticmethod
+    def _book_authors(book: Book):
+        """
+        Return the (key, name) pairs of a book, split from its author string if it has none.
+        """
+        return book.authors if book.authors is not None else _split_authors(book.author)
+
+    def _author_id(self, conn, key, name: str):
+        """
+        Return the id of an author, storing the author first if needed.
+
+        Authors with a key are matched by key; an author stored by name only (e.g. by
+        the migration of an older database) is given the key. Authors without a key
+        reuse a stored author of the same name, ignoring case.
+
+        Args:
+            conn (sqlite3.Connection): The connection of the current transaction.
+            key (str or None): The Open Library author key.
+            name (str): The author's name.
+
+        Returns:
+            int: The id in the 'authors' table.
+        """
+        if key is not None:
+            row = conn.execute(
+                """
+                UPDATE authors SET ol_key = ?
+                WHERE id = (SELECT id FROM authors WHERE ol_key IS NULL AND name = ? COLLATE NOCASE LIMIT 1)
+                  AND NOT EXISTS (SELECT 1 FROM authors WHERE ol_key = ?)
+                RETURNING id
+                """,
+                (key, name, key)
+            ).fetchone()
+            if row is None:
+                row = conn.execute(
+                    """
+                    INSERT INTO authors (ol_key, name) VALUES (?, ?)
+                    ON CONFLICT (ol_key) DO UPDATE SET name = excluded.name
+                    RETURNING id
+                    """,
+                    (key, name)
+                ).fetchone()
+            return row["id"]
+        row = conn.execute(
+            "SELECT id FROM authors WHERE name = ? COLLATE NOCASE ORDER BY ol_key IS NULL LIMIT 1", (name,)
+        ).fetchone()
+        if row is None:
+            row = conn.execute("INSERT INTO authors (name) VALUES (?) RETURNING id", (name,)).fetchone()
+        return row["id"]
+
+    def _link_authors(self, conn, book_id: int, authors):
+        """
+        Replace the authors linked to a book.
+
+        Args:
+            conn (sqlite3.Connection): The connection of the current transaction.
+            book_id (int): The id of the book.
+            authors (list): (key or None, name) pairs in display order.
+        """
+        conn.execute("DELETE FROM book_authors WHERE book_id = ?", (book_id,))
+        author_ids = []
+        for key, name in authors:
+            author_id = self._author_id(conn, key, name)
+            if author_id not in author_ids:
+                author_ids.append(author_id)
+        conn.executemany(
+            "INSERT INTO book_authors (book_id, position, author_id) VALUES (?, ?, ?)",
+            [(book_id, position, author_id) for position, author_id in enumerate(author_ids)]
+        )
+
+    def add_pending_book(self, isbn: str):
+        """
+        Store a book right away with placeholder metadata and queue a lookup for it.
+
+        The book gets PENDING_TITLE as title and 'Unknown' as author until a worker
+        of enrichment.EnrichmentQueue fills them in (see fill_placeholders). Its job
+        marks both fields as placeholders; editing a field clears the mark.
+
+        Args:
+            isbn (str): The ISBN of the book to add.
+
+        Returns:
+            Book or None: The stored placeholder book, or None if the ISBN already exists.
+        """
+        isbn = isbn.strip()
+        key = canonical_isbn(isbn)
+        now = time.time()
+
+        def write(conn):
+            rows = conn.execute(
+                """
+                INSERT INTO books (title, author, isbn, isbn_key)
+                SELECT ?, 'Unknown', ?, ? WHERE NOT EXISTS (SELECT 1 FROM books WHERE isbn_key = ?)
+                RETURNING title, author, isbn
+                """,
+                (PENDING_TITLE, isbn, key, key)
+            ).fetchall()
+            if rows:
+                self._queue_jobs(conn, [isbn], now, placeholder_title=True)
+            return rows
+
+        try:
+            rows = self._write("add_pending_book", write)
         except sqlite3.IntegrityError:
-            print("Bu ISBN zaten mevcut.")
-            return False
-        finally:
-            conn.close()
+            rows = []
+        if not rows:
+            return None
+        self._invalidate([key])
+        return Book(rows[0]["title"], rows[0]["author"], rows[0]["isbn"])
+
+    def queue_enrichment(self, isbns):
+        """
+        Mark stored books for a fresh metadata lookup, resetting any earlier job.
+
+        Args:
+            isbns (iterable): ISBNs of books in the library.
+
+        Returns:
+            int: The number of jobs queued.
+        """
+        isbns = list(isbns)
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="queue_enrichment"), conn:
+            self._queue_jobs(conn, isbns, time.time())
+        return len(isbns)
+
+    def _queue_jobs(self, conn, isbns, now: float, placeholder_title: bool = False):
+        """
+        Create or reset 'pending' enrichment jobs inside the caller's transaction.
+
+        The author is marked as a placeholder while it is 'Unknown'; the title only
+        when the caller stored a placeholder (a mark left by an earlier job is kept).
+        """
+        conn.executemany(
+            """
+            INSERT INTO enrichment_jobs (
+                isbn_key, isbn, status, attempts, last_error, next_attempt_at, updated_at,
+                placeholder_title, placeholder_author
+            )
+            SELECT ?, ?, 'pending', 0, NULL, ?, ?, ?, EXISTS (
+                SELECT 1 FROM books WHERE isbn_key = ? AND author = 'Unknown'
+            )
+            WHERE true
+            ON CONFLICT (isbn_key) DO UPDATE SET
+                status = 'pending', attempts = 0, last_error = NULL,
+                next_attempt_at = excluded.next_attempt_at, updated_at = excluded.updated_at,
+                placeholder_title = placeholder_title OR excluded.placeholder_title,
+                placeholder_author = excluded.placeholder_author
+            """,
+            [(canonical_isbn(isbn), isbn, now, now, placeholder_title, canonical_isbn(isbn)) for isbn in isbns]
+        )
+
+    def unenriched_isbns(self):
+        """
+        Return the ISBNs of books whose author is 'Unknown' or whose title is still a placeholder.
+
+        Returns:
+            list: The ISBNs, in ISBN order.
+        """
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="unenriched_isbns"):
+            cursor = conn.execute(
+                """
+                SELECT books.isbn FROM books
+                LEFT JOIN enrichment_jobs ON enrichment_jobs.isbn_key = books.isbn_key
+                WHERE books.author = 'Unknown' OR enrichment_jobs.placeholder_title
+                ORDER BY books.isbn
+                """
+            )
+            return [row["isbn"] for row in cursor.fetchall()]
+
+    def fill_placeholders(self, isbn: str, title: str = None, author: str = None, authors=None):
+        """
+        Replace the placeholder fields of a book with fetched metadata.
+
+        Only fields still marked as placeholders by the book's enrichment job are
+        written, checked in the same transaction as the write, so a title or author
+        edited meanwhile (see update_book) is kept.
+
+        Args:
+            isbn (str): The ISBN of the book.
+            title (str, optional): The fetched title. Defaults to None.
+            author (str, optional): The fetched author; None leaves the author as it is.
+            authors (list, optional): The (key or None, name) pairs behind `author`.
+
+        Returns:
+            set or None: The fields ('title', 'author') still holding placeholders
+            afterwards, or None if the book no longer exists.
+        """
+        key = canonical_isbn(isbn)
+
+        def write(conn):
+            row = conn.execute(
+                """
+                SELECT books.id, enrichment_jobs.placeholder_title, enrichment_jobs.placeholder_author
+                FROM books LEFT JOIN enrichment_jobs ON enrichment_jobs.isbn_key = books.isbn_key
+                WHERE books.isbn_key = ?
+                """,
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            pending = {field for field in ("title", "author") if row[f"placeholder_{field}"]}
+            if title is not None and "title" in pending:
+                conn.execute("UPDATE books SET title = ? WHERE id = ?", (title, row["id"]))
+                pending.discard("title")
+            if author is not None and "author" in pending:
+                conn.execute("UPDATE books SET author = ? WHERE id = ?", (author, row["id"]))
+                self._link_authors(conn, row["id"], authors if authors is not None else _split_authors(author))
+                pending.discard("author")
+            conn.execute(
+                "UPDATE enrichment_jobs SET placeholder_title = ?, placeholder_author = ? WHERE isbn_key = ?",
+                ("title" in pending, "author" in pending, key)
+            )
+            return pending
+
+        pending = self._write("fill_placeholders", write)
+        self._invalidate([key])
+        return pending
+
+    def remove_placeholder_book(self, isbn: str):
+        """
+        Remove a book whose lookup found nothing, unless its title was set meanwhile.
+
+        Args:
+            isbn (str): The ISBN of the book.
+
+        Returns:
+            bool: True if the book was removed.
+        """
+        key = canonical_isbn(isbn)
+        rows = self._write(
+            "remove_placeholder_book",
+            lambda conn: conn.execute(
+                """
+                DELETE FROM books WHERE isbn_key = ?
+                AND EXISTS (SELECT 1 FROM enrichment_jobs WHERE isbn_key = ? AND placeholder_title)
+                RETURNING id
+                """,
+                (key, key)
+            ).fetchall()
+        )
+        self._invalidate([key])
+        return bool(rows)
+
+    def enrichment_job(self, isbn: str):
+        """
+        Return the metadata lookup job of a book, matched in any ISBN spelling.
+
+        Args:
+            isbn (str): The ISBN of the book.
+
+        Returns:
+            dict or None: The job with 'isbn', 'status' ('pending', 'done' or 'failed'),
+            'attempts', 'last_error', 'next_attempt_at' and 'updated_at' (Unix
+            timestamps), or None if the book never had one.
+        """
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="enrichment_job"):
+            row = conn.execute(
+                """
+                SELECT isbn, status, attempts, last_error, next_attempt_at, updated_at
+                FROM enrichment_jobs WHERE isbn_key = ?
+                """,
+                (canonical_isbn(isbn),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def pending_enrichment_jobs(self):
+        """
+        Return every job still waiting for a lookup, soonest first.
+
+        Returns:
+            list: Job dicts as returned by enrichment_job.
+        """
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="pending_enrichment_jobs"):
+            cursor = conn.execute(
+                """
+                SELECT isbn, status, attempts, last_error, next_attempt_at, updated_at
+                FROM enrichment_jobs WHERE status = 'pending' ORDER BY next_attempt_at
+                """
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def update_enrichment_job(self, isbn: str, status: str, attempts: int, last_error: str = None, next_attempt_at: float = None):
+        """
+        Record the outcome of a lookup attempt.
+
+        Args:
+            isbn (str): The ISBN of the book.
+            status (str): 'pending' to retry, 'done' or 'failed'.
+            attempts (int): The number of attempts made so far.
+            last_error (str, optional): Why the last attempt failed. Defaults to None.
+            next_attempt_at (float, optional): Unix time of the next attempt. Defaults to now.
+        """
+        now = time.time()
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="update_enrichment_job"), conn:
+            conn.execute(
+                """
+                UPDATE enrichment_jobs
+                SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, updated_at = ?
+                WHERE isbn_key = ?
+                """,
+                (status, attempts, last_error, next_attempt_at or now, now, canonical_isbn(isbn))
+            )
+
+    def add_books(self, isbns, concurrency: int = 8):
+        """
+        Add many books by ISBN, fetching their metadata concurrently.
+
+        ISBNs already in the library are skipped without a network call. The rest are
+        fetched by up to `concurrency` threads over the library's pooled, rate-limited
+        Open Library client, and every book found is inserted in a single transaction.
 
-    def update_book(self, isbn: str, title: str = None, author: str = None):
+        Args:
+            isbns (iterable): The ISBNs to add. Blank entries and repeats are ignored.
+            concurrency (int): The maximum number of parallel lookups. Defaults to 8.
+
+        Returns:
+            list: One dict per distinct ISBN, in input order, with keys 'isbn',
+            'status' ('added', 'exists', 'error' or a MetadataError status) and
+            'book' (the added Book, or None).
+        """
+        report, to_fetch = self._plan_bulk_add(isbns)
+
+        books = []
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                futures = [(isbn, pool.submit(self.openlibrary.fetch_book, isbn)) for isbn in to_fetch]
+                for isbn, future in futures:
+                    try:
+                        books.append(future.result())
+                    except MetadataError as e:
+                        report[isbn]["status"] = e.status
+                    except Exception:
+                        report[isbn]["status"] = "error"
+
+        for book in self._insert_books(books):
+            report[book.isbn].update(status="added", book=book)
+        return list(report.values())
+
+    def _plan_bulk_add(self, isbns):
+        """
+        Prepare a bulk add: drop blanks and repeats and find ISBNs that need fetching.
+
+        Repeats are detected on the canonical ISBN, keeping the first spelling.
+
+        Args:
+            isbns (iterable): The requested ISBNs.
+
+        Returns:
+            tuple: The report dict keyed by ISBN (every entry starts as 'exists') and
+            the list of ISBNs not yet in the library.
+        """
+        by_key = {}
+        for isbn in isbns:
+            if isbn.strip():
+                by_key.setdefault(canonical_isbn(isbn), isbn.strip())
+        unique_isbns = list(by_key.values())
+        existing = self._existing_isbns(unique_isbns)
+        report = {isbn: {"isbn": isbn, "status": "exists", "book": None} for isbn in unique_isbns}
+        return report, [isbn for isbn in unique_isbns if isbn not in existing]
+
+    def _insert_books(self, books):
+        """
+        Insert fetched books with one executemany in a single transaction.
+
+        Args:
+            books (list): The Book objects to store.
+
+        Returns:
+            list: The books that were inserted; books whose ISBN already exists are skipped.
+        """
+        if not books:
+            return []
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="insert_books"), conn:
+            # Lock the database first so no other writer can add these ISBNs meanwhile
+            conn.execute("BEGIN IMMEDIATE")
+            existing = self._existing_isbns([book.isbn for book in books], conn)
+            new_books = [book for book in books if book.isbn not in existing]
+            conn.executemany(
+                "INSERT INTO books (title, author, isbn, isbn_key) VALUES (?, ?, ?, ?)",
+                [(book.title, book.author, book.isbn, canonical_isbn(book.isbn)) for book in new_books]
+            )
+            for book in new_books:
+                book_id = conn.execute(
+                    "SELECT id FROM books WHERE isbn_key = ?", (canonical_isbn(book.isbn),)
+                ).fetchone()["id"]
+                self._link_authors(conn, book_id, self._book_authors(book))
+        self._invalidate(canonical_isbn(book.isbn) for book in new_books)
+        return new_books
+
+    def _existing_isbns(self, isbns, conn=None):
         """
-        Update book details by ISBN. Only non-None fields are updated.
+        Return which of the given ISBNs are already stored, in any spelling.
+
+        Args:
+            isbns (list): The ISBNs to check.
+            conn (sqlite3.Connection, optional): The connection to use. Defaults to the pooled one.
+
+        Returns:
+            set: The given ISBNs whose canonical form exists in the database.
+        """
+        conn = conn or self._get_connection()
+        keys = list({canonical_isbn(isbn) for isbn in isbns})
+        found_keys = set()
+        with self.metrics.time("library_db_seconds", operation="existing_isbns"):
+            for chunk in _chunked(keys):
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = conn.execute(f"SELECT isbn_key FROM books WHERE isbn_key IN ({placeholders})", chunk)
+                found_keys.update(row["isbn_key"] for row in cursor)
+        return {isbn for isbn in isbns if canonical_isbn(isbn) in found_keys}
+
+    def update_book(self, isbn: str, title: str = None, author: str = None, authors=None):
+        """
+        Update book details by ISBN, matched in any spelling. Only non-None fields are updated.
 
         Args:
             isbn (str): The ISBN of the book to update.
             title (str, optional): The new title of the book. Defaults to None.
             author (str, optional): The new author of the book. Defaults to None.
+            authors (list, optional): The (key or None, name) pairs behind a new author.
+                Defaults to the names split from `author`.
 
         Returns:
-            bool: True if the book was successfully updated, False otherwise.
+            Book or None: The updated book, or None if no book matched or no field was given.
         """
-        conn = self._get_connection()
-        try:
-            fields = []
-            values = []
-            if title is not None:
-                fields.append("title = ?")
-                values.append(title)
-            if author is not None:
-                fields.append("author = ?")
-                values.append(author)
-            if not fields:
-                return False
-            values.append(isbn)
-            with conn:
-                result = conn.execute(f"UPDATE books SET {', '.join(fields)} WHERE isbn = ?", values)
-            return result.rowcount > 0
-        finally:
-            conn.close()
+        fields = []
+        values = []
+        if title is not None:
+            fields.append("title = ?")
+            values.append(title)
+        if author is not None:
+            fields.append("author = ?")
+            values.append(author)
+        if not fields:
+            return None
+        edited = [field for field, value in (("title", title), ("author", author)) if value is not None]
+        key = canonical_isbn(isbn)
+        values.append(key)
+
+        def write(conn):
+            rows = conn.execute(
+                f"UPDATE books SET {', '.join(fields)} WHERE isbn_key = ? RETURNING id, title, author, isbn",
+                values
+            ).fetchall()
+            # Fields set here are no longer placeholders for a pending lookup to fill
+            conn.execute(
+                f"UPDATE enrichment_jobs SET {', '.join(f'placeholder_{field} = 0' for field in edited)} WHERE isbn_key = ?",
+                (key,)
+            )
+            if rows and author is not None:
+                self._link_authors(conn, rows[0]["id"], authors if authors is not None else _split_authors(author))
+            return rows
+
+        rows = self._write("update_book", write)
+        self._invalidate([key])
+        if rows:
+            return Book(rows[0]["title"], rows[0]["author"], rows[0]["isbn"])
+        return None
 
     def remove_book(self, isbn: str):
         """
-        Remove a book by ISBN from the database.
+        Remove a book by ISBN from the database, matched in any spelling.
 
         Args:
             isbn (str): The ISBN of the book to remove.
+
+        Returns:
+            Book or None: The removed book, or None if no book matched.
         """
-        conn = self._get_connection()
-        try:
-            with conn:
-                conn.execute("DELETE FROM books WHERE isbn = ?", (isbn,))
-        finally:
-            conn.close()
+        key = canonical_isbn(isbn)
+        rows = self._write(
+            "remove_book",
+            lambda conn: conn.execute("DELETE FROM books WHERE isbn_key = ? RETURNING title, author, isbn", (key,)).fetchall()
+        )
+        self._invalidate([key])
+        if rows:
+            return Book(rows[0]["title"], rows[0]["author"], rows[0]["isbn"])
+        return None
 
     def list_books(self):
         """
@@ -203,16 +1209,381 @@ class Library:
         Returns:
             list: A list of Book objects representing the books in the library.
         """
+        if self.storage is not None:
+            return list(self.storage.iter_books(batch_size=10000))
+        if self.book_cache is not None:
+            with self._cache_lock:
+                snapshot = self._books_snapshot
+                generation = self._cache_generation
+                if snapshot is not None:
+                    self._list_hits += 1
+                    self.metrics.inc("library_book_cache_total", cache="list", result="hit")
+                    return list(snapshot)
+                self._list_misses += 1
+            self.metrics.inc("library_book_cache_total", cache="list", result="miss")
+
+        books = self._db_books()
+
+        if self.book_cache is not None:
+            with self._cache_lock:
+                if generation == self._cache_generation:
+                    self._books_snapshot = books
+            return list(books)
+        return books
+
+    def _db_books(self):
+        """
+        Read every book from the database in one query.
+
+        Returns:
+            list: The Book objects in table order.
+        """
         conn = self._get_connection()
-        try:
+        with self.metrics.time("library_db_seconds", operation="list_books"):
             cursor = conn.execute("SELECT title, author, isbn FROM books")
             return [Book(row["title"], row["author"], row["isbn"]) for row in cursor.fetchall()]
+
+    def iter_books(self, after_isbn: str = None, batch_size: int = 500):
+        """
+        Yield books ordered by ISBN, reading the table in keyset-paginated batches.
+
+        Only one batch is held in memory at a time, so the whole catalog can be
+        walked with constant memory.
+
+        Args:
+            after_isbn (str, optional): Start after this ISBN (exclusive). Defaults to None.
+            batch_size (int): The number of rows fetched per query. Defaults to 500.
+
+        Yields:
+            Book: The next book in ISBN order.
+        """
+        if self.storage is not None:
+            yield from self.storage.iter_books(after_isbn, batch_size)
+            return
+        last_isbn = after_isbn
+        while True:
+            # Fetch the connection per batch: a consumer may resume the generator on another thread
+            conn = self._get_connection()
+            with self.metrics.time("library_db_seconds", operation="iter_books"):
+                if last_isbn is None:
+                    cursor = conn.execute(
+                        "SELECT title, author, isbn FROM books ORDER BY isbn LIMIT ?",
+                        (batch_size,),
+                    )
+                else:
+                    cursor = conn.execute(
+                        "SELECT title, author, isbn FROM books WHERE isbn > ? ORDER BY isbn LIMIT ?",
+                        (last_isbn, batch_size),
+                    )
+                rows = cursor.fetchall()
+            for row in rows:
+                yield Book(row["title"], row["author"], row["isbn"])
+            if len(rows) < batch_size:
+                return
+            last_isbn = rows[-1]["isbn"]
+
+    def iter_books_json(self, after_isbn: str = None, batch_size: int = 500):
+        """
+        Yield books as ready-made JSON objects, ordered by ISBN.
+
+        SQLite builds each object with json_object(), so no Book is created per row.
+        Batching works as in iter_books.
+
+        Args:
+            after_isbn (str, optional): Start after this ISBN (exclusive). Defaults to None.
+            batch_size (int): The number of rows fetched per query. Defaults to 500.
+
+        Yields:
+            tuple: The ISBN and the book as JSON text with 'title', 'author' and 'isbn'.
+        """
+        last_isbn = after_isbn
+        while True:
+            conn = self._get_connection()
+            select = "SELECT isbn, json_object('title', title, 'author', author, 'isbn', isbn) FROM books"
+            with self.metrics.time("library_db_seconds", operation="iter_books_json"):
+                if last_isbn is None:
+                    cursor = conn.execute(f"{select} ORDER BY isbn LIMIT ?", (batch_size,))
+                else:
+                    cursor = conn.execute(f"{select} WHERE isbn > ? ORDER BY isbn LIMIT ?", (last_isbn, batch_size))
+                rows = cursor.fetchall()
+            for row in rows:
+                yield row[0], row[1]
+            if len(rows) < batch_size:
+                return
+            last_isbn = rows[-1][0]
+
+    def export_json(self, path: str, batch_size: int = 5000):
+        """
+        Write the catalog to a JSON file as an array of {'title', 'author', 'isbn'} objects.
+
+        Rows are streamed in ISBN order (see iter_books_json) inside one read
+        transaction, so the file is a consistent snapshot even while other threads
+        write. The file is written next to `path` and then moved into place.
+
+        Args:
+            path (str): The output file, e.g. 'library.json'.
+            batch_size (int): The number of rows fetched per query. Defaults to 5000.
+
+        Returns:
+            int: The number of books written.
+        """
+        count = 0
+        tmp_path = path + ".tmp"
+        conn = self._get_connection()
+        conn.execute("BEGIN")
+        try:
+            with self.metrics.time("library_db_seconds", operation="export_json"):
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write("[")
+                    for _, record in self.iter_books_json(batch_size=batch_size):
+                        f.write(",\n    " if count else "\n    ")
+                        f.write(record)
+                        count += 1
+                    f.write("\n]\n" if count else "]\n")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         finally:
-            conn.close()
+            conn.rollback()
+        os.replace(tmp_path, path)
+        return count
+
+    def import_json(self, path: str, batch_size: int = 10000):
+        """
+        Load books from a JSON file written by export_json, without Open Library calls.
+
+        The file is parsed incrementally and stored in transactions of `batch_size`
+        records. A record whose ISBN matches a stored book in any spelling updates
+        its title and author; other records are inserted. Records without a title
+        or ISBN are skipped, and a missing author is stored as 'Unknown'.
+
+        Args:
+            path (str): The JSON file, an array of objects or one object per line.
+            batch_size (int): Records per transaction. Defaults to 10000.
+
+        Returns:
+            dict: The numbers of books 'added', 'updated' and 'unchanged', and of records 'skipped'.
+
+        Raises:
+            OSError: If the file cannot be read.
+            json.JSONDecodeError: If the file is not valid JSON; earlier batches stay stored.
+        """
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        author_ids = {}  # Author name -> id, shared by all batches
+        batch = {}
+        with open(path, encoding="utf-8") as f:
+            for record in _iter_json_records(f):
+                isbn = record.get("isbn") if isinstance(record, dict) else None
+                title = record.get("title") if isinstance(record, dict) else None
+                if not isinstance(isbn, str) or not isbn.strip() or not isinstance(title, str) or not title.strip():
+                    counts["skipped"] += 1
+                    continue
+                author = record.get("author")
+                author = author.strip() if isinstance(author, str) and author.strip() else "Unknown"
+                # A later record for the same book wins, as it would in separate batches
+                batch[canonical_isbn(isbn)] = (title.strip(), author, isbn.strip())
+                if len(batch) >= batch_size:
+                    self._import_batch(batch, counts, author_ids)
+                    batch = {}
+        if batch:
+            self._import_batch(batch, counts, author_ids)
+        return counts
+
+    def _import_batch(self, batch, counts, author_ids):
+        """
+        Upsert one batch of import_json records in a single transaction.
+
+        Args:
+            batch (dict): (title, author, isbn) by canonical ISBN key.
+            counts (dict): The import_json counters to update.
+            author_ids (dict): Author ids by name, filled in as authors are stored.
+        """
+        keys = list(batch)
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="import_json"), conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = {}
+            for chunk in _chunked(keys):
+                cursor = conn.execute(
+                    f"SELECT id, isbn_key, title, author FROM books WHERE isbn_key IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+                existing.update((row["isbn_key"], row) for row in cursor)
+
+            inserts, updates, links, edited = [], [], [], []
+            for key, (title, author, isbn) in batch.items():
+                row = existing.get(key)
+                if row is None:
+                    inserts.append((title, author, isbn, key))
+                elif (row["title"], row["author"]) == (title, author):
+                    counts["unchanged"] += 1
+                else:
+                    updates.append((title, author, row["id"]))
+                    edited.append(key)
+                    if row["author"] != author:
+                        links.append((row["id"], author))
+            conn.executemany("UPDATE books SET title = ?, author = ? WHERE id = ?", updates)
+            conn.executemany(
+                "UPDATE enrichment_jobs SET placeholder_title = 0, placeholder_author = 0 WHERE isbn_key = ?",
+                [(key,) for key in edited]
+            )
+            if inserts:
+                self._bulk_insert(conn, inserts, links)
+
+            conn.executemany("DELETE FROM book_authors WHERE book_id = ?", [(book_id,) for book_id, _ in links])
+            link_rows = []
+            for book_id, author in links:
+                ids = []
+                for key, name in _split_authors(author):
+                    if name not in author_ids:
+                        author_ids[name] = self._author_id(conn, key, name)
+                    if author_ids[name] not in ids:
+                        ids.append(author_ids[name])
+                link_rows.extend((book_id, position, author_id) for position, author_id in enumerate(ids))
+            conn.executemany("INSERT INTO book_authors (book_id, position, author_id) VALUES (?, ?, ?)", link_rows)
+        counts["added"] += len(inserts)
+        counts["updated"] += len(updates)
+        self._invalidate(keys)
+
+    def _bulk_insert(self, conn, inserts, links):
+        """
+        Insert import_json rows, filling the search index, change log and data version once.
+
+        The BULK_INSERT_TRIGGERS are dropped and recreated inside the caller's
+        transaction, so other connections never see the table without them; indexing
+        the batch with one INSERT ... SELECT is several times faster than per row.
+
+        Args:
+            conn (sqlite3.Connection): The connection of the current transaction.
+            inserts (list): (title, author, isbn, isbn_key) tuples.
+            links (list): Receives an (id, author) pair per inserted book.
+        """
+        # AUTOINCREMENT ids only grow, so the new rows are exactly those above the current maximum
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM books").fetchone()[0]
+        triggers = conn.execute(
+            f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' * len(BULK_INSERT_TRIGGERS))})",
+            BULK_INSERT_TRIGGERS
+        ).fetchall()
+        for name in BULK_INSERT_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.executemany("INSERT INTO books (title, author, isbn, isbn_key) VALUES (?, ?, ?, ?)", inserts)
+        conn.execute(
+            "INSERT INTO books_fts (rowid, title, author, isbn) SELECT id, title, author, isbn FROM books WHERE id > ?",
+            (last_id,)
+        )
+        conn.execute(
+            """
+            INSERT INTO book_changes (op, isbn, title, author, changed_at)
+            SELECT 'insert', isbn, title, author, CAST(strftime('%s', 'now') AS INTEGER)
+            FROM books WHERE id > ? ORDER BY id
+            """,
+            (last_id,)
+        )
+        conn.execute(
+            """
+            UPDATE library_meta SET value = CASE key
+                WHEN 'data_version' THEN value + ?
+                ELSE CAST(strftime('%s', 'now') AS INTEGER)
+            END
+            """,
+            (len(inserts),)
+        )
+        for row in triggers:
+            conn.execute(row["sql"])
+        links.extend((row["id"], row["author"]) for row in conn.execute("SELECT id, author FROM books WHERE id > ?", (last_id,)))
+
+    def _filter_query(self, author: str = None, title_prefix: str = None, after_isbn: str = None, limit: int = None):
+        """
+        Build the SELECT used by find_books.
+
+        Returns:
+            tuple: The SQL text and its parameters.
+        """
+        conditions = []
+        params = []
+        sql = "SELECT books.title, books.author, books.isbn FROM books"
+        if author:
+            # Start from the author's name and follow the join table to the books
+            sql = (
+                "SELECT books.title, books.author, books.isbn FROM authors"
+                " JOIN book_authors ON book_authors.author_id = authors.id"
+                " JOIN books ON books.id = book_authors.book_id"
+            )
+            conditions.append("authors.name = ? COLLATE NOCASE")
+            params.append(author.strip())
+        if title_prefix:
+            lower, upper = _prefix_range(title_prefix)
+            conditions.append("books.title >= ? COLLATE NOCASE")
+            params.append(lower)
+            if upper is not None:
+                conditions.append("books.title < ? COLLATE NOCASE")
+                params.append(upper)
+        if after_isbn is not None:
+            conditions.append("books.isbn > ?")
+            params.append(after_isbn)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY books.isbn"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def find_books(self, author: str = None, title_prefix: str = None, after_isbn: str = None, limit: int = None):
+        """
+        Return books matching an author and/or a title prefix, ordered by ISBN.
+
+        Both filters ignore ASCII case. The author must match one of the book's
+        authors as a whole and is looked up through the authors_name_nocase index
+        and the book_authors join table; titles use the books_title_nocase index.
+
+        Args:
+            author (str, optional): The author to match. Defaults to None.
+            title_prefix (str, optional): The beginning of the title. Defaults to None.
+            after_isbn (str, optional): Start after this ISBN (exclusive). Defaults to None.
+            limit (int, optional): The maximum number of books to return. Defaults to no limit.
+
+        Returns:
+            list: The matching Book objects.
+        """
+        if self.storage is not None:
+            return self.storage.find(author, title_prefix, after_isbn, limit)
+        sql, params = self._filter_query(author, title_prefix, after_isbn, limit)
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="find_books"):
+            rows = conn.execute(sql, params).fetchall()
+        return [Book(row["title"], row["author"], row["isbn"]) for row in rows]
+
+    def find_by_author(self, author: str, limit: int = None):
+        """
+        Return the books of an author, ignoring case. See find_books.
+
+        Args:
+            author (str): The author to match.
+            limit (int, optional): The maximum number of books to return. Defaults to no limit.
+
+        Returns:
+            list: The matching Book objects in ISBN order.
+        """
+        return self.find_books(author=author, limit=limit)
+
+    def find_by_title_prefix(self, prefix: str, limit: int = None):
+        """
+        Return the books whose title starts with a prefix, ignoring case. See find_books.
+
+        Args:
+            prefix (str): The beginning of the title.
+            limit (int, optional): The maximum number of books to return. Defaults to no limit.
+
+        Returns:
+            list: The matching Book objects in ISBN order.
+        """
+        return self.find_books(title_prefix=prefix, limit=limit)
 
     def find_book(self, isbn: str):
         """
-        Find a book by ISBN in the database.
+        Find a book by ISBN in the database, matched in any spelling (see canonical_isbn).
 
         Args:
             isbn (str): The ISBN of the book to find.
@@ -220,12 +1591,56 @@ class Library:
         Returns:
             Book or None: The Book object if found, None otherwise.
         """
+        if self.storage is not None:
+            return self.storage.get(isbn)
+        key = canonical_isbn(isbn)
+        if self.book_cache is not None:
+            generation = self._cache_generation
+            cached = self.book_cache.get(key)
+            self.metrics.inc("library_book_cache_total", cache="isbn", result="miss" if cached is MISSING else "hit")
+            if cached is not MISSING:
+                return cached
+
         conn = self._get_connection()
-        try:
-            cursor = conn.execute("SELECT title, author, isbn FROM books WHERE isbn = ?", (isbn,))
+        with self.metrics.time("library_db_seconds", operation="find_book"):
+            cursor = conn.execute("SELECT title, author, isbn FROM books WHERE isbn_key = ?", (key,))
             row = cursor.fetchone()
-            if row:
-                return Book(row["title"], row["author"], row["isbn"])
-            return None
-        finally:
-            conn.close()
+        book = Book(row["title"], row["author"], row["isbn"]) if row else None
+
+        if self.book_cache is not None:
+            with self._cache_lock:
+                if generation == self._cache_generation:
+                    self.book_cache.put(key, book)
+        return book
+
+    def search(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Full-text search over title, author and ISBN, best matches first.
+
+        Each term in the query is prefix-matched and all terms must match.
+
+        Args:
+            query (str): The search text.
+            limit (int): The maximum number of books to return. Defaults to 20.
+            offset (int): The number of matches to skip. Defaults to 0.
+
+        Returns:
+            list: A list of matching Book objects ordered by relevance.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        conn = self._get_connection()
+        with self.metrics.time("library_db_seconds", operation="search"):
+            cursor = conn.execute(
+                """
+                SELECT books.title, books.author, books.isbn
+                FROM books_fts JOIN books ON books.id = books_fts.rowid
+                WHERE books_fts MATCH ?
+                ORDER BY books_fts.rank
+                LIMIT ? OFFSET ?
+                """,
+                (match, limit, offset),
+            )
+            rows = cursor.fetchall()
+        return [Book(row["title"], row["author"], row["isbn"]) for row in rows]
@@ -1,12 +1,14 @@
 from library import Library
 from book import Book
+from cache import ResponseCache
+from enrichment import EnrichmentQueue
 
 def main():
 	"""
 	Kütüphane uygulamasının ana döngüsünü başlatır.
 	Kullanıcıya basit bir menü sunar ve kitap ekleme, silme, listeleme, arama işlemlerini yapar.
 	"""
-	library = Library()  # Kütüphane nesnesi oluşturulur
+	library = Library(response_cache=ResponseCache())  # Kütüphane nesnesi oluşturulur, API yanıtları önbelleğe alınır
 	while True:
 		# Menü seçeneklerini ekrana yazdır
 		print("\nKütüphane Yönetimi")
@@ -14,8 +16,12 @@ def main():
 		print("2. Kitap Sil")
 		print("3. Kitapları Listele")
 		print("4. Kitap Ara")
-		print("5. Çıkış")
-		choice = input("Seçiminizi girin (1-5): ").strip()
+		print("5. Dosyadan Toplu Kitap Ekle")
+		print("6. Eksik Kitap Bilgilerini Tamamla")
+		print("7. Kataloğu JSON Dosyasına Aktar")
+		print("8. JSON Dosyasından Katalog Yükle")
+		print("9. Çıkış")
+		choice = input("Seçiminizi girin (1-9): ").strip()
 
 
 		# 1. Kitap ekleme işlemi
@@ -38,20 +44,21 @@ def main():
 		# 2. Kitap silme işlemi
 		elif choice == "2":
 			isbn = input("Silinecek kitabın ISBN'i: ").strip()
-			if library.find_book(isbn):
-				library.remove_book(isbn)
+			# Silinen kitap döner, ayrı bir arama gerekmez
+			if library.remove_book(isbn):
 				print("Kitap silindi.")
 			else:
 				print("Hata: Bu ISBN ile kitap bulunamadı.")
 
 		# 3. Kitapları listeleme işlemi
 		elif choice == "3":
-			books = library.list_books()
-			if not books:
+			# Kitaplar partiler halinde okunur, tüm katalog belleğe alınmaz
+			empty = True
+			for book in library.iter_books():
+				print(book)
+				empty = False
+			if empty:
 				print("Kütüphanede hiç kitap yok.")
-			else:
-				for book in books:
-					print(book)
 
 		# 4. Kitap arama işlemi
 		elif choice == "4":
@@ -62,13 +69,78 @@ def main():
 			else:
 				print("Kitap bulunamadı.")
 
-		# 5. Çıkış işlemi
+		# 5. Dosyadan toplu kitap ekleme işlemi
 		elif choice == "5":
+			path = input("ISBN dosyasının yolu (her satırda bir ISBN): ").strip()
+			try:
+				with open(path, encoding="utf-8") as f:
+					isbns = [line.strip() for line in f if line.strip()]
+			except OSError:
+				print("Hata: Dosya okunamadı.")
+				continue
+			if not isbns:
+				print("Hata: Dosyada ISBN bulunamadı.")
+				continue
+			# Kitap bilgileri paralel olarak alınır ve tek seferde kaydedilir
+			report = library.add_books(isbns)
+			for item in report:
+				print(f"{item['isbn']}: {item['status']}")
+			added = sum(1 for item in report if item["status"] == "added")
+			print(f"{added}/{len(report)} kitap eklendi.")
+
+		# 6. Yazarı 'Unknown' kalan kitapları yeniden sorgulama işlemi
+		elif choice == "6":
+			# Başarısız sorgular arka planda artan aralıklarla tekrar denenir
+			queue = EnrichmentQueue(library)
+			isbns = queue.backfill()
+			if not isbns:
+				print("Eksik bilgili kitap yok.")
+				continue
+			print(f"{len(isbns)} kitap için bilgiler alınıyor...")
+			queue.wait()
+			queue.stop()
+			failed = [isbn for isbn in isbns if queue.job(isbn)["status"] != "done"]
+			print(f"{len(isbns) - len(failed)}/{len(isbns)} kitabın bilgileri tamamlandı.")
+			for isbn in failed:
+				print(f"{isbn}: {queue.job(isbn)['last_error']}")
+
+		# 7. Kataloğu JSON dosyasına aktarma işlemi
+		elif choice == "7":
+			path = input("Hedef dosya (varsayılan: library.json): ").strip() or "library.json"
+			# Kayıtlar partiler halinde yazılır, tüm katalog belleğe alınmaz
+			try:
+				count = library.export_json(path)
+			except OSError:
+				print("Hata: Dosya yazılamadı.")
+				continue
+			print(f"{count} kitap {path} dosyasına aktarıldı.")
+
+		# 8. JSON dosyasından katalog yükleme işlemi
+		elif choice == "8":
+			path = input("Kaynak dosya (varsayılan: library.json): ").strip() or "library.json"
+			# Open Library sorgusu yapılmaz; aynı ISBN'li kitaplar güncellenir
+			try:
+				result = library.import_json(path)
+			except OSError:
+				print("Hata: Dosya okunamadı.")
+				continue
+			except ValueError:
+				print("Hata: Dosya geçerli bir JSON değil.")
+				continue
+			print(
+				f"{result['added']} kitap eklendi, {result['updated']} kitap güncellendi, "
+				f"{result['unchanged']} kitap değişmedi, {result['skipped']} kayıt atlandı."
+			)
+
+		# 9. Çıkış işlemi
+		elif choice == "9":
 			print("Çıkılıyor...")
 			break
 		# Geçersiz seçim durumu
 		else:
-			print("Geçersiz seçim. Lütfen 1-5 arasında bir değer girin.")
+			print("Geçersiz seçim. Lütfen 1-9 arasında bir değer girin.")
+	library.close()  # Veritabanı bağlantılarını kapat
+	library.openlibrary.cache.close()
 
 # Programın ana kısmı buradan başlar
 if __name__ == "__main__":
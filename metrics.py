@@ -0,0 +1,269 @@
+import contextvars
+import cProfile
+import math
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a fast SQLite lookup up to a slow Open Library call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DESCRIPTIONS = {
+    "library_db_seconds": "Time spent in SQLite statements, by Library operation.",
+    "library_openlibrary_request_seconds": "Open Library HTTP requests, by endpoint and status.",
+    "library_openlibrary_cache_total": "Open Library response cache lookups, by result.",
+    "library_openlibrary_retries_total": "Open Library requests retried after a 429 or 5xx response, by endpoint and status.",
+    "library_http_request_seconds": "API request handling time, by method, route and status.",
+    "library_book_cache_total": "In-memory book cache lookups, by cache ('isbn' or 'list') and result.",
+    "library_author_lookups_total": "Author keys resolved from the local catalog or fetched from Open Library.",
+    "library_write_batches_total": "Transactions committed by the write queue (group commit).",
+    "library_write_batch_operations_total": "Writes committed by the write queue; divide by batches for the batch size.",
+    "library_coalesced_total": "Calls that shared the result of an identical call already in flight, by operation.",
+    "library_enrichment_jobs_total": "Background metadata lookup attempts, by result ('done', 'retry' or 'failed').",
+    "library_book_cache_size": "ISBN lookups held in the in-memory book cache.",
+}
+
+# Since Python 3.12 cProfile hooks into sys.monitoring: one profiler sees every
+# thread, and starting a second one while it runs raises ValueError
+PROFILER_SEES_ALL_THREADS = sys.version_info >= (3, 12)
+
+# The RequestProfile collecting stats for the current request, if any
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    A thread-safe registry of counters, gauges and latency histograms.
+
+    Metrics are identified by name plus keyword labels and rendered in the
+    Prometheus text exposition format.
+
+    Attributes:
+        buckets (tuple): Histogram bucket upper bounds in seconds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes an empty registry.
+
+        Args:
+            buckets (tuple): Histogram bucket upper bounds in seconds. Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The counter name, conventionally ending in '_total'.
+            amount (float): The increment. Defaults to 1.
+            **labels: Label values identifying the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        """
+        Set a gauge to a value.
+
+        Args:
+            name (str): The gauge name.
+            value (float): The current value.
+            **labels: Label values identifying the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """
+        Record one duration in a histogram.
+
+        Args:
+            name (str): The histogram name, conventionally ending in '_seconds'.
+            seconds (float): The observed duration.
+            **labels: Label values identifying the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        """
+        Record the duration of a `with` block in a histogram, also when it raises.
+
+        Args:
+            name (str): The histogram name.
+            **labels: Label values identifying the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def value(self, name: str, **labels):
+        """
+        Return a counter or gauge value, or a histogram's observation count.
+
+        Args:
+            name (str): The metric name.
+            **labels: Label values identifying the series.
+
+        Returns:
+            float: The value, or 0 if the series does not exist.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key][2]
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def reset(self):
+        """
+        Remove every series.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """
+        Render every series in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+
+        lines = []
+
+        def header(name, kind):
+            if name in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for kind, series in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({name for name, _ in series}):
+                header(name, kind)
+                for (series_name, labels), value in sorted(series.items()):
+                    if series_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name in sorted({name for name, _ in histograms}):
+            header(name, "histogram")
+            for (series_name, labels), (counts, total, count) in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts + [count]):
+                    bucket_labels = labels + (("le", _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {bucket_count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by Library, the Open Library clients and the API unless they are given their own
+REGISTRY = Metrics()
+
+
+class RequestProfile:
+    """
+    cProfile stats for one request, on the event loop thread and on the worker
+    threads that run its Library calls (see `profiled`). On Python 3.12+ the one
+    request profiler records the worker threads itself.
+
+    Work of other requests interleaved on the event loop is included as well, so
+    profile under light load for clean results.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._profiler = None
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_profile.set(self)
+        self._profiler = cProfile.Profile()
+        self._profiles.append(self._profiler)
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.disable()
+        _active_profile.reset(self._token)
+
+    def add(self, profiler: cProfile.Profile):
+        """
+        Add the stats of a profiler that ran part of this request.
+        """
+        self._profiles.append(profiler)
+
+    def dump(self, path: str):
+        """
+        Write the merged stats to a file readable by pstats or snakeviz.
+
+        Args:
+            path (str): The output file.
+        """
+        stats = pstats.Stats(self._profiles[0])
+        for profiler in self._profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+
+def profiled(func, *args, **kwargs):
+    """
+    Call a function, profiling it as part of the current request when one is being profiled.
+
+    Meant to run on worker threads, e.g. asyncio.to_thread(profiled, library.find_book, isbn);
+    the request's context is carried there by asyncio.to_thread. On Python 3.12+ the
+    request's profiler already sees the call, so it runs as is.
+
+    Returns:
+        The function's return value.
+    """
+    request_profile = _active_profile.get()
+    if request_profile is None or PROFILER_SEES_ALL_THREADS:
+        return func(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        request_profile.add(profiler)
@@ -0,0 +1,771 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+import httpx
+from book import Book, canonical_isbn
+from metrics import REGISTRY
+from ratelimit import RateLimiter, Throttled
+from singleflight import AsyncSingleFlight, SingleFlight
+
+# Overridable so a server can be pointed at a local stand-in (see benchmarks/fake_openlibrary.py)
+BASE_URL = os.environ.get("OPENLIBRARY_URL", "https://openlibrary.org").rstrip("/")
+HEADERS = {
+    "User-Agent": "LibraryApp/1.0 (your-email@example.com)"
+}
+# Connection attempts retried by the transport, e.g. when a kept-alive connection was dropped
+CONNECT_RETRIES = 1
+
+
+class MetadataError(Exception):
+    """
+    Raised when a book's metadata cannot be fetched from Open Library.
+
+    Attributes:
+        status (str): A short machine-readable reason, e.g. 'not_found'.
+    """
+
+    def __init__(self, status: str, message: str):
+        """
+        Initializes the error with a reason code and a user-facing message.
+
+        Args:
+            status (str): A short machine-readable reason.
+            message (str): The message shown to the user.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def _book_data(response):
+    """
+    Validate the ISBN endpoint response and return its data.
+
+    Args:
+        response: The response of the ISBN endpoint.
+
+    Returns:
+        dict: The book data; its 'title' is guaranteed to be a non-empty string.
+
+    Raises:
+        MetadataError: If the book does not exist or the response is unusable.
+    """
+    if response.status_code == 404:
+        raise MetadataError("not_found", "Kitap bulunamadı. Lütfen geçerli bir ISBN girin.")
+
+    try:
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        raise MetadataError("invalid_response", f"API'den geçerli veri alınamadı. Hata: {e}")
+
+    # Get title
+    title = data.get("title")
+    if not title or not isinstance(title, str):
+        raise MetadataError("no_title", "Kitap başlığı API'den alınamadı.")
+    return data
+
+
+def _author_name(response):
+    """
+    Extract the author name from an author endpoint response.
+
+    Returns:
+        str or None: The name, or None if the response has none.
+    """
+    if response.status_code == 200:
+        return response.json().get("name") or None
+    return None
+
+
+def _fallback_author_names(response, isbn: str):
+    """
+    Extract author names from a books API response.
+
+    Returns:
+        list: The author names found, possibly empty.
+    """
+    author_names = []
+    if response.status_code == 200:
+        book_data = response.json().get(f"ISBN:{isbn}")
+        if book_data and "authors" in book_data:
+            for author in book_data["authors"]:
+                if "name" in author:
+                    author_names.append(author["name"])
+    return author_names
+
+
+def _settled_author_names(author_futures, fallback):
+    """
+    Decide the author names once enough lookups have finished.
+
+    Names resolved from author keys are preferred; the books API fallback is used
+    when every key lookup came back empty, or as soon as it returns names while key
+    lookups are still running.
+
+    Args:
+        author_futures (list): Futures or tasks resolving to an author name or None.
+        fallback: The future or task of the fallback lookup, or None if not started.
+
+    Returns:
+        list or None: The author names (possibly empty), or None to keep waiting.
+    """
+    authors_done = all(future.done() for future in author_futures)
+    if author_futures and authors_done:
+        names = [future.result() for future in author_futures if future.result()]
+        if names:
+            return names
+    if fallback is not None and fallback.done():
+        if fallback.result():
+            return fallback.result()
+        if authors_done:
+            return []
+    return None
+
+
+def _partial_author_names(author_futures, fallback):
+    """
+    Return the best author names available when the deadline has passed.
+
+    Returns:
+        list: Names from finished key lookups, else from a finished fallback, else empty.
+    """
+    names = [future.result() for future in author_futures if future.done() and future.result()]
+    if names:
+        return names
+    if fallback is not None and fallback.done():
+        return fallback.result()
+    return []
+
+
+def _count_known_authors(metrics, keys, known: dict):
+    """
+    Count the author keys answered from the local catalog and those left to fetch.
+    """
+    metrics.inc("library_author_lookups_total", len(known), source="local")
+    metrics.inc("library_author_lookups_total", len(keys) - len(known), source="remote")
+
+
+def _collect_resolved(keys, author_futures, resolved: dict):
+    """
+    Record the names of finished author key lookups in `resolved`.
+    """
+    for key, future in zip(keys, author_futures):
+        if future.done() and not future.cancelled() and future.result():
+            resolved[key] = future.result()
+
+
+def _combine_author_names(keys, resolved: dict, fetched):
+    """
+    Merge locally known and freshly fetched author names.
+
+    Args:
+        keys (list): The book's author keys, in order.
+        resolved (dict): Names per author key, from the local catalog or key lookups.
+        fetched (list): The names returned by _resolve_author_names for the remaining keys.
+
+    Returns:
+        list: (key or None, name) pairs. Names resolved per key are used unless some
+        keys stayed unresolved and the books API fallback, which covers the whole
+        book but has no keys, supplied names instead.
+    """
+    keyed = [(key, resolved[key]) for key in keys if key in resolved]
+    from_fallback = [name for name in fetched if name not in resolved.values()]
+    if not keys or (len(keyed) < len(keys) and from_fallback):
+        return [(None, name) for name in fetched]
+    return keyed
+
+
+def _fallback_url(isbn: str):
+    """
+    Build the books API URL used when author keys cannot be resolved.
+
+    Returns:
+        str: The URL.
+    """
+    return f"{BASE_URL}/api/books?bibkeys=ISBN:{isbn}&jscmd=data&format=json"
+
+
+def _endpoint(url: str):
+    """
+    Name the Open Library endpoint a URL belongs to, for metric labels.
+
+    Returns:
+        str: 'isbn', 'authors', 'books' or 'other'.
+    """
+    path = url[len(BASE_URL):] if url.startswith(BASE_URL) else url
+    for prefix, name in (("/isbn/", "isbn"), ("/authors/", "authors"), ("/api/books", "books")):
+        if path.startswith(prefix):
+            return name
+    return "other"
+
+
+def _record_request(metrics, url: str, start: float, status):
+    """
+    Record the duration of an Open Library request started at time.perf_counter() value `start`.
+    """
+    metrics.observe(
+        "library_openlibrary_request_seconds", time.perf_counter() - start, endpoint=_endpoint(url), status=str(status)
+    )
+
+
+def _as_requested(book: Book, isbn: str):
+    """
+    Return the book with the ISBN spelling the caller asked for.
+
+    A shared lookup returns the Book built for the ISBN as the first caller spelled
+    it; callers that use the ISBN as a key need their own spelling back.
+    """
+    if book.isbn == isbn:
+        return book
+    return Book(book.title, book.author, isbn, book.authors)
+
+
+def _limits(limiter: RateLimiter):
+    """
+    Size a connection pool for the requests the limiter lets run at once, all kept alive.
+    """
+    return httpx.Limits(max_connections=limiter.max_concurrency, max_keepalive_connections=limiter.max_concurrency)
+
+
+def _retry_after(response):
+    """
+    Read a response's Retry-After header, given in seconds or as an HTTP date.
+
+    Returns:
+        float or None: The seconds to wait, or None without a usable header.
+    """
+    value = getattr(response, "headers", {}).get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(client, url: str, response, attempt: int, give_up: float):
+    """
+    Decide whether a throttled (429) or failed (5xx) response is worth retrying.
+
+    The delay honours a Retry-After header, otherwise it is drawn uniformly from
+    [0, retry_backoff * 2**attempt] ("full jitter") so clients that failed together
+    do not retry together. A 429 also pauses the client's rate limiter for that
+    long, holding back every other request to the same upstream, even when this
+    request gives up instead of waiting. Either delay is capped at the longest
+    backoff, retry_backoff * 2**max_retries, so one long Retry-After cannot stall
+    every lookup; requests that cannot wait that long fail with Throttled.
+
+    Args:
+        client: The OpenLibraryClient or AsyncOpenLibraryClient that sent the request.
+        url (str): The request URL, for metric labels.
+        response: The response received.
+        attempt (int): The number of retries already made.
+        give_up (float): The time.monotonic() value after which no retry may start.
+
+    Returns:
+        float or None: The seconds to wait before retrying, or None to keep the response.
+    """
+    status = response.status_code
+    if status != 429 and status < 500:
+        return None
+    delay = _retry_after(response)
+    if delay is not None:
+        delay = min(delay, client.retry_backoff * 2 ** client.max_retries)
+    if status == 429 and delay is not None:
+        client.limiter.pause(delay)
+    if attempt >= client.max_retries:
+        return None
+    if delay is None:
+        delay = random.uniform(0, client.retry_backoff * 2 ** attempt)
+        if status == 429:
+            client.limiter.pause(delay)
+    if time.monotonic() + delay > give_up:
+        return None
+    client.metrics.inc("library_openlibrary_retries_total", endpoint=_endpoint(url), status=str(status))
+    return delay
+
+
+class OpenLibraryClient:
+    """
+    Resolves ISBNs to Book objects using the Open Library API.
+
+    Author keys are resolved in parallel. If they have not all answered within
+    `hedge_delay` seconds, the books API fallback is started alongside them and
+    whichever gives names first wins. A lookup never takes longer than `deadline`
+    seconds; authors still unresolved by then are reported as 'Unknown'.
+
+    Concurrent lookups of the same book (in any ISBN spelling) or of the same
+    author key share one request.
+
+    Requests go through one long-lived httpx.Client whose connections are kept
+    alive between lookups, paced by `limiter`. Responses throttled (429) or failed
+    (5xx) upstream are retried up to `max_retries` times with jittered backoff.
+
+    Attributes:
+        http (httpx.Client): The client used for requests, created on first use if not given.
+        limiter (RateLimiter): Paces requests and bounds how many run at once.
+        max_retries (int): Retries of a 429 or 5xx response.
+        retry_backoff (float): The backoff in seconds before the first retry; doubled on each one.
+        cache (ResponseCache): An optional response cache consulted before every request.
+        deadline (float): The maximum time in seconds for one book lookup.
+        hedge_delay (float): Seconds to wait for author lookups before starting the fallback.
+        metrics (Metrics): Receives request timings and cache hit counts.
+        known_authors (callable): Maps a list of author keys to a dict of the names
+            already known locally, so those authors are not fetched again.
+        flights (SingleFlight): Coalesces concurrent identical lookups.
+    """
+
+    def __init__(
+        self, http=None, cache=None, deadline=15.0, hedge_delay=1.0, metrics=None, known_authors=None, flights=None,
+        limiter=None, max_retries=3, retry_backoff=0.5
+    ):
+        """
+        Initializes the client.
+
+        Args:
+            http (httpx.Client, optional): A shared HTTP client. Defaults to None: the client
+                creates and owns a pooled one.
+            cache (ResponseCache, optional): A response cache. Defaults to None.
+            deadline (float): The maximum time for one book lookup. Defaults to 15 seconds.
+            hedge_delay (float): Delay before hedging with the fallback. Defaults to 1 second.
+            metrics (Metrics, optional): The metrics registry. Defaults to the shared REGISTRY.
+            known_authors (callable, optional): Local author key to name lookup. Defaults to None.
+            flights (SingleFlight, optional): A group shared with another client. Defaults to a new one.
+            limiter (RateLimiter, optional): A limiter shared with other clients. Defaults to a new
+                one without a rate limit.
+            max_retries (int): Retries of a 429 or 5xx response. Defaults to 3.
+            retry_backoff (float): The backoff before the first retry. Defaults to 0.5 seconds.
+        """
+        self.http = http
+        self.cache = cache
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.known_authors = known_authors
+        self.flights = flights if flights is not None else SingleFlight(self.metrics)
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._owns_http = http is None
+        self._http_lock = threading.Lock()
+
+    def close(self):
+        """
+        Close the HTTP client if this client created it. A new one is created if the client is used again.
+        """
+        with self._http_lock:
+            if self._owns_http and self.http is not None:
+                self.http.close()
+                self.http = None
+
+    def _client(self):
+        """
+        Return the HTTP client, creating the pooled one on first use.
+
+        Returns:
+            httpx.Client: The client to use.
+        """
+        if self.http is None:
+            with self._http_lock:
+                if self.http is None:
+                    transport = httpx.HTTPTransport(limits=_limits(self.limiter), retries=CONNECT_RETRIES)
+                    self.http = httpx.Client(headers=HEADERS, transport=transport)
+        return self.http
+
+    def _get(self, url: str, timeout: float):
+        """
+        Send a GET request to Open Library, answering from the cache when possible.
+
+        Args:
+            url (str): The URL to fetch.
+            timeout (float): The request timeout in seconds; neither the first request nor a
+                retry is started after it.
+
+        Returns:
+            httpx.Response or CachedResponse: The response.
+
+        Raises:
+            httpx.RequestError: If the request fails.
+            Throttled: If the rate limiter cannot let the request start within the timeout.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            self.metrics.inc("library_openlibrary_cache_total", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+        http = self._client()
+        give_up = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            with self.limiter.slot(give_up):
+                start = time.perf_counter()
+                try:
+                    response = http.get(url, headers=HEADERS, timeout=timeout, follow_redirects=True)
+                except httpx.RequestError:
+                    _record_request(self.metrics, url, start, "error")
+                    raise
+            _record_request(self.metrics, url, start, response.status_code)
+            delay = _retry_delay(self, url, response, attempt, give_up)
+            if delay is None:
+                break
+            time.sleep(delay)
+            attempt += 1
+        if self.cache is not None:
+            self.cache.put(url, response)
+        return response
+
+    def fetch_book(self, isbn: str):
+        """
+        Fetch the title and authors of a book by ISBN.
+
+        A lookup of a book that is already being fetched waits for that lookup
+        and gets its result, with the ISBN spelled as given here.
+
+        Args:
+            isbn (str): The ISBN of the book.
+
+        Returns:
+            Book: A Book built from the API data. The author is 'Unknown' if no author
+            could be resolved.
+
+        Raises:
+            MetadataError: If the book does not exist or the API gives no usable data.
+        """
+        return _as_requested(self.flights.do("fetch_book", canonical_isbn(isbn), self._fetch_book, isbn), isbn)
+
+    def _fetch_book(self, isbn: str):
+        deadline = time.monotonic() + self.deadline
+
+        # First try the ISBN endpoint
+        try:
+            response = self._get(f"{BASE_URL}/isbn/{isbn}.json", timeout=min(10, self.deadline))
+        except httpx.RequestError:
+            raise MetadataError(
+                "connection_error",
+                "Bağlantı hatası: API'ye ulaşılamıyor. Lütfen internet bağlantınızı kontrol edin.",
+            )
+        except Throttled:
+            raise MetadataError("rate_limited", "Open Library istek sınırına ulaşıldı. Lütfen biraz sonra tekrar deneyin.")
+
+        data = _book_data(response)
+        keys = [author.get("key") for author in data.get("authors", []) if author.get("key")]
+        # Authors already in the local catalog are not fetched again
+        resolved = {}
+        if self.known_authors is not None and keys:
+            resolved = dict(self.known_authors(keys))
+            _count_known_authors(self.metrics, keys, resolved)
+        missing = [key for key in keys if key not in resolved]
+        fetched = self._resolve_author_names(isbn, missing, deadline, resolved) if missing or not keys else []
+        authors = _combine_author_names(keys, resolved, fetched)
+
+        author_str = ", ".join(name for _, name in authors) if authors else "Unknown"
+        return Book(data["title"], author_str, isbn, authors)
+
+    def _resolve_author_names(self, isbn: str, keys, deadline: float, resolved: dict = None):
+        """
+        Resolve author keys concurrently, hedging with the books API fallback.
+
+        Args:
+            isbn (str): The ISBN of the book, used by the fallback.
+            keys (list): Author keys like '/authors/OL12345A'.
+            deadline (float): The time.monotonic() value at which to give up.
+            resolved (dict, optional): Receives the name of every key that was resolved.
+
+        Returns:
+            list: The author names found, possibly empty.
+        """
+        pool = ThreadPoolExecutor(max_workers=len(keys) + 1)
+        author_futures = [pool.submit(self._fetch_author_name, key, deadline) for key in keys]
+        try:
+            fallback = None
+            if author_futures:
+                wait(author_futures, timeout=max(0, min(self.hedge_delay, deadline - time.monotonic())))
+            while True:
+                names = _settled_author_names(author_futures, fallback)
+                if names is not None:
+                    return names
+                if fallback is None:
+                    fallback = pool.submit(self._fetch_fallback_author_names, isbn, deadline)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return _partial_author_names(author_futures, fallback)
+                pending = [future for future in author_futures + [fallback] if not future.done()]
+                wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        finally:
+            if resolved is not None:
+                _collect_resolved(keys, author_futures, resolved)
+            # Do not wait for lookups that lost the race or missed the deadline
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_author_name(self, key: str, deadline: float):
+        """
+        Resolve one Open Library author key to a name.
+
+        Args:
+            key (str): The author key, e.g. '/authors/OL12345A'.
+            deadline (float): The time.monotonic() value at which to give up.
+
+        Returns:
+            str or None: The author name, or None if it could not be resolved.
+        """
+        try:
+            timeout = max(0.1, min(5, deadline - time.monotonic()))
+            # Books by the same author looked up at once share the request
+            return _author_name(self.flights.do("fetch_author", key, self._get, f"{BASE_URL}{key}.json", timeout))
+        except Exception:
+            return None
+
+    def _fetch_fallback_author_names(self, isbn: str, deadline: float):
+        """
+        Look up author names through the books API.
+
+        Args:
+            isbn (str): The ISBN of the book.
+            deadline (float): The time.monotonic() value at which to give up.
+
+        Returns:
+            list: The author names found, possibly empty.
+        """
+        try:
+            timeout = max(0.1, min(10, deadline - time.monotonic()))
+            return _fallback_author_names(self._get(_fallback_url(isbn), timeout=timeout), isbn)
+        except Exception:
+            return []
+
+
+class AsyncOpenLibraryClient:
+    """
+    Async counterpart of OpenLibraryClient built on httpx.AsyncClient.
+
+    Lookups never block the event loop: requests are awaited and the response
+    cache's SQLite work runs in a worker thread. Author resolution, hedging, the
+    per-book deadline, rate limiting and retries behave as in OpenLibraryClient, and
+    so does the sharing of concurrent identical lookups.
+
+    Attributes:
+        http (httpx.AsyncClient): The client used for requests, created on first use if not given.
+        limiter (RateLimiter): Paces requests and bounds how many run at once.
+        max_retries (int): Retries of a 429 or 5xx response.
+        retry_backoff (float): The backoff in seconds before the first retry; doubled on each one.
+        cache (ResponseCache): An optional response cache consulted before every request.
+        deadline (float): The maximum time in seconds for one book lookup.
+        hedge_delay (float): Seconds to wait for author lookups before starting the fallback.
+        metrics (Metrics): Receives request timings and cache hit counts.
+        known_authors (callable): Maps a list of author keys to a dict of the names
+            already known locally, so those authors are not fetched again.
+        flights (AsyncSingleFlight): Coalesces concurrent identical lookups.
+    """
+
+    def __init__(
+        self, http=None, cache=None, deadline=15.0, hedge_delay=1.0, metrics=None, known_authors=None,
+        limiter=None, max_retries=3, retry_backoff=0.5
+    ):
+        """
+        Initializes the client.
+
+        Args:
+            http (httpx.AsyncClient, optional): A shared async HTTP client. Defaults to None.
+            cache (ResponseCache, optional): A response cache. Defaults to None.
+            deadline (float): The maximum time for one book lookup. Defaults to 15 seconds.
+            hedge_delay (float): Delay before hedging with the fallback. Defaults to 1 second.
+            metrics (Metrics, optional): The metrics registry. Defaults to the shared REGISTRY.
+            known_authors (callable, optional): Local author key to name lookup. Defaults to None.
+            limiter (RateLimiter, optional): A limiter shared with other clients. Defaults to a new
+                one without a rate limit.
+            max_retries (int): Retries of a 429 or 5xx response. Defaults to 3.
+            retry_backoff (float): The backoff before the first retry. Defaults to 0.5 seconds.
+        """
+        self.http = http
+        self.cache = cache
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.known_authors = known_authors
+        self.flights = AsyncSingleFlight(self.metrics)
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._owns_http = http is None
+        self._http_loop = None
+
+    async def aclose(self):
+        """
+        Close the underlying HTTP client.
+        """
+        if self.http is not None:
+            await self.http.aclose()
+            if self._owns_http:
+                self.http = None
+
+    def _client(self):
+        """
+        Return the HTTP client, creating one for the running event loop if needed.
+
+        A client's pooled connections belong to the loop that opened them, so an
+        owned client is recreated when it is used from a different loop.
+
+        Returns:
+            httpx.AsyncClient: The client to use.
+        """
+        loop = asyncio.get_running_loop()
+        if self._owns_http and (self.http is None or self._http_loop is not loop):
+            transport = httpx.AsyncHTTPTransport(limits=_limits(self.limiter), retries=CONNECT_RETRIES)
+            self.http = httpx.AsyncClient(headers=HEADERS, transport=transport)
+            self._http_loop = loop
+        return self.http
+
+    async def _get(self, url: str, timeout: float):
+        """
+        Send a GET request to Open Library, answering from the cache when possible.
+
+        Args:
+            url (str): The URL to fetch.
+            timeout (float): The request timeout in seconds; neither the first request nor a
+                retry is started after it.
+
+        Returns:
+            httpx.Response or CachedResponse: The response.
+
+        Raises:
+            httpx.RequestError: If the request fails.
+            Throttled: If the rate limiter cannot let the request start within the timeout.
+        """
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, url)
+            self.metrics.inc("library_openlibrary_cache_total", result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+        http = self._client()
+        give_up = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            async with self.limiter.async_slot(give_up):
+                start = time.perf_counter()
+                try:
+                    response = await http.get(url, headers=HEADERS, timeout=timeout, follow_redirects=True)
+                except httpx.RequestError:
+                    _record_request(self.metrics, url, start, "error")
+                    raise
+            _record_request(self.metrics, url, start, response.status_code)
+            delay = _retry_delay(self, url, response, attempt, give_up)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            attempt += 1
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, url, response)
+        return response
+
+    async def fetch_book(self, isbn: str):
+        """
+        Fetch the title and authors of a book by ISBN.
+
+        A lookup of a book that is already being fetched waits for that lookup
+        and gets its result, with the ISBN spelled as given here.
+
+        Args:
+            isbn (str): The ISBN of the book.
+
+        Returns:
+            Book: A Book built from the API data. The author is 'Unknown' if no author
+            could be resolved.
+
+        Raises:
+            MetadataError: If the book does not exist or the API gives no usable data.
+        """
+        return _as_requested(await self.flights.do("fetch_book", canonical_isbn(isbn), self._fetch_book, isbn), isbn)
+
+    async def _fetch_book(self, isbn: str):
+        deadline = time.monotonic() + self.deadline
+        try:
+            response = await self._get(f"{BASE_URL}/isbn/{isbn}.json", timeout=min(10, self.deadline))
+        except httpx.RequestError:
+            raise MetadataError(
+                "connection_error",
+                "Bağlantı hatası: API'ye ulaşılamıyor. Lütfen internet bağlantınızı kontrol edin.",
+            )
+        except Throttled:
+            raise MetadataError("rate_limited", "Open Library istek sınırına ulaşıldı. Lütfen biraz sonra tekrar deneyin.")
+        data = _book_data(response)
+        keys = [author.get("key") for author in data.get("authors", []) if author.get("key")]
+        # Authors already in the local catalog are not fetched again
+        resolved = {}
+        if self.known_authors is not None and keys:
+            resolved = dict(await asyncio.to_thread(self.known_authors, keys))
+            _count_known_authors(self.metrics, keys, resolved)
+        missing = [key for key in keys if key not in resolved]
+        fetched = await self._resolve_author_names(isbn, missing, deadline, resolved) if missing or not keys else []
+        authors = _combine_author_names(keys, resolved, fetched)
+
+        author_str = ", ".join(name for _, name in authors) if authors else "Unknown"
+        return Book(data["title"], author_str, isbn, authors)
+
+    async def _resolve_author_names(self, isbn: str, keys, deadline: float, resolved: dict = None):
+        """
+        Resolve author keys concurrently, hedging with the books API fallback.
+
+        Args:
+            isbn (str): The ISBN of the book, used by the fallback.
+            keys (list): Author keys like '/authors/OL12345A'.
+            deadline (float): The time.monotonic() value at which to give up.
+            resolved (dict, optional): Receives the name of every key that was resolved.
+
+        Returns:
+            list: The author names found, possibly empty.
+        """
+        author_tasks = [asyncio.create_task(self._fetch_author_name(key, deadline)) for key in keys]
+        fallback = None
+        try:
+            if author_tasks:
+                await asyncio.wait(author_tasks, timeout=max(0, min(self.hedge_delay, deadline - time.monotonic())))
+            while True:
+                names = _settled_author_names(author_tasks, fallback)
+                if names is not None:
+                    return names
+                if fallback is None:
+                    fallback = asyncio.create_task(self._fetch_fallback_author_names(isbn, deadline))
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return _partial_author_names(author_tasks, fallback)
+                pending = [task for task in author_tasks + [fallback] if not task.done()]
+                await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if resolved is not None:
+                _collect_resolved(keys, author_tasks, resolved)
+            # Cancel lookups that lost the race or missed the deadline
+            for task in author_tasks + ([fallback] if fallback is not None else []):
+                task.cancel()
+
+    async def _fetch_author_name(self, key: str, deadline: float):
+        """
+        Resolve one Open Library author key to a name.
+
+        Returns:
+            str or None: The author name, or None if it could not be resolved.
+        """
+        try:
+            timeout = max(0.1, min(5, deadline - time.monotonic()))
+            return _author_name(await self.flights.do("fetch_author", key, self._get, f"{BASE_URL}{key}.json", timeout))
+        except Exception:
+            return None
+
+    async def _fetch_fallback_author_names(self, isbn: str, deadline: float):
+        """
+        Look up author names through the books API.
+
+        Returns:
+            list: The author names found, possibly empty.
+        """
+        try:
+            timeout = max(0.1, min(10, deadline - time.monotonic()))
+            return _fallback_author_names(await self._get(_fallback_url(isbn), timeout=timeout), isbn)
+        except Exception:
+            return []
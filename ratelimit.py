@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+
+class Throttled(Exception):
+    """
+    Raised when a request could not start before its deadline because of the rate limit.
+    """
+
+
+class RateLimiter:
+    """
+    Paces requests to an upstream with a token bucket and bounds how many run at once.
+
+    The bucket refills at `rate` tokens per second up to `burst`; each request takes
+    one token, waiting for it if the bucket is empty. Waiting callers reserve their
+    token up front, so they are released one per 1/rate seconds instead of all at once.
+    At most `max_concurrency` requests run at a time among threads (slot) and, separately,
+    among the tasks of each event loop (async_slot).
+
+    Callers wait for their token before taking a slot, so a paused or empty bucket
+    never ties up a slot, and give up with Throttled instead of waiting past their deadline.
+
+    One limiter can be shared by every client talking to the same upstream, sync or async.
+
+    Attributes:
+        rate (float): Requests per second, or None for no rate limit.
+        burst (int): The number of requests that may start back to back.
+        max_concurrency (int): The maximum number of requests in flight.
+    """
+
+    def __init__(self, rate=None, burst=None, max_concurrency=10):
+        """
+        Initializes the limiter with a full bucket.
+
+        Args:
+            rate (float, optional): Requests per second. Defaults to None: no rate limit.
+            burst (int, optional): The bucket size. Defaults to max(1, rate).
+            max_concurrency (int): The maximum number of requests in flight. Defaults to 10.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self.max_concurrency = max_concurrency
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._async_semaphores = {}
+
+    def reserve(self, deadline: float = None):
+        """
+        Take a token, borrowing it from the future if the bucket is empty.
+
+        Args:
+            deadline (float, optional): The time.monotonic() value by which the request
+                must be able to start. Defaults to None: no limit.
+
+        Returns:
+            float: The seconds the caller must wait before sending its request.
+
+        Raises:
+            Throttled: If the wait would pass the deadline; no token is taken then.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            tokens = self._tokens
+            if self.rate:
+                tokens = min(self.burst, tokens + (now - self._updated) * self.rate) - 1
+                if tokens < 0:
+                    delay = max(delay, -tokens / self.rate)
+            if deadline is not None and now + delay > deadline:
+                raise Throttled(f"Rate limited for another {delay:.1f}s")
+            if self.rate:
+                self._tokens = tokens
+                self._updated = now
+            return delay
+
+    def pause(self, seconds: float):
+        """
+        Hold back every request for a while, e.g. after the upstream answered 429.
+
+        Args:
+            seconds (float): How long from now to wait before the next request starts.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @contextmanager
+    def slot(self, deadline: float = None):
+        """
+        Wait for a token, then for a concurrency slot, and hold the slot for the block.
+
+        Args:
+            deadline (float, optional): The time.monotonic() value after which to stop
+                waiting. Defaults to None: no limit.
+
+        Raises:
+            Throttled: If the request could not start by the deadline.
+        """
+        delay = self.reserve(deadline)
+        if delay > 0:
+            time.sleep(delay)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not self._semaphore.acquire(timeout=timeout):
+            raise Throttled("No free request slot")
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def async_slot(self, deadline: float = None):
+        """
+        Async counterpart of slot(); the concurrency bound applies per event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                # Drop semaphores of loops that have been closed
+                self._async_semaphores = {key: value for key, value in self._async_semaphores.items() if not key.is_closed()}
+                semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        delay = self.reserve(deadline)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise Throttled("No free request slot")
+        try:
+            yield
+        finally:
+            semaphore.release()
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from metrics import REGISTRY
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key across threads.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and receive the same result or
+    exception instead of repeating the work. Once the call finishes, the next
+    caller starts a fresh one: results are shared, never cached.
+
+    Attributes:
+        metrics (Metrics): Counts the calls that shared a result, by operation.
+    """
+
+    def __init__(self, metrics=None):
+        """
+        Initializes an empty group.
+
+        Args:
+            metrics (Metrics, optional): The metrics registry. Defaults to the shared REGISTRY.
+        """
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, operation: str, key, func, *args):
+        """
+        Call func(*args), or wait for the call already running for the same operation and key.
+
+        Args:
+            operation (str): The kind of call, e.g. 'fetch_book'; also the metric label.
+            key: Identifies calls of the operation that are interchangeable.
+            func (callable): The function to run.
+            *args: Its arguments.
+
+        Returns:
+            The leader's return value.
+
+        Raises:
+            Exception: What the leader's call raised.
+        """
+        key = (operation, key)
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            self.metrics.inc("library_coalesced_total", operation=operation)
+            return future.result()
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key):
+        with self._lock:
+            del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent awaits with the same key on an event loop; see SingleFlight.
+
+    The shared call runs as a task of its own, so a caller that is cancelled
+    (e.g. a client that disconnects) does not cancel it for the others.
+    """
+
+    def __init__(self, metrics=None):
+        """
+        Initializes an empty group.
+
+        Args:
+            metrics (Metrics, optional): The metrics registry. Defaults to the shared REGISTRY.
+        """
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self._calls = {}
+
+    async def do(self, operation: str, key, func, *args):
+        """
+        Await func(*args), or the call already running for the same operation and key
+        on this event loop.
+
+        Args:
+            operation (str): The kind of call, e.g. 'fetch_book'; also the metric label.
+            key: Identifies calls of the operation that are interchangeable.
+            func (callable): The coroutine function to run.
+            *args: Its arguments.
+
+        Returns:
+            The shared call's return value.
+
+        Raises:
+            Exception: What the shared call raised.
+        """
+        # Tasks belong to one loop; a client may be used from several in turn
+        call_key = (asyncio.get_running_loop(), operation, key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._calls[call_key] = task
+            task.add_done_callback(lambda done: self._finish(call_key, done))
+        else:
+            self.metrics.inc("library_coalesced_total", operation=operation)
+        return await asyncio.shield(task)
+
+    def _finish(self, call_key, task):
+        if self._calls.get(call_key) is task:
+            del self._calls[call_key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller has gone away
+            task.exception()
@@ -0,0 +1,229 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from book import Book, canonical_isbn
+
+# Folds ASCII letters only, like SQLite's NOCASE collation
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _fold(text: str):
+    return text.translate(_ASCII_LOWER)
+
+
+def _author_names(book: Book):
+    """
+    Return the case-folded names a book is indexed under, one per author.
+
+    Like Library._insert_book, the book's (key, name) pairs are used when it has
+    them, and its author string is split on commas otherwise.
+    """
+    if book.authors is not None:
+        names = [name for _, name in book.authors]
+    elif book.author == "Unknown":
+        names = []
+    else:
+        names = [name.strip() for name in book.author.split(",") if name.strip()]
+    return list(dict.fromkeys(_fold(name) for name in names))
+
+
+class MemoryStorage:
+    """
+    An in-memory copy of the books table with the indexes Library reads through.
+
+    Books are kept in a dict by canonical ISBN (see canonical_isbn), in a sorted
+    list of ISBNs for ordered, keyset-paginated iteration, in a sorted list of
+    case-folded titles for prefix lookups, and in per-author sorted ISBN lists.
+    Books are indexed under the author names linked to them in book_authors (see
+    _author_names), so lookups and filters give the same results as the SQLite
+    queries they replace.
+
+    The storage holds what it is given; Library(storage="memory") loads it from
+    the database at startup and refreshes it after every committed write.
+    """
+
+    def __init__(self):
+        self._books = {}    # Canonical ISBN -> Book
+        self._by_isbn = {}  # Stored ISBN -> Book
+        self._isbns = []    # Sorted stored ISBNs
+        self._titles = []   # Sorted (folded title, ISBN)
+        self._authors = {}  # Folded author name -> sorted ISBNs
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._books)
+
+    def load(self, books):
+        """
+        Replace the contents with the given books, building every index once.
+
+        Args:
+            books (iterable): The Book objects to hold.
+        """
+        by_key = {canonical_isbn(book.isbn): book for book in books}
+        authors = {}
+        for book in by_key.values():
+            for name in _author_names(book):
+                authors.setdefault(name, []).append(book.isbn)
+        for isbns in authors.values():
+            isbns.sort()
+        with self._lock:
+            self._books = by_key
+            self._by_isbn = {book.isbn: book for book in by_key.values()}
+            self._isbns = sorted(self._by_isbn)
+            self._titles = sorted((_fold(book.title), book.isbn) for book in by_key.values())
+            self._authors = authors
+
+    def get(self, isbn: str):
+        """
+        Return the book with an ISBN in any spelling, or None.
+        """
+        return self._books.get(canonical_isbn(isbn))
+
+    def put(self, book: Book):
+        """
+        Store a book, replacing the one with the same canonical ISBN.
+
+        Args:
+            book (Book): The book to store.
+        """
+        key = canonical_isbn(book.isbn)
+        with self._lock:
+            self._unindex(self._books.get(key))
+            self._books[key] = book
+            self._by_isbn[book.isbn] = book
+            insort(self._isbns, book.isbn)
+            insort(self._titles, (_fold(book.title), book.isbn))
+            for name in _author_names(book):
+                insort(self._authors.setdefault(name, []), book.isbn)
+
+    def put_many(self, books):
+        """
+        Store several books, replacing those with the same canonical ISBNs.
+
+        Each index is updated once for the whole batch: the new entries are
+        appended and the list sorted again, instead of one insort per book,
+        which would make large batches quadratic.
+
+        Args:
+            books (iterable): The Book objects to store.
+        """
+        batch = {canonical_isbn(book.isbn): book for book in books}
+        if len(batch) == 1:
+            self.put(next(iter(batch.values())))
+            return
+        with self._lock:
+            self._unindex_many([self._books[key] for key in batch if key in self._books])
+            touched = set()
+            for key, book in batch.items():
+                self._books[key] = book
+                self._by_isbn[book.isbn] = book
+                for name in _author_names(book):
+                    self._authors.setdefault(name, []).append(book.isbn)
+                    touched.add(name)
+            self._isbns.extend(book.isbn for book in batch.values())
+            self._isbns.sort()
+            self._titles.extend((_fold(book.title), book.isbn) for book in batch.values())
+            self._titles.sort()
+            for name in touched:
+                self._authors[name].sort()
+
+    def remove(self, isbn: str):
+        """
+        Remove the book with an ISBN in any spelling.
+
+        Returns:
+            Book or None: The removed book, or None if there was none.
+        """
+        with self._lock:
+            book = self._books.pop(canonical_isbn(isbn), None)
+            self._unindex(book)
+        return book
+
+    def remove_many(self, isbns):
+        """
+        Remove the books with the given ISBNs, in any spelling, in one pass over each index.
+
+        Args:
+            isbns (iterable): The ISBNs to remove.
+        """
+        keys = {canonical_isbn(isbn) for isbn in isbns}
+        if len(keys) == 1:
+            self.remove(next(iter(keys)))
+            return
+        with self._lock:
+            self._unindex_many([self._books.pop(key) for key in keys if key in self._books])
+
+    def _unindex(self, book):
+        if book is None:
+            return
+        del self._by_isbn[book.isbn]
+        self._isbns.pop(bisect_left(self._isbns, book.isbn))
+        self._titles.pop(bisect_left(self._titles, (_fold(book.title), book.isbn)))
+        for name in _author_names(book):
+            isbns = self._authors[name]
+            isbns.pop(bisect_left(isbns, book.isbn))
+            if not isbns:
+                del self._authors[name]
+
+    def _unindex_many(self, books):
+        # Filter each index once instead of popping entries one by one
+        if not books:
+            return
+        stale = {book.isbn for book in books}
+        for isbn in stale:
+            del self._by_isbn[isbn]
+        self._isbns = [isbn for isbn in self._isbns if isbn not in stale]
+        self._titles = [entry for entry in self._titles if entry[1] not in stale]
+        for name in {name for book in books for name in _author_names(book)}:
+            isbns = [isbn for isbn in self._authors[name] if isbn not in stale]
+            if isbns:
+                self._authors[name] = isbns
+            else:
+                del self._authors[name]
+
+    def iter_books(self, after_isbn: str = None, batch_size: int = 500):
+        """
+        Yield books ordered by ISBN, like Library.iter_books.
+
+        The index is read in batches, so writes made meanwhile are seen as they
+        would be by the keyset-paginated SQL query.
+
+        Args:
+            after_isbn (str, optional): Start after this ISBN (exclusive). Defaults to None.
+            batch_size (int): The number of books read per batch. Defaults to 500.
+
+        Yields:
+            Book: The books in ISBN order.
+        """
+        last_isbn = after_isbn
+        while True:
+            with self._lock:
+                start = 0 if last_isbn is None else bisect_right(self._isbns, last_isbn)
+                books = [self._by_isbn[isbn] for isbn in self._isbns[start:start + batch_size]]
+            yield from books
+            if len(books) < batch_size:
+                return
+            last_isbn = books[-1].isbn
+
+    def find(self, author: str = None, title_prefix: str = None, after_isbn: str = None, limit: int = None):
+        """
+        Return books matching an author and/or a title prefix, like Library.find_books.
+
+        Returns:
+            list: The matching Book objects in ISBN order.
+        """
+        with self._lock:
+            isbns = self._authors.get(_fold(author.strip()), []) if author else self._isbns
+            if title_prefix:
+                prefix = _fold(title_prefix)
+                start = bisect_left(self._titles, (prefix,))
+                matches = set()
+                for title, isbn in islice(self._titles, start, None):
+                    if not title.startswith(prefix):
+                        break
+                    matches.add(isbn)
+                isbns = sorted(matches) if not author else [isbn for isbn in isbns if isbn in matches]
+            start = 0 if after_isbn is None else bisect_right(isbns, after_isbn)
+            end = len(isbns) if limit is None else start + limit
+            return [self._by_isbn[isbn] for isbn in isbns[start:end]]
@@ -1,4 +1,5 @@
 import pytest
+import os
 from fastapi.testclient import TestClient
 from api import app
 
@@ -31,3 +32,139 @@ def test_delete_book():
     response = client.delete(f"/books/{isbn}")
     assert response.status_code == 404
     assert "detail" in response.json()
+
+def test_search_books_requires_query():
+    response = client.get("/books/search")
+    assert response.status_code == 422
+
+def test_search_books():
+    response = client.get("/books/search", params={"q": "a", "limit": 5})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+    assert len(response.json()) <= 5
+
+def test_get_books_paginated(tmp_path, monkeypatch):
+    from async_library import AsyncLibrary
+    from book import Book
+    from library import Library
+    import api
+
+    library = Library(str(tmp_path / "library.db"))
+    isbns = ["9780000000002", "9780000000019", "9780000000026"]
+    library._insert_books([Book(f"Book {isbn}", "Some Author", isbn) for isbn in isbns])
+    monkeypatch.setattr(api, "library", library)
+    monkeypatch.setattr(api, "alibrary", AsyncLibrary(library))
+
+    first = client.get("/books", params={"limit": 2})
+    assert first.status_code == 200
+    assert [book["isbn"] for book in first.json()] == isbns[:2]
+    cursor = first.headers["X-Next-Cursor"]
+    assert cursor == isbns[1]
+    second = client.get("/books", params={"limit": 2, "after": cursor})
+    assert [book["isbn"] for book in second.json()] == isbns[2:]
+    assert "X-Next-Cursor" not in second.headers
+    # Without a limit, every book after the cursor is returned
+    rest = client.get("/books", params={"after": isbns[0]})
+    assert rest.status_code == 200
+    assert [book["isbn"] for book in rest.json()] == isbns[1:]
+    library.close()
+
+def test_add_books_bulk_requires_isbns():
+    response = client.post("/books/bulk", json={"isbns": []})
+    assert response.status_code == 422
+
+def test_update_missing_book():
+    response = client.put("/books/0000000000000", json={"title": "Nothing"})
+    assert response.status_code == 404
+    response = client.put("/books/0000000000000", json={})
+    assert response.status_code == 400
+
+def test_get_books_fast_formats():
+    import json
+    expected = client.get("/books", params={"limit": 1000}).json()
+    fast = client.get("/books", params={"format": "json"})
+    assert fast.status_code == 200
+    assert fast.json() == expected
+    ndjson = client.get("/books", headers={"Accept": "application/x-ndjson"})
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == expected
+    page = client.get("/books", params={"format": "ndjson", "limit": 1})
+    assert len(page.text.splitlines()) <= 1
+
+def test_get_books_conditional():
+    first = client.get("/books")
+    etag = first.headers["ETag"]
+    assert "Last-Modified" in first.headers
+    response = client.get("/books", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    response = client.get("/books", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert response.status_code == 304
+    response = client.get("/books", headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+
+def test_get_book_not_found():
+    response = client.get("/books/0000000000000")
+    assert response.status_code == 404
+
+def test_get_changes():
+    response = client.get("/books/changes", params={"since": 0, "limit": 5})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["changes"]) <= 5
+    assert "X-Change-Seq" in client.get("/books").headers
+    response = client.get("/books/changes", params={"since": 10**9})
+    assert response.json() == {"changes": [], "last_seq": 10**9}
+
+def test_sse_event_format():
+    from api import sse_event
+    event = sse_event({"seq": 7, "op": "delete", "isbn": "1"})
+    assert event.startswith("id: 7\nevent: change\ndata: {")
+    assert event.endswith("\n\n")
+
+def test_metrics_endpoint():
+    client.get("/books", params={"limit": 1})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'library_http_request_seconds_count{method="GET",route="/books",status="200"}' in response.text
+    assert "library_db_seconds_bucket" in response.text
+
+def test_request_profiling_is_opt_in(tmp_path, monkeypatch):
+    response = client.get("/books", params={"limit": 1}, headers={"X-Profile": "1"})
+    assert "X-Profile-File" not in response.headers
+    monkeypatch.setattr("api.PROFILE_DIR", str(tmp_path))
+    response = client.get("/books", params={"limit": 1}, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert os.path.exists(response.headers["X-Profile-File"])
+
+def test_add_book_in_background(monkeypatch):
+    from book import Book
+    import api
+
+    class FakeClient:
+        def fetch_book(self, isbn):
+            return Book("Background Book", "Some Author", isbn)
+
+    monkeypatch.setattr(api.enrichment, "client", FakeClient())
+    isbn = "9780000000019"
+    client.delete(f"/books/{isbn}")
+    response = client.post("/books", params={"background": "true"}, json={"isbn": isbn})
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    assert response.headers["Location"] == f"/books/{isbn}/enrichment"
+    assert api.enrichment.wait(5)
+    assert client.get(f"/books/{isbn}/enrichment").json()["status"] == "done"
+    assert client.get(f"/books/{isbn}").json()["title"] == "Background Book"
+    client.delete(f"/books/{isbn}")
+
+def test_enrichment_job_not_found():
+    response = client.get("/books/0000000000000/enrichment")
+    assert response.status_code == 404
+
+def test_get_books_filters():
+    response = client.get("/books", params={"author": "Nobody At All", "limit": 5})
+    assert response.status_code == 200
+    assert response.json() == []
+    response = client.get("/books", params={"title_prefix": "a", "format": "ndjson"})
+    assert response.status_code == 400
@@ -0,0 +1,49 @@
+import asyncio
+import httpx
+from library import Library
+from async_library import AsyncLibrary
+
+ROUTES = {
+    "/isbn/111.json": (200, {"title": "Book One", "authors": [{"key": "/authors/OL1A"}]}),
+    "/authors/OL1A.json": (200, {"name": "Author One"}),
+    "/isbn/222.json": (200, {"title": "Book Two", "authors": []}),
+    "/api/books": (200, {"ISBN:222": {"authors": [{"name": "Fallback Author"}]}}),
+}
+
+def handler(request):
+    status, data = ROUTES.get(request.url.path, (404, {}))
+    return httpx.Response(status, json=data)
+
+def make_library(tmp_path):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncLibrary(Library(str(tmp_path / "test_library.db")), http=http)
+
+def test_async_add_and_find(tmp_path):
+    async def scenario():
+        alibrary = make_library(tmp_path)
+        assert (await alibrary.add_book("111")).title == "Book One"
+        assert (await alibrary.add_book("222")).title == "Book Two"
+        assert await alibrary.add_book("404") is None
+        assert await alibrary.add_book("111") is None
+        book = await alibrary.find_book("111")
+        assert (book.title, book.author) == ("Book One", "Author One")
+        assert (await alibrary.find_book("222")).author == "Fallback Author"
+        assert [b.isbn for b in await alibrary.list_books(limit=1)] == ["111"]
+        assert (await alibrary.update_book("111", title="New Title")).title == "New Title"
+        assert (await alibrary.remove_book("222")).isbn == "222"
+        assert await alibrary.remove_book("222") is None
+        assert [b.title for b in await alibrary.list_books()] == ["New Title"]
+        await alibrary.aclose()
+    asyncio.run(scenario())
+
+def test_async_add_books(tmp_path):
+    async def scenario():
+        alibrary = make_library(tmp_path)
+        report = await alibrary.add_books(["111", "222", "404", "111"], concurrency=2)
+        assert [(item["isbn"], item["status"]) for item in report] == [
+            ("111", "added"), ("222", "added"), ("404", "not_found")
+        ]
+        report = await alibrary.add_books(["111"])
+        assert report[0]["status"] == "exists"
+        await alibrary.aclose()
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+import asyncio
+import httpx
+import pytest
+from benchmarks.bench_library import compare, percentile, run_benchmarks
+from benchmarks.fake_openlibrary import FakeOpenLibrary
+from benchmarks.loadtest import parse_mix, run_load_test
+from metrics import REGISTRY
+
+def test_fake_openlibrary_serves_book_and_author():
+    fake = FakeOpenLibrary()
+    with fake.client() as http:
+        book = http.get("https://openlibrary.org/isbn/9780000000002.json")
+        assert book.status_code == 200
+        author = http.get("https://openlibrary.org" + book.json()["authors"][0]["key"] + ".json")
+        assert author.status_code == 200
+        assert author.json()["name"]
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0
+
+def test_run_benchmarks_smoke(tmp_path):
+    remote_authors = REGISTRY.value("library_author_lookups_total", source="remote")
+    report = run_benchmarks(sizes=[50], iterations=5, latency=0, workdir=str(tmp_path))
+    # Lookups go through the client Library wires up, which checks for known authors
+    assert REGISTRY.value("library_author_lookups_total", source="remote") > remote_authors
+    operations = {r["operation"] for r in report["results"]}
+    assert {"find_book", "list_books", "add_book", "update_book", "remove_book", "search"} <= operations
+    for result in report["results"]:
+        assert result["size"] == 50
+        assert result["p50_ms"] <= result["p99_ms"]
+
+def test_compare_flags_regressions():
+    baseline = {"results": [{"operation": "find_book", "size": 10, "p50_ms": 1.0}]}
+    slower = {"results": [{"operation": "find_book", "size": 10, "p50_ms": 1.5}]}
+    same = {"results": [{"operation": "find_book", "size": 10, "p50_ms": 1.1}]}
+    assert len(compare(slower, baseline, threshold=20)) == 1
+    assert compare(same, baseline, threshold=20) == []
+
+def test_parse_mix():
+    assert parse_mix("get=80, post=10,put=10") == {"get": 80, "post": 10, "put": 10}
+    with pytest.raises(ValueError):
+        parse_mix("delete=5")
+    with pytest.raises(ValueError):
+        parse_mix("get=0")
+
+def test_fake_openlibrary_asgi_app():
+    fake = FakeOpenLibrary(error_rate=1.0)
+    transport = httpx.ASGITransport(app=fake.asgi_app)
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake") as http:
+            return await http.get("/isbn/9780000000002.json")
+
+    assert asyncio.run(fetch()).status_code == 503
+
+def test_load_test_inprocess_smoke(tmp_path):
+    import api
+    before = api.library
+    report = run_load_test(books=20, concurrency_levels=[2], duration=0.3, latency=0, workdir=str(tmp_path))
+    assert api.library is before  # the app's own library is restored
+    operations = {r["operation"]: r for r in report["results"]}
+    assert set(operations) <= {"get", "post", "put"}
+    assert operations["get"]["errors"] == 0
+    assert all(r["concurrency"] == 2 for r in report["results"])
@@ -10,3 +10,14 @@ def test_book_creation():
 def test_book_str():
     book = Book("Ulysses", "James Joyce", "978-0199535675")
     assert str(book) == "Ulysses by James Joyce (ISBN: 978-0199535675)"
+
+def test_canonical_isbn():
+    from book import canonical_isbn
+    assert canonical_isbn("978-0439023528") == "9780439023528"
+    assert canonical_isbn("0-439-02352-1") == "9780439023528"
+    assert canonical_isbn("0 8044 2957 x") == "9780804429573"
+    assert canonical_isbn("not-an-isbn") == "NOTANISBN"
+
+def test_book_has_no_instance_dict():
+    book = Book("Ulysses", "James Joyce", "978-0199535675")
+    assert not hasattr(book, "__dict__")
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+from cache import ResponseCache
+from library import Library
+
+class MockResponse:
+    def __init__(self, status_code, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+    def json(self):
+        return self._json
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception("HTTP error")
+
+def test_cache_hit_and_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    assert cache.get("https://example.org/a") is None
+    cache.put("https://example.org/a", MockResponse(200, {"title": "Ulysses"}))
+    cached = cache.get("https://example.org/a")
+    assert cached.status_code == 200
+    assert cached.json() == {"title": "Ulysses"}
+
+def test_cache_skips_server_errors(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    cache.put("https://example.org/a", MockResponse(503))
+    assert cache.get("https://example.org/a") is None
+
+def test_cache_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=10, negative_ttl=5)
+    with patch("cache.time.time", return_value=1000):
+        cache.put("https://example.org/a", MockResponse(200, {"title": "Ulysses"}))
+        cache.put("https://example.org/missing", MockResponse(404))
+    with patch("cache.time.time", return_value=1006):
+        assert cache.get("https://example.org/a") is not None
+        assert cache.get("https://example.org/missing") is None
+    with patch("cache.time.time", return_value=1011):
+        assert cache.get("https://example.org/a") is None
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_entries=2)
+    with patch("cache.time.time", return_value=1000):
+        cache.put("https://example.org/a", MockResponse(200, {"n": 1}))
+    with patch("cache.time.time", return_value=1001):
+        cache.put("https://example.org/b", MockResponse(200, {"n": 2}))
+    with patch("cache.time.time", return_value=1000 + cache.ttl / 2):
+        cache.get("https://example.org/a")  # 'a' is now more recent than 'b'
+    with patch("cache.time.time", return_value=1001 + cache.ttl / 2):
+        cache.put("https://example.org/c", MockResponse(200, {"n": 3}))
+        assert cache.get("https://example.org/a") is not None
+        assert cache.get("https://example.org/b") is None
+        assert cache.get("https://example.org/c") is not None
+
+def test_cache_hits_write_last_used_rarely(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=1000, max_entries=2)
+    with patch("cache.time.time", return_value=1000):
+        cache.put("https://example.org/a", MockResponse(200, {"n": 1}))
+    writes = cache._conn.total_changes
+    with patch("cache.time.time", return_value=1005):
+        assert cache.get("https://example.org/a") is not None
+    assert cache._conn.total_changes == writes  # Used too recently to be recorded again
+    with patch("cache.time.time", return_value=1020):
+        assert cache.get("https://example.org/a") is not None
+    assert cache._conn.total_changes == writes + 1
+    cache.close()
+    # The row count survives a restart and bounds the cache as before
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=1000, max_entries=2)
+    with patch("cache.time.time", return_value=1030):
+        cache.put("https://example.org/a", MockResponse(200, {"n": 2}))
+        cache.put("https://example.org/b", MockResponse(200, {"n": 3}))
+        cache.put("https://example.org/c", MockResponse(200, {"n": 4}))
+    assert cache._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0] == 2
+
+@patch("httpx.Client.get")
+def test_library_reuses_cached_responses(mock_get, tmp_path):
+    mock_get.side_effect = [
+        MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
+        MockResponse(200, {"name": "James Joyce"}),
+        MockResponse(404),
+    ]
+    library = Library(str(tmp_path / "test_library.db"), response_cache=ResponseCache(str(tmp_path / "cache.db")))
+    assert library.add_book("978-0199535675") is True
+    library.remove_book("978-0199535675")
+    assert library.add_book("978-0199535675") is True
+    assert library.add_book("0000000000000") is False
+    assert library.add_book("0000000000000") is False  # 404 answered from the cache
+    assert mock_get.call_count == 3
+    assert library.find_book("978-0199535675").author == "James Joyce"
+
+def test_lru_cache_evicts_and_counts():
+    from cache import MISSING, LRUCache
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", None)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    cache.put("c", 3)  # evicts 'a', the least recently used
+    assert cache.get("a") is MISSING
+    cache.invalidate("c")
+    assert cache.get("c") is MISSING
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 1)
@@ -0,0 +1,144 @@
+import pytest
+from book import Book
+from enrichment import EnrichmentQueue
+from library import PENDING_TITLE, Library
+from openlibrary import MetadataError
+
+class ScriptedClient:
+    """Answers fetch_book from a per-ISBN list of results; exceptions are raised."""
+    def __init__(self, script):
+        self.script = script
+        self.calls = []
+    def fetch_book(self, isbn):
+        self.calls.append(isbn)
+        result = self.script[isbn].pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+@pytest.fixture
+def library(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    yield library
+    library.close()
+
+def test_add_book_is_stored_pending_then_enriched(library):
+    isbn = "9780199535675"
+    client = ScriptedClient({isbn: [Book("Ulysses", "James Joyce", isbn)]})
+    queue = EnrichmentQueue(library, workers=1, client=client)
+    job = queue.add_book(isbn)
+    assert job["status"] == "pending"
+    assert queue.wait(5)
+    queue.stop()
+    assert library.find_book(isbn).title == "Ulysses"
+    assert library.find_book(isbn).author == "James Joyce"
+    assert library.enrichment_job(isbn)["status"] == "done"
+
+def test_add_book_rejects_duplicates(library):
+    queue = EnrichmentQueue(library, client=ScriptedClient({}))
+    library.add_pending_book("9780199535675")
+    assert queue.add_book("978-0-19-953567-5") is None
+
+def test_transient_failures_are_retried_with_backoff(library):
+    isbn = "9780199535675"
+    client = ScriptedClient({isbn: [
+        MetadataError("connection_error", "down"),
+        Book("Ulysses", "Unknown", isbn),
+        Book("Ulysses", "James Joyce", isbn),
+    ]})
+    queue = EnrichmentQueue(library, workers=1, base_delay=0.01, client=client)
+    queue.add_book(isbn)
+    assert queue.wait(5)
+    queue.stop()
+    job = library.enrichment_job(isbn)
+    assert job["status"] == "done"
+    assert job["attempts"] == 3
+    assert library.find_book(isbn).author == "James Joyce"
+
+def test_gives_up_after_max_attempts(library):
+    isbn = "9780199535675"
+    client = ScriptedClient({isbn: [MetadataError("connection_error", "down")] * 2})
+    queue = EnrichmentQueue(library, workers=1, max_attempts=2, base_delay=0.01, client=client)
+    queue.add_book(isbn)
+    assert queue.wait(5)
+    queue.stop()
+    job = library.enrichment_job(isbn)
+    assert job["status"] == "failed"
+    assert job["last_error"] == "down"
+    assert library.find_book(isbn).title == PENDING_TITLE
+
+def test_unknown_isbn_removes_placeholder(library):
+    isbn = "9780000000002"
+    client = ScriptedClient({isbn: [MetadataError("not_found", "Kitap bulunamadı.")]})
+    queue = EnrichmentQueue(library, workers=1, client=client)
+    queue.add_book(isbn)
+    assert queue.wait(5)
+    queue.stop()
+    assert library.enrichment_job(isbn)["status"] == "failed"
+    assert library.find_book(isbn) is None
+    assert len(client.calls) == 1
+
+def test_backfill_resolves_unknown_authors(library):
+    library._insert_books([
+        Book("Ulysses", "Unknown", "9780199535675"),
+        Book("Dubliners", "James Joyce", "9780141182452"),
+    ])
+    library.update_book("9780199535675", title="Ulysses (edited)")
+    client = ScriptedClient({"9780199535675": [Book("Ulysses", "James Joyce", "9780199535675")]})
+    queue = EnrichmentQueue(library, workers=2, client=client)
+    assert queue.backfill() == ["9780199535675"]
+    assert queue.wait(5)
+    queue.stop()
+    book = library.find_book("9780199535675")
+    assert book.author == "James Joyce"
+    assert book.title == "Ulysses (edited)"  # A title set by hand is kept
+
+def test_pending_jobs_resume_after_restart(library):
+    isbn = "9780199535675"
+    library.add_pending_book(isbn)  # Stored, but no queue was running
+    client = ScriptedClient({isbn: [Book("Ulysses", "James Joyce", isbn)]})
+    queue = EnrichmentQueue(library, workers=1, client=client)
+    queue.start()
+    assert queue.wait(5)
+    queue.stop()
+    assert library.find_book(isbn).title == "Ulysses"
+
+def test_author_set_by_hand_while_pending_is_kept(library):
+    isbn = "9780199535675"
+    library.add_pending_book(isbn)
+    library.update_book(isbn, author="J. Joyce")
+    client = ScriptedClient({isbn: [Book("Ulysses", "James Joyce", isbn)]})
+    queue = EnrichmentQueue(library, workers=1, client=client)
+    queue.start()
+    assert queue.wait(5)
+    queue.stop()
+    book = library.find_book(isbn)
+    assert (book.title, book.author) == ("Ulysses", "J. Joyce")
+    assert library.enrichment_job(isbn)["status"] == "done"
+
+def test_edits_made_during_the_lookup_are_kept(library):
+    isbn = "9780199535675"
+    class EditingClient:
+        def fetch_book(self, isbn):
+            library.update_book(isbn, title="My Title", author="J. Joyce")
+            return Book("Ulysses", "James Joyce", isbn)
+    queue = EnrichmentQueue(library, workers=1, client=EditingClient())
+    queue.add_book(isbn)
+    assert queue.wait(5)
+    queue.stop()
+    book = library.find_book(isbn)
+    assert (book.title, book.author) == ("My Title", "J. Joyce")
+    assert library.enrichment_job(isbn)["status"] == "done"
+
+def test_real_book_titled_like_the_placeholder_is_left_alone(library):
+    library._insert_books([Book(PENDING_TITLE, "Unknown", "9780000000002")])
+    assert library.unenriched_isbns() == ["9780000000002"]  # For its unknown author
+    library.update_book("9780000000002", author="Someone")
+    assert library.unenriched_isbns() == []
+    library.update_book("9780000000002", author="Unknown")
+    client = ScriptedClient({"9780000000002": [MetadataError("not_found", "Kitap bulunamadı.")]})
+    queue = EnrichmentQueue(library, workers=1, client=client)
+    queue.backfill()
+    assert queue.wait(5)
+    queue.stop()
+    assert library.find_book("9780000000002").title == PENDING_TITLE
@@ -6,6 +6,7 @@ from library import Library
 import pytest
 from unittest.mock import patch
 from library import Library
+from book import Book
 
 class MockResponse:
     def __init__(self, status_code, json_data=None):
@@ -17,7 +18,7 @@ class MockResponse:
         if self.status_code >= 400:
             raise Exception("HTTP error")
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_add_and_list_books(mock_get, tmp_path):
     mock_get.side_effect = [
         MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
@@ -33,7 +34,7 @@ def test_add_and_list_books(mock_get, tmp_path):
     assert books[0].title == "Ulysses"
     assert books[0].author == "James Joyce"
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_remove_book(mock_get, tmp_path):
     mock_get.side_effect = [
         MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
@@ -45,7 +46,7 @@ def test_remove_book(mock_get, tmp_path):
     library.remove_book("978-0199535675")
     assert len(library.list_books()) == 0
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_find_book(mock_get, tmp_path):
     mock_get.side_effect = [
         MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
@@ -58,7 +59,7 @@ def test_find_book(mock_get, tmp_path):
     assert found is not None
     assert found.title == "Ulysses"
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_persistence(mock_get, tmp_path):
     mock_get.side_effect = [
         MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
@@ -83,3 +84,305 @@ def test_corrupted_database(tmp_path):
     import pytest
     with pytest.raises(sqlite3.DatabaseError):
         library = Library(str(test_file))
+
+def test_connection_pool_pragmas(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    conn = library._get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -20000
+    library.close()
+
+def test_connection_reused_per_thread(tmp_path):
+    import threading
+    library = Library(str(tmp_path / "test_library.db"))
+    conn = library._get_connection()
+    assert library._get_connection() is conn
+    other = []
+    thread = threading.Thread(target=lambda: other.append(library._get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    library.close()
+
+def test_close_and_reopen(tmp_path):
+    test_file = tmp_path / "test_library.db"
+    with Library(str(test_file)) as library:
+        conn = library._get_connection()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    # The pool reopens lazily after close()
+    assert library.list_books() == []
+    library.close()
+
+def _add_book(library, title, author, isbn):
+    with patch("httpx.Client.get") as mock_get:
+        mock_get.side_effect = [
+            MockResponse(200, {"title": title, "authors": [{"key": "/authors/" + author.replace(" ", "")}]}),
+            MockResponse(200, {"name": author})
+        ]
+        assert library.add_book(isbn) is True
+
+def test_search_books(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    _add_book(library, "Ulysses", "James Joyce", "978-0199535675")
+    _add_book(library, "Dubliners", "James Joyce", "9780141182452")
+    _add_book(library, "The Hunger Games", "Suzanne Collins", "978-0439023528")
+    assert {book.isbn for book in library.search("joyce")} == {"978-0199535675", "9780141182452"}
+    assert [book.title for book in library.search("hung")] == ["The Hunger Games"]
+    assert [book.title for book in library.search("978-0439023528")] == ["The Hunger Games"]
+    assert [book.title for book in library.search('james "dub')] == ["Dubliners"]
+    assert len(library.search("joyce", limit=1)) == 1
+    assert len(library.search("joyce", limit=1, offset=1)) == 1
+    assert library.search("   ") == []
+
+def test_search_index_follows_updates_and_deletes(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    _add_book(library, "Ulysses", "James Joyce", "978-0199535675")
+    library.update_book("978-0199535675", title="Finnegans Wake")
+    assert library.search("ulysses") == []
+    assert [book.title for book in library.search("finnegans")] == ["Finnegans Wake"]
+    library.remove_book("978-0199535675")
+    assert library.search("finnegans") == []
+
+def test_search_index_backfills_existing_rows(tmp_path):
+    test_file = tmp_path / "test_library.db"
+    conn = sqlite3.connect(str(test_file))
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, author TEXT NOT NULL, isbn TEXT UNIQUE NOT NULL)")
+    conn.execute("INSERT INTO books (title, author, isbn) VALUES ('Ulysses', 'James Joyce', '978-0199535675')")
+    conn.commit()
+    conn.close()
+    library = Library(str(test_file))
+    assert [book.isbn for book in library.search("ulysses")] == ["978-0199535675"]
+
+def test_iter_books_in_batches(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    _add_book(library, "C", "Author", "3")
+    _add_book(library, "A", "Author", "1")
+    _add_book(library, "B", "Author", "2")
+    assert [book.isbn for book in library.iter_books(batch_size=2)] == ["1", "2", "3"]
+    assert [book.isbn for book in library.iter_books(after_isbn="1", batch_size=1)] == ["2", "3"]
+    assert list(library.iter_books(after_isbn="3")) == []
+
+def test_book_cache_hits_and_invalidation(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"), book_cache_size=10)
+    assert library.find_book("978-0199535675") is None
+    assert library.find_book("978-0199535675") is None  # cached miss
+    _add_book(library, "Ulysses", "James Joyce", "978-0199535675")
+    assert library.find_book("978-0199535675").title == "Ulysses"
+    assert library.find_book("978-0199535675").title == "Ulysses"
+    stats = library.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (3, 2)  # add_book's duplicate check is a hit too
+
+    assert len(library.list_books()) == 1
+    assert len(library.list_books()) == 1
+    library.update_book("978-0199535675", title="Finnegans Wake")
+    assert library.find_book("978-0199535675").title == "Finnegans Wake"
+    assert library.list_books()[0].title == "Finnegans Wake"
+    library.remove_book("978-0199535675")
+    assert library.find_book("978-0199535675") is None
+    assert library.list_books() == []
+    stats = library.cache_stats()
+    assert (stats["list_hits"], stats["list_misses"]) == (1, 3)
+
+def test_book_cache_disabled_by_default(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    library.find_book("978-0199535675")
+    assert library.cache_stats()["misses"] == 0
+
+def test_iter_books_json(tmp_path):
+    import json
+    library = Library(str(tmp_path / "test_library.db"))
+    _add_book(library, 'Say "Hi"', "Author", "2")
+    _add_book(library, "A", "Author", "1")
+    rows = list(library.iter_books_json(batch_size=1))
+    assert [isbn for isbn, _ in rows] == ["1", "2"]
+    assert json.loads(rows[1][1]) == {"title": 'Say "Hi"', "author": "Author", "isbn": "2"}
+
+def test_data_version_bumped_by_writes(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    version, _ = library.data_version()
+    _add_book(library, "Ulysses", "James Joyce", "978-0199535675")
+    assert library.data_version()[0] > version
+    version = library.data_version()[0]
+    library.update_book("978-0199535675", title="Finnegans Wake")
+    assert library.data_version()[0] > version
+    version = library.data_version()[0]
+    library.remove_book("978-0199535675")
+    assert library.data_version()[0] > version
+    version = library.data_version()[0]
+    library.find_book("978-0199535675")
+    assert library.data_version()[0] == version
+
+def test_change_log(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    assert library.last_change_seq() == 0
+    _add_book(library, "Ulysses", "James Joyce", "978-0199535675")
+    library.update_book("978-0199535675", title="Finnegans Wake")
+    library.remove_book("978-0199535675")
+    changes = library.changes()
+    assert [(c["op"], c["title"]) for c in changes] == [
+        ("insert", "Ulysses"), ("update", "Finnegans Wake"), ("delete", "Finnegans Wake")
+    ]
+    assert library.last_change_seq() == changes[-1]["seq"]
+    assert library.changes(since=changes[0]["seq"], limit=1) == [changes[1]]
+
+def _books_with_titles(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    library._insert_books([
+        Book("Ulysses", "James Joyce", "9780199535675"),
+        Book("Dubliners", "James Joyce", "9780141182452"),
+        Book("dune", "Frank Herbert", "9780441172719"),
+        Book("Dune Messiah", "Frank Herbert", "9780441172696"),
+        Book("Duo", "Someone", "9780000000019"),
+        Book("Zen", "Someone", "9780000000026"),
+    ])
+    return library
+
+def test_find_by_author_ignores_case(tmp_path):
+    library = _books_with_titles(tmp_path)
+    books = library.find_by_author("JAMES joyce")
+    assert [book.isbn for book in books] == ["9780141182452", "9780199535675"]
+    assert library.find_by_author("James") == []
+    library.close()
+
+def test_find_by_title_prefix(tmp_path):
+    library = _books_with_titles(tmp_path)
+    assert {book.title for book in library.find_by_title_prefix("DUNE")} == {"dune", "Dune Messiah"}
+    assert {book.title for book in library.find_by_title_prefix("du")} == {"dune", "Dune Messiah", "Duo", "Dubliners"}
+    assert [book.title for book in library.find_by_title_prefix("Z")] == ["Zen"]
+    assert library.find_books(author="frank herbert", title_prefix="dune m")[0].title == "Dune Messiah"
+    library.close()
+
+def test_find_by_title_prefix_at_highest_code_points(tmp_path):
+    library = _books_with_titles(tmp_path)
+    library._insert_books([
+        Book("\U0010ffff", "Someone", "9780000000033"),
+        Book("z\U0010ffff\U0010ffffz", "Someone", "9780000000040"),
+        Book("\ud7ff", "Someone", "9780000000057"),
+        Book("\ue000", "Someone", "9780000000064"),
+    ])
+    assert [book.title for book in library.find_by_title_prefix("\U0010ffff")] == ["\U0010ffff"]
+    assert [book.title for book in library.find_by_title_prefix("Z\U0010ffff")] == ["z\U0010ffff\U0010ffffz"]
+    assert [book.title for book in library.find_by_title_prefix("\ud7ff")] == ["\ud7ff"]
+    library.close()
+
+def test_filter_queries_use_indexes(tmp_path):
+    library = _books_with_titles(tmp_path)
+    conn = library._get_connection()
+    for kwargs, index in (
+        ({"author": "James Joyce"}, "authors_name_nocase"),
+        ({"author": "James Joyce", "after_isbn": "9780141182452", "limit": 10}, "authors_name_nocase"),
+        ({"title_prefix": "Du", "limit": 10}, "books_title_nocase"),
+    ):
+        sql, params = library._filter_query(**kwargs)
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert f"INDEX {index}" in plan
+        assert "SCAN" not in plan
+    library.close()
+
+@patch("httpx.Client.get")
+def test_known_author_not_fetched_again(mock_get, tmp_path):
+    mock_get.side_effect = [
+        MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
+        MockResponse(200, {"name": "James Joyce"}),
+        MockResponse(200, {"title": "Dubliners", "authors": [{"key": "/authors/OL12345A"}]}),
+    ]
+    library = Library(str(tmp_path / "test_library.db"))
+    assert library.add_book("978-0199535675") is True
+    assert library.add_book("978-0141182452") is True
+    assert mock_get.call_count == 3
+    assert library.find_book("978-0141182452").author == "James Joyce"
+    assert library.author_names(["/authors/OL12345A", "/authors/OL1A"]) == {"/authors/OL12345A": "James Joyce"}
+    library.close()
+
+def test_find_by_author_matches_one_of_several(tmp_path):
+    library = Library(str(tmp_path / "library.db"))
+    library._insert_books([
+        Book("Good Omens", "Terry Pratchett, Neil Gaiman", "9780060853983",
+             [("/authors/OL1A", "Terry Pratchett"), ("/authors/OL2A", "Neil Gaiman")]),
+        Book("Coraline", "Neil Gaiman", "9780380807345", [("/authors/OL2A", "Neil Gaiman")]),
+    ])
+    assert [book.title for book in library.find_by_author("neil gaiman")] == ["Good Omens", "Coraline"]
+    assert [book.title for book in library.find_by_author("Terry Pratchett")] == ["Good Omens"]
+    conn = library._get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0] == 2
+
+    library.update_book("9780380807345", author="Dave McKean")
+    assert library.find_by_author("Neil Gaiman")[0].title == "Good Omens"
+    library.remove_book("9780060853983")
+    assert library.find_by_author("Neil Gaiman") == []
+    assert conn.execute("SELECT COUNT(*) FROM book_authors").fetchone()[0] == 1
+    library.close()
+
+def test_authors_migrated_from_author_strings(tmp_path):
+    db = str(tmp_path / "library.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, author TEXT NOT NULL, isbn TEXT UNIQUE NOT NULL)")
+    conn.execute("INSERT INTO books (title, author, isbn) VALUES ('Good Omens', 'Terry Pratchett, Neil Gaiman', '9780060853983')")
+    conn.execute("INSERT INTO books (title, author, isbn) VALUES ('Mystery', 'Unknown', '9780000000019')")
+    conn.commit()
+    conn.close()
+    library = Library(db)
+    assert [book.title for book in library.find_by_author("Neil Gaiman")] == ["Good Omens"]
+    assert library.find_by_author("Unknown") == []
+    library.close()
+
+def test_export_and_import_json_round_trip(tmp_path):
+    library = _books_with_titles(tmp_path)
+    path = str(tmp_path / "library.json")
+    assert library.export_json(path) == 6
+    copy = Library(str(tmp_path / "copy.db"))
+    assert copy.import_json(path) == {"added": 6, "updated": 0, "unchanged": 0, "skipped": 0}
+    assert [(b.title, b.author, b.isbn) for b in copy.iter_books()] == [(b.title, b.author, b.isbn) for b in library.iter_books()]
+    assert [book.title for book in copy.find_by_author("james joyce")] == ["Dubliners", "Ulysses"]
+    assert {book.isbn for book in copy.search("dune")} == {"9780441172719", "9780441172696"}
+    assert copy.data_version()[0] == 6
+    assert [change["op"] for change in copy.changes()] == ["insert"] * 6
+    # The per-row triggers are back after the bulk insert
+    copy._insert_book(Book("Emma", "Jane Austen", "9780141439587"))
+    assert copy.search("emma")[0].title == "Emma"
+    assert copy.data_version()[0] == 7
+    library.close()
+    copy.close()
+
+def test_import_json_upserts_by_isbn(tmp_path):
+    library = _books_with_titles(tmp_path)
+    path = tmp_path / "changes.ndjson"
+    path.write_text(
+        '{"title": "Ulysses", "author": "J. Joyce", "isbn": "0-19-953567-4"}\n'
+        '{"title": "Dune", "author": "Frank Herbert", "isbn": "9780441172719"}\n'
+        '{"title": "Zen", "author": "Someone", "isbn": "9780000000026"}\n'
+        '{"title": "New", "isbn": "9780000000033"}\n'
+        '{"author": "No Title", "isbn": "9780000000040"}\n'
+        '"not a book"\n',
+        encoding="utf-8"
+    )
+    assert library.import_json(str(path), batch_size=2) == {"added": 1, "updated": 2, "unchanged": 1, "skipped": 2}
+    assert library.find_book("9780199535675").author == "J. Joyce"
+    assert library.find_book("9780441172719").title == "Dune"
+    assert library.find_book("9780000000033").author == "Unknown"
+    assert [book.title for book in library.find_by_author("James Joyce")] == ["Dubliners"]
+    assert [book.title for book in library.find_by_author("j. joyce")] == ["Ulysses"]
+    library.close()
+
+def test_import_json_reads_records_across_chunks(tmp_path):
+    import io
+    from library import _iter_json_records
+    text = '[\n  {"title": "A \\"quoted\\" [title]", "isbn": "1"},\n  {"title": "B", "isbn": "2"}\n]\n'
+    assert [r["title"] for r in _iter_json_records(io.StringIO(text), chunk_size=3)] == ['A "quoted" [title]', "B"]
+    with pytest.raises(ValueError):
+        list(_iter_json_records(io.StringIO('[{"title": "A"'), chunk_size=4))
+
+def test_import_json_fails_fast_on_a_malformed_record():
+    import io
+    from library import _iter_json_records
+    records = ",".join('{"title": "Book %d", "isbn": "%d"}' % (n, n) for n in range(10000))
+    f = io.StringIO('[{"title": "A", "isbn": x1}, ' + records + "]")
+    with pytest.raises(ValueError):
+        list(_iter_json_records(f, chunk_size=64))
+    assert f.tell() <= 128
+    # Records cut inside a token at a chunk boundary still decode
+    text = '[{"a": true, "b": -1.5e+10, "c": "\\u00e9", "d": null}]'
+    assert list(_iter_json_records(io.StringIO(text), chunk_size=1)) == [{"a": True, "b": -1.5e10, "c": "\u00e9", "d": None}]
@@ -12,7 +12,7 @@ class MockResponse:
         if self.status_code >= 400:
             raise Exception("HTTP error")
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_add_book_success(mock_get, tmp_path):
     # Mock book data
     mock_get.side_effect = [
@@ -28,7 +28,7 @@ def test_add_book_success(mock_get, tmp_path):
     assert books[0].title == "Test Book"
     assert books[0].author == "Test Author"
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_add_book_invalid_isbn(mock_get, tmp_path):
     mock_get.return_value = MockResponse(404)
     test_file = tmp_path / "test_library.db"
@@ -38,7 +38,7 @@ def test_add_book_invalid_isbn(mock_get, tmp_path):
     books = library.list_books()
     assert len(books) == 0
 
-@patch("httpx.get")
+@patch("httpx.Client.get")
 def test_add_book_connection_error(mock_get, tmp_path):
     import pytest
     mock_get.side_effect = Exception("Connection error")
@@ -46,3 +46,47 @@ def test_add_book_connection_error(mock_get, tmp_path):
     library = Library(str(test_file))
     with pytest.raises(Exception):
         library.add_book("9781234567897")
+
+def test_add_books_bulk(tmp_path):
+    responses = {
+        "https://openlibrary.org/isbn/111.json": MockResponse(200, {"title": "Book One", "authors": [{"key": "/authors/OL1A"}]}),
+        "https://openlibrary.org/authors/OL1A.json": MockResponse(200, {"name": "Author One"}),
+        "https://openlibrary.org/isbn/222.json": MockResponse(200, {"title": "Book Two", "authors": [{"key": "/authors/OL2A"}]}),
+        "https://openlibrary.org/authors/OL2A.json": MockResponse(200, {"name": "Author Two"}),
+        "https://openlibrary.org/isbn/404.json": MockResponse(404),
+    }
+    library = Library(str(tmp_path / "test_library.db"))
+    with patch("httpx.Client.get", side_effect=lambda url, **kwargs: responses[url]) as mock_get:
+        report = library.add_books(["111", "222", "404", "111", " "], concurrency=2)
+        assert [item["isbn"] for item in report] == ["111", "222", "404"]
+        assert [item["status"] for item in report] == ["added", "added", "not_found"]
+        assert report[0]["book"].author == "Author One"
+        assert {book.title for book in library.list_books()} == {"Book One", "Book Two"}
+
+        # Books already in the library are reported without fetching them again
+        mock_get.reset_mock()
+        report = library.add_books(["111"])
+        assert report == [{"isbn": "111", "status": "exists", "book": None}]
+        mock_get.assert_not_called()
+
+@patch("httpx.Client.get")
+def test_add_book_duplicate_skips_network(mock_get, tmp_path):
+    mock_get.side_effect = [
+        MockResponse(200, {"title": "The Hunger Games", "authors": [{"key": "/authors/OL1A"}]}),
+        MockResponse(200, {"name": "Suzanne Collins"})
+    ]
+    library = Library(str(tmp_path / "test_library.db"))
+    assert library.add_book("978-0439023528") is True
+    assert library.add_book("9780439023528") is False
+    assert library.add_book("0439023521") is False
+    assert mock_get.call_count == 2
+    assert library.find_book("0-439-02352-1").isbn == "978-0439023528"
+    assert library.update_book("9780439023528", author="S. Collins").author == "S. Collins"
+    assert library.remove_book("0439023521").isbn == "978-0439023528"
+    assert library.list_books() == []
+
+def test_update_and_remove_return_rows(tmp_path):
+    library = Library(str(tmp_path / "test_library.db"))
+    assert library.update_book("9781234567897", title="Missing") is None
+    assert library.remove_book("9781234567897") is None
+    assert library.update_book("9781234567897") is None
@@ -0,0 +1,73 @@
+import asyncio
+import pstats
+from unittest.mock import patch
+from library import Library
+from metrics import Metrics, RequestProfile, profiled
+
+class MockResponse:
+    def __init__(self, status_code, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+    def json(self):
+        return self._json
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception("HTTP error")
+
+def test_counter_and_gauge_rendering():
+    metrics = Metrics()
+    metrics.inc("requests_total", route="/books")
+    metrics.inc("requests_total", 2, route="/books")
+    metrics.set("queue_size", 7)
+    text = metrics.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/books"} 3' in text
+    assert "queue_size 7" in text
+    assert metrics.value("requests_total", route="/books") == 3
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        metrics.observe("op_seconds", seconds, op="find")
+    text = metrics.render()
+    assert 'op_seconds_bucket{op="find",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="find",le="1.0"} 2' in text
+    assert 'op_seconds_bucket{op="find",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="find"} 3' in text
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.inc("x_total", path='a"b\\c')
+    assert 'x_total{path="a\\"b\\\\c"} 1' in metrics.render()
+
+@patch("httpx.Client.get")
+def test_library_records_http_and_db_timings(mock_get, tmp_path):
+    mock_get.side_effect = [
+        MockResponse(200, {"title": "Ulysses", "authors": [{"key": "/authors/OL12345A"}]}),
+        MockResponse(200, {"name": "James Joyce"}),
+    ]
+    metrics = Metrics()
+    library = Library(str(tmp_path / "library.db"), book_cache_size=10, metrics=metrics)
+    library.add_book("978-0199535675")
+    library.find_book("978-0199535675")  # Read from the database and cached
+    library.find_book("978-0199535675")
+    assert metrics.value("library_openlibrary_request_seconds", endpoint="isbn", status="200") == 1
+    assert metrics.value("library_openlibrary_request_seconds", endpoint="authors", status="200") == 1
+    assert metrics.value("library_db_seconds", operation="insert_book") == 1
+    assert metrics.value("library_book_cache_total", cache="isbn", result="hit") == 1
+    library.close()
+
+def test_request_profile_includes_worker_calls(tmp_path):
+    def work():
+        return sum(range(1000))
+
+    def worker_work():
+        return sum(range(10))
+
+    with RequestProfile() as profile:
+        assert profiled(work) == 499500
+        assert asyncio.run(asyncio.to_thread(profiled, worker_work)) == 45
+    path = tmp_path / "request.prof"
+    profile.dump(str(path))
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert {"work", "worker_work"} <= functions
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import httpx
+import pytest
+from metrics import Metrics
+from openlibrary import AsyncOpenLibraryClient, MetadataError, OpenLibraryClient
+from ratelimit import RateLimiter
+
+# Path -> (delay in seconds, status, JSON body)
+ROUTES = {
+    "/isbn/111.json": (0, 200, {"title": "Good Omens", "authors": [{"key": "/authors/OL1A"}, {"key": "/authors/OL2A"}]}),
+    "/authors/OL1A.json": (0.3, 200, {"name": "Terry Pratchett"}),
+    "/authors/OL2A.json": (0.3, 200, {"name": "Neil Gaiman"}),
+    "/isbn/222.json": (0, 200, {"title": "Slow Authors", "authors": [{"key": "/authors/OL9A"}]}),
+    "/authors/OL9A.json": (1.5, 200, {"name": "Too Slow"}),
+    "/api/books": (0, 200, {"ISBN:222": {"authors": [{"name": "Hedged Author"}]}}),
+}
+
+def sync_handler(request):
+    delay, status, data = ROUTES.get(request.url.path, (0, 404, {}))
+    time.sleep(delay)
+    return httpx.Response(status, json=data)
+
+async def async_handler(request):
+    delay, status, data = ROUTES.get(request.url.path, (0, 404, {}))
+    await asyncio.sleep(delay)
+    return httpx.Response(status, json=data)
+
+def sync_client(**kwargs):
+    return OpenLibraryClient(httpx.Client(transport=httpx.MockTransport(sync_handler)), **kwargs)
+
+def test_authors_resolved_in_parallel():
+    client = sync_client()
+    start = time.monotonic()
+    book = client.fetch_book("111")
+    assert book.author == "Terry Pratchett, Neil Gaiman"
+    assert time.monotonic() - start < 0.55  # two 0.3s lookups overlap
+
+def test_slow_authors_are_hedged_with_fallback():
+    client = sync_client(hedge_delay=0.05)
+    start = time.monotonic()
+    assert client.fetch_book("222").author == "Hedged Author"
+    assert time.monotonic() - start < 1
+
+def test_deadline_bounds_lookup():
+    ROUTES["/isbn/333.json"] = (0, 200, {"title": "No Authors", "authors": [{"key": "/authors/OL9A"}]})
+    ROUTES["/api/books"] = (1.5, 200, {})
+    try:
+        client = sync_client(deadline=0.3, hedge_delay=0.05)
+        start = time.monotonic()
+        assert client.fetch_book("333").author == "Unknown"
+        assert time.monotonic() - start < 1
+    finally:
+        ROUTES["/api/books"] = (0, 200, {"ISBN:222": {"authors": [{"name": "Hedged Author"}]}})
+        del ROUTES["/isbn/333.json"]
+
+def test_not_found():
+    with pytest.raises(MetadataError) as excinfo:
+        sync_client().fetch_book("404")
+    assert excinfo.value.status == "not_found"
+
+def test_async_client_parallel_and_hedged():
+    async def scenario():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(async_handler))
+        client = AsyncOpenLibraryClient(http, hedge_delay=0.05)
+        start = time.monotonic()
+        assert (await client.fetch_book("111")).author == "Terry Pratchett, Neil Gaiman"
+        assert (await client.fetch_book("222")).author == "Hedged Author"
+        assert time.monotonic() - start < 1
+        await client.aclose()
+    asyncio.run(scenario())
+
+def test_throttled_and_failed_responses_are_retried():
+    statuses = {"/isbn/444.json": [429, 503, 200]}
+    def handler(request):
+        status = statuses.get(request.url.path, [200]).pop(0)
+        if status == 429:
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        if status == 200 and request.url.path.startswith("/isbn/"):
+            return httpx.Response(200, json={"title": "Retried", "authors": []})
+        return httpx.Response(status, json={})
+    metrics = Metrics()
+    client = OpenLibraryClient(httpx.Client(transport=httpx.MockTransport(handler)), metrics=metrics, retry_backoff=0.01)
+    assert client.fetch_book("444").title == "Retried"
+    assert metrics.value("library_openlibrary_retries_total", endpoint="isbn", status="429") == 1
+    assert metrics.value("library_openlibrary_retries_total", endpoint="isbn", status="503") == 1
+
+def test_retries_give_up():
+    requests = []
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(500, json={})
+    client = OpenLibraryClient(httpx.Client(transport=httpx.MockTransport(handler)), max_retries=2, retry_backoff=0.01)
+    with pytest.raises(MetadataError) as excinfo:
+        client.fetch_book("555")
+    assert excinfo.value.status == "invalid_response"
+    assert len(requests) == 3
+
+def test_owned_client_is_pooled_and_reopened():
+    client = OpenLibraryClient(limiter=RateLimiter(max_concurrency=4))
+    http = client._client()
+    assert client._client() is http
+    client.close()
+    assert http.is_closed and client.http is None
+    assert client._client() is not http
+    client.close()
+
+def test_async_client_shares_limiter():
+    limiter = RateLimiter(max_concurrency=1)
+    in_flight = []
+    async def handler(request):
+        in_flight.append(request)
+        assert len(in_flight) == 1
+        await asyncio.sleep(0.01)
+        in_flight.remove(request)
+        return httpx.Response(200, json={"name": "Terry Pratchett"})
+    async def scenario():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client = AsyncOpenLibraryClient(http, limiter=limiter)
+        await asyncio.gather(*(client._get(f"https://openlibrary.org/authors/OL{n}A.json", 5) for n in range(5)))
+        await client.aclose()
+    asyncio.run(scenario())
+
+def test_long_retry_after_pause_is_capped_and_fails_fast():
+    def handler(request):
+        if request.url.path.startswith("/authors/"):
+            return httpx.Response(429, headers={"Retry-After": "30"})
+        return httpx.Response(200, json={"title": "Unrelated", "authors": []})
+    limiter = RateLimiter()
+    client = OpenLibraryClient(httpx.Client(transport=httpx.MockTransport(handler)), limiter=limiter, retry_backoff=0.5)
+    start = time.monotonic()
+    response = client._get("https://openlibrary.org/authors/OL1A.json", timeout=1)
+    assert response.status_code == 429
+    assert time.monotonic() - start < 0.5
+    # Paused for the longest backoff (0.5 * 2**3), not the 30 seconds asked for
+    paused = limiter.reserve(deadline=time.monotonic() + 10)
+    assert 3.5 < paused <= 4
+    # A lookup that cannot wait that long fails at once instead of stalling
+    limiter.pause(4)
+    client.deadline = 2.0
+    start = time.monotonic()
+    with pytest.raises(MetadataError) as excinfo:
+        client.fetch_book("666")
+    assert excinfo.value.status == "rate_limited"
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from ratelimit import RateLimiter, Throttled
+
+def test_bucket_allows_burst_then_paces():
+    limiter = RateLimiter(rate=10, burst=2)
+    delays = [limiter.reserve() for _ in range(4)]
+    assert delays[:2] == [0, 0]
+    assert 0.09 < delays[2] <= 0.1
+    assert 0.19 < delays[3] <= 0.2
+
+def test_unlimited_rate_never_waits():
+    limiter = RateLimiter()
+    assert [limiter.reserve() for _ in range(100)] == [0] * 100
+
+def test_pause_holds_back_every_request():
+    limiter = RateLimiter()
+    limiter.pause(0.2)
+    assert 0.1 < limiter.reserve() <= 0.2
+
+def test_slot_bounds_concurrency():
+    limiter = RateLimiter(max_concurrency=2)
+    lock = threading.Lock()
+    running = []
+    peak = []
+    def work():
+        with limiter.slot():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+
+def test_slot_gives_up_at_the_deadline_without_taking_a_token():
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.reserve()
+    start = time.monotonic()
+    with pytest.raises(Throttled):
+        with limiter.slot(deadline=time.monotonic() + 0.1):
+            pass
+    assert time.monotonic() - start < 0.05
+    assert 0.9 < limiter.reserve() <= 1
+
+def test_waiting_for_a_token_does_not_hold_a_slot():
+    limiter = RateLimiter(max_concurrency=1)
+    limiter.pause(0.2)
+    started = []
+    def paused_caller():
+        with limiter.slot():
+            started.append("paused")
+    thread = threading.Thread(target=paused_caller)
+    thread.start()
+    time.sleep(0.05)
+    # The paused caller sleeps before taking the only slot, so it is still free
+    assert limiter._semaphore.acquire(timeout=0)
+    limiter._semaphore.release()
+    thread.join()
+    assert started == ["paused"]
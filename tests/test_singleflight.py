@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from async_library import AsyncLibrary
+from library import Library
+from metrics import Metrics
+from openlibrary import OpenLibraryClient
+from singleflight import AsyncSingleFlight, SingleFlight
+
+class MockResponse:
+    def __init__(self, status_code, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+    def json(self):
+        return self._json
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception("HTTP error")
+
+class SlowHTTP:
+    """Answers ISBN and author requests after a delay and counts them by path."""
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = Counter()
+        self._lock = threading.Lock()
+    def _respond(self, url):
+        path = url.split("openlibrary.org", 1)[-1]
+        with self._lock:
+            self.calls[path] += 1
+        if path.startswith("/isbn/"):
+            return MockResponse(200, {"title": f"Book {path[6:-5]}", "authors": [{"key": "/authors/OL1A"}]})
+        return MockResponse(200, {"name": "James Joyce"})
+    def get(self, url, **kwargs):
+        time.sleep(self.delay)
+        return self._respond(url)
+
+class AsyncSlowHTTP(SlowHTTP):
+    async def get(self, url, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._respond(url)
+    async def aclose(self):
+        pass
+
+def _run_concurrently(func, args_list):
+    results = [None] * len(args_list)
+    def run(i, args):
+        results[i] = func(*args)
+    threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_single_flight_shares_result_and_errors():
+    metrics = Metrics()
+    flights = SingleFlight(metrics)
+    calls = []
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return value * 2
+    assert _run_concurrently(lambda: flights.do("double", 1, slow, 21), [()] * 5) == [42] * 5
+    assert calls == [21]
+    assert metrics.value("library_coalesced_total", operation="double") == 4
+    # Finished calls are not cached
+    assert flights.do("double", 1, slow, 1) == 2
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("boom")
+    errors = []
+    def call():
+        try:
+            flights.do("fail", 1, fail)
+        except ValueError as e:
+            errors.append(e)
+    _run_concurrently(call, [()] * 3)
+    assert len(errors) == 3
+
+def test_async_single_flight_survives_cancelled_caller():
+    async def run():
+        flights = AsyncSingleFlight(Metrics())
+        calls = []
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "done"
+        first = asyncio.create_task(flights.do("slow", "k", slow))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("slow", "k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "done"
+        assert calls == [1]
+    asyncio.run(run())
+
+def test_concurrent_adds_share_one_lookup_and_insert(tmp_path):
+    library = Library(str(tmp_path / "library.db"), metrics=Metrics())
+    http = SlowHTTP()
+    library.openlibrary = OpenLibraryClient(http, metrics=library.metrics, flights=library.openlibrary.flights)
+    results = _run_concurrently(library.add_book, [("9780199535675",), ("978-0199535675",), ("0199535674",)])
+    assert results == [True, True, True]
+    assert http.calls["/isbn/9780199535675.json"] + http.calls["/isbn/978-0199535675.json"] + http.calls["/isbn/0199535674.json"] == 1
+    assert http.calls["/authors/OL1A.json"] == 1
+    assert len(library.list_books()) == 1
+    library.close()
+
+def test_concurrent_lookups_share_author_requests():
+    http = SlowHTTP()
+    client = OpenLibraryClient(http, metrics=Metrics())
+    books = _run_concurrently(client.fetch_book, [("9780199535675",), ("9780141182452",)])
+    assert [book.author for book in books] == ["James Joyce", "James Joyce"]
+    assert http.calls["/authors/OL1A.json"] == 1
+
+def test_async_concurrent_adds_share_one_lookup(tmp_path):
+    library = Library(str(tmp_path / "library.db"), metrics=Metrics())
+    http = AsyncSlowHTTP()
+    alibrary = AsyncLibrary(library, http=http)
+
+    async def run():
+        return await asyncio.gather(*(alibrary.add_book(isbn) for isbn in ["9780199535675", "978-0199535675"] * 3))
+
+    books = asyncio.run(run())
+    assert all(book is not None and book.title == books[0].title for book in books)
+    assert sum(count for path, count in http.calls.items() if path.startswith("/isbn/")) == 1
+    assert library.metrics.value("library_coalesced_total", operation="add_book") == 5
+    library.close()
+
+def test_concurrent_bulk_adds_with_mixed_spellings(tmp_path):
+    library = Library(str(tmp_path / "library.db"), metrics=Metrics())
+    http = SlowHTTP()
+    library.openlibrary = OpenLibraryClient(http, metrics=library.metrics, flights=library.openlibrary.flights)
+    add_books, insert_books = library.add_books, library._insert_books
+    requested = threading.local()
+    def add(isbns):
+        requested.isbn = isbns[0]
+        return add_books(isbns)
+    def follower_inserts_first(books):
+        # The caller whose spelling was fetched inserts last
+        if http.calls[f"/isbn/{requested.isbn}.json"]:
+            time.sleep(0.1)
+        return insert_books(books)
+    library._insert_books = follower_inserts_first
+    reports = _run_concurrently(add, [(["978-0439023528"],), (["9780439023528"],)])
+    assert sorted(report[0]["status"] for report in reports) == ["added", "exists"]
+    assert [report[0]["isbn"] for report in reports] == ["978-0439023528", "9780439023528"]
+    assert len(library.list_books()) == 1
+    library.close()
+
+def test_async_concurrent_bulk_adds_with_mixed_spellings(tmp_path):
+    library = Library(str(tmp_path / "library.db"), metrics=Metrics())
+    alibrary = AsyncLibrary(library, http=AsyncSlowHTTP())
+
+    async def run():
+        return await asyncio.gather(alibrary.add_books(["978-0439023528"]), alibrary.add_books(["0439023521"]))
+
+    reports = asyncio.run(run())
+    assert sorted(report[0]["status"] for report in reports) == ["added", "exists"]
+    assert len(library.list_books()) == 1
+    library.close()
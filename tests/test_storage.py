@@ -0,0 +1,118 @@
+import pytest
+from book import Book
+from library import Library
+from metrics import Metrics
+from storage import MemoryStorage
+
+BOOKS = [
+    Book("Ulysses", "James Joyce", "9780199535675"),
+    Book("Dubliners", "James Joyce", "9780141182452"),
+    Book("dune", "Frank Herbert", "9780441172719"),
+    Book("Dune Messiah", "Frank Herbert", "9780441172696"),
+    Book("Good Omens", "Terry Pratchett, Neil Gaiman", "9780060853983"),
+    Book("Zen", "Unknown", "978-0000000026"),
+]
+
+QUERIES = [
+    {},
+    {"author": "JAMES joyce"},
+    {"author": "neil gaiman"},
+    {"author": "Unknown"},
+    {"title_prefix": "du"},
+    {"title_prefix": "DUNE M"},
+    {"author": "Frank Herbert", "title_prefix": "dune", "limit": 1},
+    {"after_isbn": "9780199535675", "limit": 2},
+    {"author": "James Joyce", "after_isbn": "9780141182452"},
+]
+
+def _titles(books):
+    return [book.title for book in books]
+
+@pytest.fixture
+def libraries(tmp_path):
+    sqlite = Library(str(tmp_path / "sqlite.db"))
+    memory = Library(str(tmp_path / "memory.db"), storage="memory", metrics=Metrics())
+    for library in (sqlite, memory):
+        library._insert_books(list(BOOKS))
+    yield sqlite, memory
+    sqlite.close()
+    memory.close()
+
+def test_memory_storage_matches_sqlite(libraries):
+    sqlite, memory = libraries
+    for kwargs in QUERIES:
+        assert _titles(memory.find_books(**kwargs)) == _titles(sqlite.find_books(**kwargs)), kwargs
+    assert _titles(memory.iter_books(batch_size=2)) == _titles(sqlite.iter_books())
+    assert _titles(memory.iter_books(after_isbn="9780199535675")) == _titles(sqlite.iter_books(after_isbn="9780199535675"))
+    assert memory.find_book("0-19-953567-4").title == "Ulysses"
+    assert memory.find_book("9780000000019") is None
+
+def test_memory_storage_follows_writes(libraries):
+    sqlite, memory = libraries
+    for library in (sqlite, memory):
+        library.update_book("9780199535675", title="Finnegans Wake")
+        library.update_book("9780060853983", author="Neil Gaiman")
+        library.remove_book("9780441172696")
+        library.add_pending_book("9780000000019")
+    for kwargs in QUERIES + [{"title_prefix": "finn"}, {"author": "Terry Pratchett"}]:
+        assert _titles(memory.find_books(**kwargs)) == _titles(sqlite.find_books(**kwargs)), kwargs
+    assert sorted(_titles(memory.list_books())) == sorted(_titles(sqlite.list_books()))
+    assert memory.find_book("9780441172696") is None
+
+def test_reads_skip_the_database(libraries):
+    _, memory = libraries
+    memory.metrics.reset()
+    memory.find_book("9780199535675")
+    memory.list_books()
+    memory.find_books(author="James Joyce")
+    assert "library_db_seconds" not in memory.metrics.render()
+
+def test_warm_load_from_existing_database(tmp_path):
+    db = str(tmp_path / "library.db")
+    with Library(db) as library:
+        library._insert_books(list(BOOKS))
+    with Library(db, storage="memory") as library:
+        assert len(library.storage) == len(BOOKS)
+        assert _titles(library.find_by_title_prefix("dune")) == ["Dune Messiah", "dune"]
+
+def test_unknown_storage_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Library(str(tmp_path / "library.db"), storage="redis")
+
+def test_memory_storage_put_replaces_by_canonical_isbn():
+    storage = MemoryStorage()
+    storage.put(Book("Ulysses", "James Joyce", "0-19-953567-4"))
+    storage.put(Book("Ulysses", "J. Joyce", "9780199535675"))
+    assert len(storage) == 1
+    assert storage.find(author="james joyce") == []
+    assert storage.get("0199535674").author == "J. Joyce"
+    assert storage.remove("9780199535675").author == "J. Joyce"
+    assert list(storage.iter_books()) == []
+
+def test_authors_are_matched_as_linked_in_book_authors(libraries):
+    book = Book("The Hobbit", "Tolkien, J. R. R.", "9780261103344", [("/authors/OL26320A", "Tolkien, J. R. R.")])
+    for library in libraries:
+        library._insert_books([book])
+    sqlite, memory = libraries
+    for kwargs in [{"author": "Tolkien, J. R. R."}, {"author": "Tolkien"}]:
+        assert _titles(memory.find_books(**kwargs)) == _titles(sqlite.find_books(**kwargs)), kwargs
+    # Reloading from the database keeps the linked names
+    memory.storage.load(memory._storage_books(memory._get_connection()))
+    assert _titles(memory.find_books(author="tolkien, j. r. r.")) == ["The Hobbit"]
+
+def test_memory_storage_bulk_writes_match_single_writes():
+    single, bulk = MemoryStorage(), MemoryStorage()
+    for book in BOOKS:
+        single.put(book)
+    bulk.put_many(BOOKS)
+    renamed = [Book("Dune (2nd ed.)", "Frank Herbert", "0441172717"), Book("Neverwhere", "Neil Gaiman", "9780060557812")]
+    for book in renamed:
+        single.put(book)
+    bulk.put_many(renamed)
+    single.remove("9780199535675")
+    single.remove("9780060853983")
+    bulk.remove_many(["0-19-953567-4", "9780060853983", "9780000000019"])
+    assert len(bulk) == len(single)
+    assert _titles(bulk.iter_books()) == _titles(single.iter_books())
+    for kwargs in QUERIES + [{"author": "neil gaiman"}, {"title_prefix": "dune ("}]:
+        assert _titles(bulk.find(**kwargs)) == _titles(single.find(**kwargs)), kwargs
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from book import Book
+from library import Library
+from metrics import Metrics
+
+@pytest.fixture
+def library(tmp_path):
+    library = Library(str(tmp_path / "library.db"), metrics=Metrics(), write_batch_window=0.05)
+    yield library
+    library.close()
+
+def _run_concurrently(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_concurrent_writes_share_a_transaction(library):
+    books = [Book(f"Book {n}", "Author", f"97800000000{n:02d}") for n in range(20)]
+    results = {}
+    _run_concurrently([lambda book=book: results.update({book.isbn: library._insert_book(book)}) for book in books])
+    assert all(results[book.isbn].title == book.title for book in books)
+    assert len(library.list_books()) == 20
+    batches = library.metrics.value("library_write_batches_total")
+    assert library.metrics.value("library_write_batch_operations_total") == 20
+    assert 1 <= batches < 20
+
+def test_failed_write_does_not_abort_its_batch(library):
+    def fail(conn):
+        conn.execute("INSERT INTO books (title, author, isbn, isbn_key) VALUES ('Lost', 'Nobody', 'x', 'x')")
+        raise ValueError("boom")
+
+    errors = []
+    def failing():
+        try:
+            library._write("fail", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    _run_concurrently([failing, lambda: library._insert_book(Book("Ulysses", "James Joyce", "9780199535675"))])
+    assert [str(e) for e in errors] == ["boom"]
+    assert [book.title for book in library.list_books()] == ["Ulysses"]
+
+def test_per_operation_results(library):
+    library._insert_book(Book("Ulysses", "James Joyce", "9780199535675"))
+    results = {}
+    _run_concurrently([
+        lambda: results.update(update=library.update_book("978-0199535675", title="Finnegans Wake")),
+        lambda: results.update(duplicate=library._insert_book(Book("Ulysses", "James Joyce", "9780199535675"))),
+        lambda: results.update(missing=library.remove_book("9780000000019")),
+    ])
+    assert results == {"update": results["update"], "duplicate": None, "missing": None}
+    assert results["update"].title == "Finnegans Wake"
+
+def test_close_commits_and_queue_restarts(library, tmp_path):
+    library._insert_book(Book("Ulysses", "James Joyce", "9780199535675"))
+    library.close()
+    assert library.write_queue._thread is None
+    assert library.remove_book("9780199535675").title == "Ulysses"
+    assert library.list_books() == []
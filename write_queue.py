@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """
+    Runs the writes of many threads in shared transactions (group commit).
+
+    A single writer thread executes the queued writes one after another inside one
+    BEGIN IMMEDIATE ... COMMIT, so they take the database lock and sync the WAL once.
+    Writes submitted while a transaction is running join the next one; a positive
+    `window` also holds each transaction open for late arrivals. Every write runs in its own
+    savepoint: a write that raises is rolled back alone and its caller gets the
+    exception, while the rest of the batch is committed.
+
+    Attributes:
+        library (Library): The library whose connection pool and metrics are used.
+        window (float): Seconds to wait for more writes after the first one arrives.
+        max_batch (int): The most writes per transaction.
+    """
+
+    def __init__(self, library, window: float = 0.0, max_batch: int = 256):
+        """
+        Initializes the queue. The writer thread starts with the first write.
+
+        Args:
+            library (Library): The library whose connection pool and metrics are used.
+            window (float): Seconds to wait for more writes. Defaults to 0: only
+                the writes that queued up during the previous commit are batched.
+            max_batch (int): The most writes per transaction. Defaults to 256.
+        """
+        self.library = library
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []  # (operation, func, future) in arrival order
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closing = False
+
+    def submit(self, operation: str, func):
+        """
+        Run func(conn) in the next group commit and wait until it is committed.
+
+        Args:
+            operation (str): The operation label for the library_db_seconds metric.
+            func (callable): Runs the write's statements on the given connection.
+                It must not commit or roll back.
+
+        Returns:
+            The value returned by func.
+
+        Raises:
+            Exception: What func raised, or the error that made the commit fail.
+        """
+        future = Future()
+        with self._cond:
+            self._pending.append((operation, func, future))
+            if self._thread is None:
+                self._closing = False
+                self._thread = threading.Thread(target=self._run, name="library-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future.result()
+
+    def close(self):
+        """
+        Commit the writes already submitted and stop the writer thread.
+        A later submit() starts it again.
+        """
+        with self._cond:
+            thread = self._thread
+            self._closing = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    self._thread = None
+                    return
+                # Give concurrent writers a moment to join the transaction
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """
+        Run a batch of writes in one transaction and hand every caller its result.
+        """
+        metrics = self.library.metrics
+        conn = None
+        outcomes = []
+        try:
+            conn = self.library._get_connection()
+            with metrics.time("library_db_seconds", operation="group_commit"):
+                conn.execute("BEGIN IMMEDIATE")
+                for operation, func, future in batch:
+                    conn.execute("SAVEPOINT write")
+                    try:
+                        with metrics.time("library_db_seconds", operation=operation):
+                            result = func(conn)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write")
+                        conn.execute("RELEASE write")
+                        outcomes.append((future, None, e))
+                    else:
+                        conn.execute("RELEASE write")
+                        outcomes.append((future, result, None))
+                conn.commit()
+        except Exception as e:
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        metrics.inc("library_write_batches_total")
+        metrics.inc("library_write_batch_operations_total", len(batch))
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)